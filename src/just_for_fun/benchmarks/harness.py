@@ -0,0 +1,154 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# A case is slower than its baseline if its median time grew by more than this fraction
+DEFAULT_THRESHOLD = 0.10
+
+
+@dataclass
+class Case:
+    """
+    One thing to time. `setup()` builds fresh state outside the timer (e.g. a new
+    simulation object) and `run(state)` is the timed work. `params` identify the
+    point on a scaling curve (e.g. {"engine": "array", "population": 1000}).
+    """
+    suite: str
+    name: str
+    params: Dict[str, Any]
+    run: Callable[[Any], Any]
+    setup: Callable[[], Any] = lambda: None
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used to match results against a baseline."""
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.suite}/{self.name}[{params}]"
+
+
+@dataclass
+class Result:
+    key: str
+    suite: str
+    name: str
+    params: Dict[str, Any]
+    times: List[float]
+    peak_memory: Optional[int] = None
+    stats: Dict[str, float] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not self.stats:
+            self.stats = {
+                "min": min(self.times),
+                "median": statistics.median(self.times),
+                "mean": statistics.fmean(self.times),
+                "stdev": statistics.stdev(self.times) if len(self.times) > 1 else 0.0,
+                "max": max(self.times),
+            }
+
+    def to_dict(self) -> dict:
+        return {"key": self.key, "suite": self.suite, "name": self.name, "params": self.params,
+                "times": self.times, "stats": self.stats, "peak_memory": self.peak_memory}
+
+
+def measure(case: Case, repeat: int = 5, warmup: int = 1, memory: bool = True) -> Result:
+    """
+    Time a case: `warmup` untimed runs, then `repeat` timed runs with time.perf_counter.
+    Peak memory (bytes allocated through Python and NumPy, via tracemalloc) is taken
+    in one extra run, since tracing slows everything down and would skew the timings.
+    """
+    for _ in range(warmup):
+        case.run(case.setup())
+
+    times = []
+    for _ in range(repeat):
+        state = case.setup()
+        start = time.perf_counter()
+        case.run(state)
+        times.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        state = case.setup()
+        tracemalloc.start()
+        try:
+            case.run(state)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return Result(case.key, case.suite, case.name, case.params, times, peak)
+
+
+def run_cases(cases: List[Case], repeat: int = 5, warmup: int = 1, memory: bool = True,
+              progress: Callable[[Result], None] = None) -> List[Result]:
+    results = []
+    for case in cases:
+        result = measure(case, repeat, warmup, memory)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return results
+
+
+def environment() -> dict:
+    """Where the numbers were taken, so baselines from other machines are recognizable."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def save_results(path: str, results: List[Result], settings: dict = None):
+    report = {"environment": environment(), "settings": settings or {},
+              "results": [r.to_dict() for r in results]}
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    """Results of a saved report, by case key."""
+    with open(path) as f:
+        report = json.load(f)
+    return {r["key"]: r for r in report["results"]}
+
+
+def compare(results: List[Result], baseline: Dict[str, dict], threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """
+    Compare median times (and peak memory) against a baseline report.
+
+    Returns one row per case present in both, with the ratios and a `regression`
+    flag when the median time grew by more than `threshold` (e.g. 0.10 = 10%)
+    and by more than twice the run-to-run spread, so noise on tiny cases is not flagged.
+    """
+    rows = []
+    for result in results:
+        base = baseline.get(result.key)
+        if base is None:
+            continue
+        time_ratio = result.stats["median"] / base["stats"]["median"]
+        noise = 2 * max(result.stats["stdev"], base["stats"]["stdev"])
+        slower = result.stats["median"] - base["stats"]["median"] > noise
+        memory_ratio = None
+        if result.peak_memory and base.get("peak_memory"):
+            memory_ratio = result.peak_memory / base["peak_memory"]
+        rows.append({
+            "key": result.key,
+            "median": result.stats["median"],
+            "baseline_median": base["stats"]["median"],
+            "time_ratio": time_ratio,
+            "memory_ratio": memory_ratio,
+            "regression": time_ratio > 1 + threshold and slower,
+        })
+    return rows
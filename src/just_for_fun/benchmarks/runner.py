@@ -0,0 +1,196 @@
+import argparse
+import sys
+
+from just_for_fun.profiling import PhaseProfiler
+from sun_earth.model.integrators import Integrator
+
+from . import harness
+from .suites import (POPULATION_ENGINES, METHODS, FORCE_BACKENDS, NBODY_DT, STARTUP_TARGET,
+                     population_cases, nbody_cases, startup_cases, disk_system, heavy_imports)
+
+SUITES = ("population", "nbody", "startup")
+
+# Small sizes for a fast smoke run (--quick)
+QUICK = {"sizes": "100,1000", "years": "100", "bodies": "2,64", "steps": "50", "repeat": 2}
+
+
+def _int_list(text: str):
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def _name_list(text: str, known, parser, what):
+    names = tuple(x.strip() for x in text.split(",") if x.strip())
+    unknown = [n for n in names if n not in known]
+    if unknown:
+        parser.error(f"Unknown {what}: {', '.join(unknown)} (choose from {', '.join(known)})")
+    return names
+
+
+def run_phase_benchmark(population_size: int, years: int, engines, allocations: bool = False):
+    """Per-phase times (and with allocations=True net allocations) of each engine's step()."""
+    import pandas as pd
+
+    print(f"\n--- Per-phase timings with Initial Population: {population_size} ---")
+    seconds = {}
+    for key in engines:
+        label, engine_cls = POPULATION_ENGINES[key]
+        sim = engine_cls(initial_ordinary=population_size, initial_bio=population_size,
+                         profile=PhaseProfiler(allocations=allocations))
+        sim.run(years)
+        sim.profiler.stop()
+        print(sim.profiler.report(title=f"\n{label}"))
+        seconds[key] = {phase: row["seconds"] for phase, row in sim.profiler.to_dict().items()}
+
+    df = pd.DataFrame(seconds).T.rename_axis("engine")
+    if len(df) > 1:
+        print("\nSpeedup per phase vs", df.index[0])
+        print((df.iloc[0] / df.iloc[1:]).to_string(float_format=lambda x: f"{x:.2f}x"))
+
+
+def run_nbody_phase_benchmark(n_bodies: int, steps: int, methods, backends, allocations: bool = False):
+    """Per-phase times (kick, drift, forces, history, ...) of the integrator steps, optionally with allocations."""
+    print(f"\n--- Per-phase timings with {n_bodies} bodies, {steps} steps ---")
+    for method in methods:
+        for backend in backends:
+            system = disk_system(n_bodies, force_backend=backend, profile=PhaseProfiler(allocations=allocations))
+            Integrator.run(system, steps, NBODY_DT, method)
+            system.profiler.stop()
+            print(system.profiler.report(title=f"\n{method} / {backend}"))
+
+
+def print_progress(result: harness.Result):
+    s = result.stats
+    memory = f"  peak {result.peak_memory / 2**20:7.1f} MiB" if result.peak_memory is not None else ""
+    print(f"{result.key:<60} median {s['median']:.4f}s  (min {s['min']:.4f}s, sd {s['stdev']:.4f}s){memory}")
+
+
+def print_population_summary(results, engines):
+    """Engine times per scenario, with speedups against the first (baseline) engine."""
+    import pandas as pd
+
+    rows = [{**r.params, "engine": r.name, "median": r.stats["median"]} for r in results if r.suite == "population"]
+    if not rows:
+        return
+    table = pd.DataFrame(rows).pivot_table(index=["population", "years"], columns="engine", values="median")
+    table = table[[e for e in engines if e in table.columns]]
+    for key in table.columns[1:]:
+        table[f"{key}_speedup"] = table[table.columns[0]] / table[key]
+    print("\n--- Population summary (median seconds) ---")
+    print(table.to_string(float_format=lambda x: f"{x:.4f}"))
+
+
+def print_nbody_summary(results):
+    import pandas as pd
+
+    rows = [{**r.params, "case": r.name, "median": r.stats["median"]} for r in results if r.suite == "nbody"]
+    if not rows:
+        return
+    table = pd.DataFrame(rows).pivot_table(index=["bodies", "steps"], columns="case", values="median")
+    print("\n--- N-body summary (median seconds) ---")
+    print(table.to_string(float_format=lambda x: f"{x:.4f}"))
+
+
+def check_startup(results, target: float) -> bool:
+    """Print the cold-start times against the target; False if it is missed or a heavy module is imported."""
+    medians = {r.name: r.stats["median"] for r in results if r.suite == "startup"}
+    if "core" not in medians:
+        return True
+    heavy = heavy_imports()
+    print(f"\n--- Startup (median seconds, target {target:.2f}s for the core engines) ---")
+    for name, median in medians.items():
+        print(f"{name:<8} {median:.4f}s")
+    print(f"Engines on top of NumPy: {medians['core'] - medians.get('numpy', 0.0):.4f}s")
+    print(f"Heavy modules imported: {', '.join(heavy) if heavy else 'none'}")
+
+    ok = medians["core"] <= target and not heavy
+    print("Startup target met" if ok else "STARTUP TARGET MISSED")
+    return ok
+
+
+def print_comparison(rows, threshold):
+    print(f"\n--- Comparison with baseline (regression = median > {1 + threshold:.2f}x) ---")
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        memory = f"  memory {row['memory_ratio']:.2f}x" if row["memory_ratio"] is not None else ""
+        print(f"{row['key']:<60} {row['time_ratio']:.2f}x{memory}  {flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the population engines and the Sun-Earth / N-body integrators.")
+    parser.add_argument("--suite", default="population",
+                        help=f"Comma-separated suites to run ({', '.join(SUITES)})")
+    parser.add_argument("--engines", default="agent,matrix",
+                        help=f"Population engines, first is the baseline ({', '.join(POPULATION_ENGINES)})")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Initial population per type")
+    parser.add_argument("--years", default="500", help="Simulated years (comma-separated for a curve)")
+    parser.add_argument("--methods", default="leapfrog", help=f"Integrators ({', '.join(METHODS)})")
+    parser.add_argument("--backends", default="direct,barnes_hut", help=f"Force backends ({', '.join(FORCE_BACKENDS)})")
+    parser.add_argument("--bodies", default="2,64,512", help="Number of bodies")
+    parser.add_argument("--steps", default="100", help="Integration steps")
+    parser.add_argument("--startup-target", type=float, default=STARTUP_TARGET,
+                        help="Seconds a fresh interpreter may take to import the core engines (startup suite)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per case before timing")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory run")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against a JSON report saved with --json")
+    parser.add_argument("--threshold", type=float, default=harness.DEFAULT_THRESHOLD,
+                        help="Relative slowdown of the median that counts as a regression")
+    parser.add_argument("--quick", action="store_true", help="Small sizes and few repeats for a smoke run")
+    parser.add_argument("--phases", action="store_true",
+                        help="Also report per-phase times (aging / pairing / breeding / stats, "
+                             "kick / drift / forces / history) from the engines' profilers")
+    parser.add_argument("--allocations", action="store_true",
+                        help="With --phases, also report the net memory each phase leaves allocated "
+                             "(tracemalloc, slows the phases down)")
+    args = parser.parse_args(argv)
+    if args.allocations and not args.phases:
+        parser.error("--allocations needs --phases")
+
+    if args.quick:
+        for name, value in QUICK.items():
+            if getattr(args, name) == parser.get_default(name):
+                setattr(args, name, value)
+
+    suites = _name_list(args.suite, SUITES, parser, "suite")
+    engines = _name_list(args.engines, POPULATION_ENGINES, parser, "engine")
+    methods = _name_list(args.methods, METHODS, parser, "method")
+    backends = _name_list(args.backends, FORCE_BACKENDS, parser, "backend")
+    sizes, years = _int_list(args.sizes), _int_list(args.years)
+
+    cases = []
+    if "population" in suites:
+        cases += population_cases(engines, sizes, years)
+    if "nbody" in suites:
+        cases += nbody_cases(methods, backends, _int_list(args.bodies), _int_list(args.steps))
+    if "startup" in suites:
+        cases += startup_cases()
+
+    results = harness.run_cases(cases, args.repeat, args.warmup, not args.no_memory, progress=print_progress)
+    print_population_summary(results, engines)
+    print_nbody_summary(results)
+    startup_ok = check_startup(results, args.startup_target)
+
+    if args.phases and "population" in suites:
+        for size in sizes:
+            run_phase_benchmark(size, years[0], engines, args.allocations)
+    if args.phases and "nbody" in suites:
+        for n_bodies in _int_list(args.bodies):
+            run_nbody_phase_benchmark(n_bodies, _int_list(args.steps)[0], methods, backends, args.allocations)
+
+    if args.json:
+        settings = {k: v for k, v in vars(args).items() if k not in ("json", "baseline")}
+        harness.save_results(args.json, results, settings)
+        print(f"\nResults written to {args.json}")
+
+    if args.baseline:
+        rows = harness.compare(results, harness.load_results(args.baseline), args.threshold)
+        print_comparison(rows, args.threshold)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0 if startup_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import os
+import subprocess
+import sys
+from functools import partial
+from typing import List, Sequence
+
+import numpy as np
+
+from simulation.engine import Simulation
+from simulation.array_engine import ArraySimulation
+from simulation.matrix_engine import MatrixSimulation
+from sun_earth.config import G, M_SUN
+from sun_earth.model.system import SolarSystem
+from sun_earth.model.integrators import Integrator
+
+from .harness import Case
+
+POPULATION_ENGINES = {
+    "agent": ("Agent-Based", Simulation),
+    "array": ("Array-Based", ArraySimulation),
+    "matrix": ("Matrix-Based", MatrixSimulation),
+    "matrix-ring": ("Matrix-Based (ring buffer)", partial(MatrixSimulation, ring_buffer=True)),
+}
+
+METHODS = ("euler", "leapfrog", "yoshida4", "rk45", "adaptive_leapfrog", "wisdom_holman")
+FORCE_BACKENDS = ("direct", "barnes_hut")
+
+# Step used by the N-body cases: a day, like the default time step
+NBODY_DT = 1 / 365
+
+# What a short-lived worker process imports to run the engines. A fresh interpreter
+# should get through all of it within STARTUP_TARGET seconds, with NumPy as the
+# only heavy dependency (measured at about 0.2 s, of which NumPy is 0.17 s).
+CORE_MODULES = (
+    "simulation.engine",
+    "simulation.array_engine",
+    "simulation.matrix_engine",
+    "simulation.stochastic_engine",
+    "sun_earth.model.system",
+    "sun_earth.model.integrators",
+)
+HEAVY_MODULES = ("pandas", "matplotlib", "scipy", "IPython")
+STARTUP_TARGET = 0.3
+
+# Root of the packages (src/), so the child interpreters find them even without an install
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def population_cases(engines: Sequence[str], sizes: Sequence[int], years: Sequence[int]) -> List[Case]:
+    """
+    Scaling curves of the population engines: every engine at every
+    (initial population per type, years) combination.
+    """
+    cases = []
+    for key in engines:
+        engine_cls = POPULATION_ENGINES[key][1]
+        for size in sizes:
+            for n_years in years:
+                cases.append(Case(
+                    suite="population",
+                    name=key,
+                    params={"population": size, "years": n_years},
+                    setup=partial(engine_cls, initial_ordinary=size, initial_bio=size),
+                    run=partial(_run_population, years=n_years),
+                ))
+    return cases
+
+
+def _run_population(sim, years):
+    sim.run(years)
+
+
+def disk_system(n_bodies: int, seed: int = 0, force_backend: str = "direct", profile=False) -> SolarSystem:
+    """
+    A Sun plus n_bodies - 1 light bodies on near-circular orbits between 0.5 and 5 AU,
+    a stand-in for a planetary system or an asteroid belt of the given size.
+    `profile` is passed on to SolarSystem (True or a PhaseProfiler).
+    """
+    rng = np.random.default_rng(seed)
+    n = n_bodies - 1
+    radius = rng.uniform(0.5, 5.0, n)
+    angle = rng.uniform(0, 2 * np.pi, n)
+    speed = np.sqrt(G * M_SUN / radius)
+
+    masses = np.concatenate([[M_SUN], rng.uniform(1e-9, 1e-6, n)])
+    positions = np.zeros((n_bodies, 2))
+    velocities = np.zeros((n_bodies, 2))
+    positions[1:, 0] = radius * np.cos(angle)
+    positions[1:, 1] = radius * np.sin(angle)
+    velocities[1:, 0] = -speed * np.sin(angle)
+    velocities[1:, 1] = speed * np.cos(angle)
+
+    system = SolarSystem.from_arrays(masses, positions, velocities, force_backend=force_backend,
+                                     trajectory_capacity=16, profile=profile)
+    system.compute_forces()
+    return system
+
+
+def nbody_cases(methods: Sequence[str], backends: Sequence[str], bodies: Sequence[int],
+                steps: Sequence[int]) -> List[Case]:
+    """
+    Scaling curves of the Sun-Earth / N-body code: every integrator with every
+    force backend at every (number of bodies, number of steps) combination.
+    Wisdom-Holman rows time the backend on its kicks among the non-central bodies.
+    """
+    cases = []
+    for method in methods:
+        for backend in backends:
+            for n_bodies in bodies:
+                for n_steps in steps:
+                    cases.append(Case(
+                        suite="nbody",
+                        name=f"{method}/{backend}",
+                        params={"bodies": n_bodies, "steps": n_steps},
+                        setup=partial(disk_system, n_bodies, force_backend=backend),
+                        run=partial(_run_nbody, steps=n_steps, method=method),
+                    ))
+    return cases
+
+
+def _run_nbody(system, steps, method):
+    Integrator.run(system, steps, NBODY_DT, method)
+
+
+def startup_cases(modules: Sequence[str] = CORE_MODULES) -> List[Case]:
+    """
+    Cold-start cost: a fresh interpreter doing nothing ("python"), importing NumPy
+    alone ("numpy"), and importing all of `modules` ("core").
+    """
+    scenarios = {"python": (), "numpy": ("numpy",), "core": tuple(modules)}
+    return [Case(suite="startup", name=name, params={"modules": len(imports)},
+                 run=partial(_run_startup, imports=imports))
+            for name, imports in scenarios.items()]
+
+
+def _child_env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (_SRC_DIR, env.get("PYTHONPATH")) if p)
+    return env
+
+
+def _run_startup(_state, imports):
+    code = "; ".join(f"import {name}" for name in imports) or "pass"
+    subprocess.run([sys.executable, "-c", code], env=_child_env(), check=True)
+
+
+def heavy_imports(modules: Sequence[str] = CORE_MODULES) -> List[str]:
+    """HEAVY_MODULES that importing `modules` in a fresh interpreter pulls in (should be none)."""
+    code = (f"import sys; {'; '.join(f'import {name}' for name in modules)}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], env=_child_env(), check=True,
+                            capture_output=True, text=True)
+    return [name for name in result.stdout.strip().split(",") if name]
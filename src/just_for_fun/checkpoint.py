@@ -0,0 +1,33 @@
+import json
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+
+# Bumped whenever the layout of a checkpoint changes incompatibly
+FORMAT_VERSION = 2
+
+
+def save(path: str, engine: str, arrays: Dict[str, np.ndarray], meta: dict):
+    """
+    Write one checkpoint: the arrays uncompressed in a single .npz, plus a JSON
+    header under "__meta__". The file is written next to `path` and renamed over
+    it, so a job killed mid-write leaves the previous checkpoint intact.
+    """
+    header = dict(meta, engine=engine, format_version=FORMAT_VERSION)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, __meta__=np.array(json.dumps(header)), **arrays)
+    os.replace(tmp_path, path)
+
+
+def load(path: str, engine: str) -> Tuple[Dict[str, np.ndarray], dict]:
+    """Read a checkpoint written by `save` for `engine`; returns (arrays, meta)."""
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files if name != "__meta__"}
+        meta = json.loads(str(data["__meta__"]))
+    if meta.get("engine") != engine:
+        raise ValueError(f"Checkpoint is for {meta.get('engine')!r}, not {engine!r}")
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format {meta.get('format_version')}")
+    return arrays, meta
@@ -0,0 +1,116 @@
+import sys
+import time
+import tracemalloc
+from typing import Dict, Optional, Union
+
+
+class PhaseProfiler:
+    """
+    Accumulates wall time and call counts per named phase of a hot loop.
+
+    Engines keep `self.profiler = None` unless profiling is asked for, and guard
+    every measurement with `if prof is not None`, so a run without profiling pays
+    one attribute check per phase and nothing else. Phases are timed back to back:
+
+        prof = self.profiler
+        mark = prof.start() if prof is not None else None
+        ...aging...
+        if prof is not None:
+            mark = prof.lap("aging", mark)
+
+    With allocations=True every phase also records the net bytes it left allocated
+    (via tracemalloc, which slows the run down considerably) and the net change in
+    the interpreter's allocated memory blocks.
+    """
+
+    def __init__(self, allocations: bool = False):
+        self.allocations = allocations
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.alloc_bytes: Dict[str, int] = {}
+        self.alloc_blocks: Dict[str, int] = {}
+        # Tracing someone else turned on (e.g. python -X tracemalloc) is left running by stop()
+        self._started = allocations and not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+
+    def start(self):
+        """A mark for the beginning of a phase."""
+        if self.allocations:
+            return time.perf_counter(), tracemalloc.get_traced_memory()[0], sys.getallocatedblocks()
+        return time.perf_counter()
+
+    def lap(self, phase: str, mark):
+        """Charge everything since `mark` to `phase`; returns a mark for the next phase."""
+        now = self.start()
+        if self.allocations:
+            elapsed = now[0] - mark[0]
+            self.alloc_bytes[phase] = self.alloc_bytes.get(phase, 0) + now[1] - mark[1]
+            self.alloc_blocks[phase] = self.alloc_blocks.get(phase, 0) + now[2] - mark[2]
+        else:
+            elapsed = now - mark
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + elapsed
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        return now
+
+    def stop(self):
+        """Stop allocation tracing if this profiler started it."""
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def reset(self):
+        for totals in (self.seconds, self.calls, self.alloc_bytes, self.alloc_blocks):
+            totals.clear()
+
+    @property
+    def total(self) -> float:
+        return sum(self.seconds.values())
+
+    def to_dict(self) -> Dict[str, dict]:
+        """{phase: {"seconds", "calls", "per_call", "share"[, "alloc_bytes", "alloc_blocks"]}}"""
+        total = self.total or 1.0
+        rows = {}
+        for phase, seconds in self.seconds.items():
+            calls = self.calls[phase]
+            row = {"seconds": seconds, "calls": calls, "per_call": seconds / calls, "share": seconds / total}
+            if self.allocations:
+                row["alloc_bytes"] = self.alloc_bytes[phase]
+                row["alloc_blocks"] = self.alloc_blocks[phase]
+            rows[phase] = row
+        return rows
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        return pd.DataFrame.from_dict(self.to_dict(), orient="index").rename_axis("phase")
+
+    def report(self, title: Optional[str] = None) -> str:
+        """Text table of the phases, slowest first."""
+        rows = sorted(self.to_dict().items(), key=lambda item: -item[1]["seconds"])
+        header = f"{'phase':<16} {'calls':>9} {'total s':>10} {'per call us':>12} {'share':>7}"
+        if self.allocations:
+            header += f" {'net KiB':>10} {'net blocks':>11}"
+        lines = [title] if title else []
+        lines.append(header)
+        for phase, row in rows:
+            line = (f"{phase:<16} {row['calls']:>9} {row['seconds']:>10.4f} "
+                    f"{row['per_call'] * 1e6:>12.1f} {row['share']:>7.1%}")
+            if self.allocations:
+                line += f" {row['alloc_bytes'] / 1024:>10.1f} {row['alloc_blocks']:>11}"
+            lines.append(line)
+        lines.append(f"{'total':<16} {'':>9} {self.total:>10.4f}")
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.report()
+
+
+def profiler_for(profile: Union[bool, PhaseProfiler]) -> Optional[PhaseProfiler]:
+    """
+    The profiler an engine keeps for its `profile` argument: None for False, a new
+    PhaseProfiler for True, or the given one as is (e.g. PhaseProfiler(allocations=True)).
+    """
+    if isinstance(profile, PhaseProfiler):
+        return profile
+    return PhaseProfiler() if profile else None
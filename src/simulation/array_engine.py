@@ -0,0 +1,283 @@
+import random
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+import numpy as np
+
+from .history import History
+from .models import PersonType
+from . import checkpoint, streaming
+from .streaming import Snapshot
+from .stopping import StopCriteria
+from .breeding import BreedingRules, DEFAULT_RULES
+from just_for_fun.profiling import PhaseProfiler, profiler_for
+
+# Integer codes, same layout as the MatrixSimulation tensor
+# Gender: 0=Male, 1=Female
+# Type: 0=Ordinary, 1=Bio (with the default rules; in general rules.types order)
+MALE, FEMALE = 0, 1
+ORDINARY, BIO = 0, 1
+
+FERTILE_AGE = 20
+LIFESPAN = 80
+
+
+class ArraySimulation:
+    """
+    Agent-based simulation with the population stored as parallel NumPy arrays
+    (structure of arrays) instead of a list of Person objects.
+
+    Every individual is still tracked and drawn separately, and the RNG is consumed
+    in the same order as Simulation, so both engines give the same history for a seed.
+
+    Newborns are always appended, so the columns stay sorted by birth year and each
+    birth cohort is one contiguous slice. A cohort index (birth year -> slice) turns
+    finding the fertile cohort and dropping the dead one into O(cohort size) work.
+    """
+    # Years between a parent's birth and a child's (see Simulation.generation)
+    generation = FERTILE_AGE
+
+    def __init__(self, initial_ordinary: int = 100, initial_bio: int = 100, seed: Optional[int] = None,
+                 record_every: int = 1, profile: Union[bool, PhaseProfiler] = False,
+                 rules: BreedingRules = DEFAULT_RULES):
+        self.year = 0
+        self.history = History(stride=record_every)
+        # Same RNGs, used in the same order, as Simulation
+        self.rng = random.Random(seed)
+        self.birth_rng = np.random.default_rng(seed)
+        self.rules = rules
+        # Per-phase timings of step(), see profiler.report(); None = off.
+        # Pass PhaseProfiler(allocations=True) to also track allocations per phase
+        self.profiler = profiler_for(profile)
+
+        # Columns are growable buffers addressed by a logical index that only increases.
+        # Buffer position = logical index - self._base; the living are [self._head, self._tail).
+        n = initial_ordinary + initial_bio
+        capacity = max(2 * n, 64)
+        self._birth_year = np.zeros(capacity, dtype=np.int32)
+        self._gender = np.zeros(capacity, dtype=np.int8)
+        self._type = np.zeros(capacity, dtype=np.int8)
+        self._base = 0
+        self._head = 0
+        self._tail = 0
+
+        # birth year -> (start, stop) logical range of that cohort
+        self._cohorts: Dict[int, Tuple[int, int]] = {}
+        # Running totals per type, updated from the entering and leaving cohorts
+        self._type_counts = np.zeros(len(rules.types), dtype=np.int64)
+
+        initial_type = np.full(n, rules.code(PersonType.ORDINARY), dtype=np.int8)
+        initial_type[initial_ordinary:] = rules.code(PersonType.BIO)
+        self._add_cohort(self._draw_genders(n), initial_type)
+
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    # Views over the living population, in the same order as Simulation.population
+
+    @property
+    def age(self) -> np.ndarray:
+        return self.year - self._birth_year[self._head - self._base:self._tail - self._base]
+
+    @property
+    def gender(self) -> np.ndarray:
+        return self._gender[self._head - self._base:self._tail - self._base]
+
+    @property
+    def person_type(self) -> np.ndarray:
+        return self._type[self._head - self._base:self._tail - self._base]
+
+    def run(self, years: int, checkpoint_every: int = 0, checkpoint_path: Optional[str] = None,
+            stop: Optional[StopCriteria] = None) -> Optional[str]:
+        """
+        Advance `years` years. With checkpoint_every=N the state is saved to
+        checkpoint_path every N years; resume with from_checkpoint(path).run(...).
+
+        With stop=StopCriteria(...) the run ends early on extinction, a population cap
+        or a steady state; returns the reason (see simulation.stopping), or None.
+        """
+        self.history.reserve(years // self.history.stride + 1)
+        if stop is not None:
+            stop.reset(self)
+        for i in range(years):
+            self.step()
+            if checkpoint.due(self.year, checkpoint_every, checkpoint_path):
+                self.save_checkpoint(checkpoint_path)
+            if stop is not None:
+                reason = stop.check(self, years_left=years - i - 1)
+                if reason is not None:
+                    return reason
+        return None
+
+    def iter_run(self, years: int, every: int = 1,
+                 until: Optional[Callable[[Snapshot], bool]] = None) -> Iterator[Snapshot]:
+        """
+        Like run(years), but yields a Snapshot every `every` years as it goes and
+        stops early once until(snapshot) is true, e.g. until=lambda s: s.extinct.
+        History is still recorded (use a large record_every to keep memory flat).
+        """
+        return streaming.iter_run(self, years, every, until)
+
+    def save_checkpoint(self, path: str):
+        """Save the living population, cohort index, RNG state, year and history."""
+        live = slice(self._head - self._base, self._tail - self._base)
+        arrays, meta = self.history.state()
+        rng_words, rng_meta = checkpoint.random_state(self.rng)
+        rules_arrays, rules_meta = checkpoint.rules_state(self.rules)
+        arrays.update(rules_arrays)
+        arrays.update(
+            birth_year=self._birth_year[live],
+            gender=self._gender[live],
+            person_type=self._type[live],
+            cohorts=np.array([(year, start, stop) for year, (start, stop) in self._cohorts.items()],
+                             dtype=np.int64).reshape(-1, 3),
+            type_counts=self._type_counts,
+            rng_state=rng_words,
+        )
+        meta.update(rng_meta)
+        meta.update(rules_meta, year=self.year, birth_rng=checkpoint.generator_state(self.birth_rng),
+                    head=self._head, tail=self._tail)
+        checkpoint.save(path, "ArraySimulation", arrays, meta)
+
+    @classmethod
+    def from_checkpoint(cls, path: str) -> "ArraySimulation":
+        arrays, meta = checkpoint.load(path, "ArraySimulation")
+        sim = cls.__new__(cls)
+        sim.profiler = None
+        sim.year = meta["year"]
+        sim.history = History.from_state(arrays, meta)
+        sim.rng = checkpoint.restore_random(arrays["rng_state"], meta)
+        sim.birth_rng = checkpoint.restore_generator(meta["birth_rng"])
+        sim.rules = checkpoint.restore_rules(arrays, meta)
+
+        # The living go to the front of fresh buffers
+        live = meta["tail"] - meta["head"]
+        capacity = max(2 * live, 64)
+        sim._base = sim._head = meta["head"]
+        sim._tail = meta["tail"]
+        for name, key in (("_birth_year", "birth_year"), ("_gender", "gender"), ("_type", "person_type")):
+            buffer = np.zeros(capacity, dtype=arrays[key].dtype)
+            buffer[:live] = arrays[key]
+            setattr(sim, name, buffer)
+        sim._cohorts = {int(year): (int(start), int(stop)) for year, start, stop in arrays["cohorts"]}
+        sim._type_counts = arrays["type_counts"].copy()
+        return sim
+
+    def step(self):
+        self.year += 1
+        prof = self.profiler
+        mark = prof.start() if prof is not None else None
+
+        # 1. Aging and Death
+        self._handle_aging()
+        if prof is not None:
+            mark = prof.lap("aging", mark)
+
+        # 2. Reproduction
+        father_type, mother_type = self._pair_up()
+        if prof is not None:
+            mark = prof.lap("pairing", mark)
+        child_gender, child_type = self._breed_pairs(father_type, mother_type)
+        self._add_cohort(child_gender, child_type)
+        if prof is not None:
+            mark = prof.lap("breeding", mark)
+
+        # 3. Stats
+        self._collect_stats()
+        if prof is not None:
+            prof.lap("stats", mark)
+
+    def _draw_genders(self, n: int) -> np.ndarray:
+        return self.birth_rng.integers(0, 2, size=n).astype(np.int8)
+
+    def _cohort_slice(self, birth_year: int) -> slice:
+        start, stop = self._cohorts.get(birth_year, (self._head, self._head))
+        return slice(start - self._base, stop - self._base)
+
+    def _add_cohort(self, gender: np.ndarray, person_type: np.ndarray):
+        n = len(gender)
+        end = self._tail - self._base
+        if end + n > len(self._gender):
+            self._reserve(n)
+            end = self._tail - self._base
+
+        self._birth_year[end:end + n] = self.year
+        self._gender[end:end + n] = gender
+        self._type[end:end + n] = person_type
+
+        self._cohorts[self.year] = (self._tail, self._tail + n)
+        self._tail += n
+        self._type_counts += np.bincount(person_type, minlength=len(self._type_counts))
+
+    def _reserve(self, n: int):
+        # Move the living to the front of the buffers, growing them if they are more than half full
+        live = self._tail - self._head
+        capacity = len(self._gender)
+        if live + n > capacity // 2:
+            capacity = 2 * (live + n)
+
+        src = slice(self._head - self._base, self._tail - self._base)
+        for name in ("_birth_year", "_gender", "_type"):
+            old = getattr(self, name)
+            new = old if capacity == len(old) else np.empty(capacity, dtype=old.dtype)
+            new[:live] = old[src]
+            setattr(self, name, new)
+        self._base = self._head
+
+    def _handle_aging(self):
+        # Age is derived from birth year, so aging is free; the cohort reaching
+        # the lifespan is dropped wholesale by moving the head past it.
+        dead = self._cohorts.pop(self.year - LIFESPAN, None)
+        if dead is None:
+            return
+
+        start, stop = dead
+        dead_types = self._type[start - self._base:stop - self._base]
+        self._type_counts -= np.bincount(dead_types, minlength=len(self._type_counts))
+        self._head = stop
+
+    def _pair_up(self):
+        # Types of the fathers and mothers of this year's couples
+        cohort = self._cohort_slice(self.year - FERTILE_AGE)
+        cohort_gender = self._gender[cohort]
+        cohort_type = self._type[cohort]
+
+        eligible_males = np.flatnonzero(cohort_gender == MALE).tolist()
+        eligible_females = np.flatnonzero(cohort_gender == FEMALE).tolist()
+
+        self.rng.shuffle(eligible_males)
+        self.rng.shuffle(eligible_females)
+
+        # Pair up
+        n_pairs = min(len(eligible_males), len(eligible_females))
+        father_type = cohort_type[eligible_males[:n_pairs]]
+        mother_type = cohort_type[eligible_females[:n_pairs]]
+        return father_type, mother_type
+
+    def _breed_pairs(self, father_type: np.ndarray, mother_type: np.ndarray):
+        # Breeding rules come from the (father type x mother type) table, see simulation.breeding
+        child_type = self.rules.children(father_type, mother_type)
+        child_gender = self._draw_genders(len(child_type))
+
+        return child_gender, child_type
+
+    def _collect_stats(self):
+        ord_count, bio_count = self._counts()
+        self.history.record(self.year, ord_count, bio_count, self._total())
+
+    def _counts(self) -> Tuple[int, int]:
+        ordinary, bio = self.rules.code(PersonType.ORDINARY), self.rules.code(PersonType.BIO)
+        return int(self._type_counts[ordinary]), int(self._type_counts[bio])
+
+    def _total(self) -> int:
+        return int(self._type_counts.sum())
+
+    def _age_structure(self) -> np.ndarray:
+        # Head count per [Age, Type] with types in rules order, same layout as MatrixSimulation's by default
+        n_types = len(self.rules.types)
+        cells = self.age * n_types + self.person_type
+        structure = np.bincount(cells, minlength=(LIFESPAN + 1) * n_types)
+        return structure.reshape(LIFESPAN + 1, n_types).astype(np.float64)
+
+    def _snapshot(self) -> Snapshot:
+        ord_count, bio_count = self._counts()
+        return Snapshot(self.year, ord_count, bio_count, self._total(),
+                        (self.age, self.gender, self.person_type))
@@ -0,0 +1,90 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import PersonType
+
+# Child type code of a couple that has no children
+INFERTILE = -1
+
+CHILDREN_PER_COUPLE = 2
+
+
+class BreedingRules:
+    """
+    Offspring lookup table for the agent engines.
+
+    Types are integer codes in `types` order (PersonType order by default, so
+    0=Ordinary, 1=Bio). More types can be added with an Enum of their own, as long
+    as it has ORDINARY and BIO members. For a couple with father type f and mother type m:
+    - child_type[f, m] is the type of all their children, or INFERTILE
+    - litter[f, m] is how many children they have (0 when infertile)
+
+    Engines look whole cohorts of couples up at once with children(), so adding
+    types or rules changes the tables, not the cost of the hot path.
+    """
+
+    def __init__(self, child_type: np.ndarray, litter: np.ndarray, types: Sequence[PersonType] = tuple(PersonType)):
+        n = len(types)
+        child_type = np.asarray(child_type, dtype=np.int8)
+        litter = np.asarray(litter, dtype=np.int64)
+        if child_type.shape != (n, n) or litter.shape != (n, n):
+            raise ValueError(f"Rule tables must be {n}x{n} (father type x mother type)")
+        if np.any((child_type < INFERTILE) | (child_type >= n)):
+            raise ValueError("Child types must be type codes or INFERTILE")
+
+        self.types = tuple(types)
+        self.child_type = child_type
+        # No children for infertile couples, whatever the litter table says
+        self.litter = np.where(child_type == INFERTILE, 0, litter)
+
+    @classmethod
+    def from_dict(cls, rules: Dict[Tuple[PersonType, PersonType], Optional[PersonType]],
+                  types: Sequence[PersonType] = tuple(PersonType),
+                  litter_size: int = CHILDREN_PER_COUPLE) -> "BreedingRules":
+        """
+        Build the tables from {(father type, mother type): child type or None}.
+        Couples not listed are infertile.
+        """
+        code = {t: i for i, t in enumerate(types)}
+        n = len(types)
+        child_type = np.full((n, n), INFERTILE, dtype=np.int8)
+        for (father, mother), child in rules.items():
+            if child is not None:
+                child_type[code[father], code[mother]] = code[child]
+        return cls(child_type, np.full((n, n), litter_size), types)
+
+    def code(self, person_type) -> int:
+        """
+        Code of a type in `types`. A PersonType also matches a type of the same name, so
+        rules over their own Enum (e.g. ORDINARY, BIO, HYBRID) still tell the engines
+        which types their initial ordinary and bio populations are.
+        """
+        if person_type in self.types:
+            return self.types.index(person_type)
+        names = [getattr(t, "name", None) for t in self.types]
+        if isinstance(person_type, PersonType) and person_type.name in names:
+            return names.index(person_type.name)
+        raise ValueError(f"{person_type} is not one of the rule types")
+
+    def children(self, father_type: np.ndarray, mother_type: np.ndarray) -> np.ndarray:
+        """
+        Type codes of the children of a cohort of couples (father_type[i], mother_type[i]),
+        each couple's litter in turn.
+        """
+        child_type = self.child_type[father_type, mother_type]
+        litter = self.litter[father_type, mother_type]
+        return np.repeat(child_type, litter)
+
+
+# Rule 2:
+# Ord M + Ord F -> Ord
+# Ord M + Bio F -> Bio
+# Bio M + Bio F -> Bio
+# Bio M + Ord F -> None (Infertility)
+DEFAULT_RULES = BreedingRules.from_dict({
+    (PersonType.ORDINARY, PersonType.ORDINARY): PersonType.ORDINARY,
+    (PersonType.ORDINARY, PersonType.BIO): PersonType.BIO,
+    (PersonType.BIO, PersonType.BIO): PersonType.BIO,
+    (PersonType.BIO, PersonType.ORDINARY): None,
+})
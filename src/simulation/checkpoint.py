@@ -0,0 +1,67 @@
+import importlib
+import random
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# The .npz + JSON header format is shared with the Sun-Earth model
+from just_for_fun.checkpoint import FORMAT_VERSION, load, save  # noqa: F401
+from .breeding import BreedingRules
+from .models import PersonType
+
+
+def random_state(rng: random.Random) -> Tuple[np.ndarray, dict]:
+    """State of a random.Random as (array of the Mersenne Twister words, JSON-able rest)."""
+    version, words, gauss_next = rng.getstate()
+    return np.array(words, dtype=np.uint64), {"rng_version": version, "rng_gauss_next": gauss_next}
+
+
+def restore_random(words: np.ndarray, meta: dict) -> random.Random:
+    rng = random.Random()
+    rng.setstate((meta["rng_version"], tuple(int(w) for w in words), meta["rng_gauss_next"]))
+    return rng
+
+
+def generator_state(rng: np.random.Generator) -> dict:
+    """State of a numpy Generator's bit generator, JSON-able (big ints are exact in JSON)."""
+    return rng.bit_generator.state
+
+
+def restore_generator(state: dict) -> np.random.Generator:
+    bit_generator = getattr(np.random, state["bit_generator"])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
+
+
+def rules_state(rules: BreedingRules) -> Tuple[Dict[str, np.ndarray], dict]:
+    """Breeding rule tables as (arrays, JSON-able rest), so a resumed run breeds the same way."""
+    arrays = {"rules_child_type": rules.child_type, "rules_litter": rules.litter}
+    # Types are Enum members, saved as "module:Enum" plus the member name
+    return arrays, {"rules_types": [t.name for t in rules.types],
+                    "rules_type_enums": [f"{type(t).__module__}:{type(t).__qualname__}" for t in rules.types]}
+
+
+def restore_rules(arrays: Dict[str, np.ndarray], meta: dict) -> BreedingRules:
+    # Checkpoints without the Enum names only ever had PersonType rules
+    enums = meta.get("rules_type_enums") or [None] * len(meta["rules_types"])
+    types = [_enum(ref)[name] for ref, name in zip(enums, meta["rules_types"])]
+    return BreedingRules(arrays["rules_child_type"], arrays["rules_litter"], types)
+
+
+def _enum(ref: Optional[str]):
+    if ref is None:
+        return PersonType
+    module, qualname = ref.split(":")
+    enum = importlib.import_module(module)
+    for name in qualname.split("."):
+        enum = getattr(enum, name)
+    return enum
+
+
+def due(year: int, every: int, path: Optional[str]) -> bool:
+    """Whether a run that checkpoints every `every` years should write one now."""
+    if not every:
+        return False
+    if path is None:
+        raise ValueError("checkpoint_every needs a checkpoint_path")
+    return year % every == 0
@@ -0,0 +1,163 @@
+import argparse
+import sys
+from functools import partial
+
+import numpy as np
+
+from .engine import Simulation
+from .array_engine import ArraySimulation
+from .matrix_engine import MatrixSimulation
+from .stopping import StopCriteria
+from just_for_fun.profiling import profiler_for
+
+ENGINES = {
+    "agent": Simulation,
+    "array": ArraySimulation,
+    "matrix": MatrixSimulation,
+    "matrix-ring": partial(MatrixSimulation, ring_buffer=True),
+}
+# Engines that draw random numbers and take a seed
+SEEDED = ("agent", "array")
+# Settings that are part of a checkpoint and cannot be changed on --resume
+RESUME_FIXED = ("ordinary", "bio", "seed", "record_every")
+
+# matplotlib is imported only for --plot, so a run imports NumPy and nothing heavier
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run the population simulation.")
+    parser.add_argument("--engine", default="matrix", choices=list(ENGINES), help="Simulation engine")
+    parser.add_argument("--ordinary", type=int, default=100, help="Initial ordinary population")
+    parser.add_argument("--bio", type=int, default=100, help="Initial bio population")
+    parser.add_argument("--years", type=int, default=500, help="Years to simulate")
+    parser.add_argument("--seed", type=int, help="Random seed (agent and array engines)")
+    parser.add_argument("--record-every", type=int, default=1, help="Record history every N years")
+    parser.add_argument("--profile", action="store_true", help="Print per-phase timings of step()")
+
+    stop = parser.add_argument_group("early stopping")
+    stop.add_argument("--stop-on-extinction", action="store_true", help="Stop once either type has died out")
+    stop.add_argument("--max-population", type=float, help="Stop once the total exceeds this")
+    stop.add_argument("--steady-state", action="store_true",
+                      help="Stop once the age structure repeats each generation with a constant growth factor")
+    stop.add_argument("--tolerance", type=float, default=1e-9, help="Relative tolerance of --steady-state")
+    stop.add_argument("--extrapolate", action="store_true",
+                      help="After a steady state, project the remaining years of the output analytically")
+
+    io = parser.add_argument_group("input / output")
+    io.add_argument("--checkpoint", metavar="PATH", help="Checkpoint file to write (see --checkpoint-every)")
+    io.add_argument("--checkpoint-every", type=int, default=0, help="Save a checkpoint every N years")
+    io.add_argument("--resume", metavar="PATH", help="Continue from a checkpoint instead of starting fresh")
+    io.add_argument("--output", metavar="PATH", help="Write the history as .csv or .npy")
+    io.add_argument("--plot", metavar="PATH", help="Save a plot of the history (needs matplotlib)")
+    return parser
+
+
+def explicit_options(argv) -> set:
+    """Names of the options given in argv, even when given their default value."""
+    parser = build_parser()
+    # With no defaults, only the options on the command line end up in the namespace
+    for action in parser._actions:
+        action.default = argparse.SUPPRESS
+    return set(vars(parser.parse_args(argv)))
+
+
+def make_engine(args):
+    """The engine to run; raises ValueError if --resume is given a checkpoint of another engine."""
+    engine_cls = ENGINES[args.engine]
+    if args.resume:
+        # partial(...) has no classmethods; the ring buffer flag is part of the checkpoint
+        base = MatrixSimulation if args.engine.startswith("matrix") else engine_cls
+        sim = base.from_checkpoint(args.resume)
+        if args.engine.startswith("matrix") and sim.ring_buffer != (args.engine == "matrix-ring"):
+            raise ValueError(f"Checkpoint is for the {'matrix-ring' if sim.ring_buffer else 'matrix'} engine")
+        # The profiler is not saved, so --profile applies to the resumed run as usual
+        sim.profiler = profiler_for(args.profile)
+        return sim
+
+    kwargs = {"record_every": args.record_every, "profile": args.profile}
+    if args.engine in SEEDED:
+        kwargs["seed"] = args.seed
+    return engine_cls(initial_ordinary=args.ordinary, initial_bio=args.bio, **kwargs)
+
+
+def make_stop(args):
+    if not (args.stop_on_extinction or args.max_population is not None or args.steady_state):
+        return None
+    return StopCriteria(extinction=args.stop_on_extinction, max_population=args.max_population,
+                        steady_state=args.steady_state, tolerance=args.tolerance, extrapolate=args.extrapolate)
+
+
+def write_history(history, path: str):
+    # (records, 4): year, ordinary, bio, total
+    data = np.column_stack([history.years, history.to_numpy()])
+    if path.endswith(".npy"):
+        np.save(path, data)
+        return
+    fmt = "%d" if np.issubdtype(data.dtype, np.integer) else "%g"
+    np.savetxt(path, data, fmt=fmt, delimiter=",", header=",".join(("year",) + history.columns), comments="")
+
+
+def plot_history(history, path: str, title: str):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for column in history.columns:
+        ax.plot(history.years, history[column], label=column)
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Population")
+    ax.set_title(title)
+    ax.legend()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.checkpoint_every and not args.checkpoint:
+        parser.error("--checkpoint-every needs --checkpoint")
+    given = explicit_options(argv)
+    if args.resume:
+        fixed = [f"--{name.replace('_', '-')}" for name in RESUME_FIXED if name in given]
+        if fixed:
+            parser.error(f"{', '.join(fixed)} cannot be changed on --resume (they come from the checkpoint)")
+    if args.extrapolate and not args.steady_state:
+        parser.error("--extrapolate needs --steady-state")
+    if "seed" in given and args.engine not in SEEDED:
+        parser.error(f"--seed only applies to the {' and '.join(SEEDED)} engines")
+
+    try:
+        sim = make_engine(args)
+    except (OSError, ValueError) as e:
+        # e.g. a checkpoint of another engine, or --record-every 0
+        parser.error(str(e))
+    stop = make_stop(args)
+    reason = sim.run(args.years, checkpoint_every=args.checkpoint_every, checkpoint_path=args.checkpoint,
+                     stop=stop)
+
+    history = sim.history
+    print(f"{args.engine}: simulated to year {sim.year}" + (f", stopped early ({reason})" if reason else ""))
+    if stop is not None and stop.extrapolated is not None and len(stop.extrapolated):
+        # The years after the steady state, projected rather than simulated
+        history = history.concat(stop.extrapolated)
+        print(f"Extrapolated to year {history.years[-1]}")
+    last = history[-1] if len(history) else None
+    if last is not None:
+        print(f"Last recorded year {last['year']}: ordinary {last['ordinary']}, bio {last['bio']}, "
+              f"total {last['total']}")
+    if sim.profiler is not None:
+        print(sim.profiler.report(title="\nPer-phase timings"))
+
+    if args.output:
+        write_history(history, args.output)
+        print(f"History written to {args.output}")
+    if args.plot:
+        plot_history(history, args.plot, f"Population ({args.engine} engine)")
+        print(f"Plot written to {args.plot}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,34 @@
 import random
-from typing import List, Tuple, Optional
+from typing import Callable, Iterator, List, Tuple, Optional, Union
+import numpy as np
 from .models import Person, Gender, PersonType
+from .history import History
+from . import checkpoint, streaming
+from .streaming import Snapshot
+from .stopping import StopCriteria
+from .breeding import BreedingRules, DEFAULT_RULES
+from just_for_fun.profiling import PhaseProfiler, profiler_for
 
 class Simulation:
-    def __init__(self, initial_ordinary: int = 100, initial_bio: int = 100):
+    # Years between a parent's birth and a child's: everyone ages, then the 20-year-olds breed
+    generation = 20
+
+    def __init__(self, initial_ordinary: int = 100, initial_bio: int = 100, seed: Optional[int] = None,
+                 record_every: int = 1, profile: Union[bool, PhaseProfiler] = False,
+                 rules: BreedingRules = DEFAULT_RULES):
         self.population: List[Person] = []
         self.year = 0
-        self.history = []  # List of dicts with stats
+        self.history = History(stride=record_every)  # Yearly stats, every `record_every` years
+        # Per-phase timings of step(), see profiler.report(); None = off.
+        # Pass PhaseProfiler(allocations=True) to also track allocations per phase
+        self.profiler = profiler_for(profile)
+        
+        # Per-instance RNGs so runs are reproducible and independent of the global `random` state:
+        # `rng` shuffles the couples, `birth_rng` draws genders in bulk
+        self.rng = random.Random(seed)
+        self.birth_rng = np.random.default_rng(seed)
+        # (father type x mother type) -> child type and litter, see simulation.breeding
+        self.rules = rules
         
         # Initialize population
         # Assuming initial population is newborn? Or mixed ages?
@@ -15,36 +37,100 @@ class Simulation:
         # If they are newborns, no one reproduces for 20 years.
         # Let's assume they are newborns to start clean.
         
-        for _ in range(initial_ordinary):
-            self.population.append(Person(
-                gender=random.choice(list(Gender)),
-                person_type=PersonType.ORDINARY,
-                age=0
-            ))
-            
-        for _ in range(initial_bio):
-            self.population.append(Person(
-                gender=random.choice(list(Gender)),
-                person_type=PersonType.BIO,
-                age=0
-            ))
-
-    def run(self, years: int):
-        for _ in range(years):
+        ordinary, bio = self._main_types()
+        self.population = self._newborns([ordinary] * initial_ordinary + [bio] * initial_bio)
+
+    def run(self, years: int, checkpoint_every: int = 0, checkpoint_path: Optional[str] = None,
+            stop: Optional[StopCriteria] = None) -> Optional[str]:
+        """
+        Advance `years` years. With checkpoint_every=N the state is saved to
+        checkpoint_path every N years; resume with from_checkpoint(path).run(...).
+
+        With stop=StopCriteria(...) the run ends early on extinction, a population cap
+        or a steady state; returns the reason (see simulation.stopping), or None.
+        """
+        self.history.reserve(years // self.history.stride + 1)
+        if stop is not None:
+            stop.reset(self)
+        for i in range(years):
             self.step()
+            if checkpoint.due(self.year, checkpoint_every, checkpoint_path):
+                self.save_checkpoint(checkpoint_path)
+            if stop is not None:
+                reason = stop.check(self, years_left=years - i - 1)
+                if reason is not None:
+                    return reason
+        return None
+
+    def iter_run(self, years: int, every: int = 1,
+                 until: Optional[Callable[[Snapshot], bool]] = None) -> Iterator[Snapshot]:
+        """
+        Like run(years), but yields a Snapshot every `every` years as it goes and
+        stops early once until(snapshot) is true, e.g. until=lambda s: s.extinct.
+        History is still recorded (use a large record_every to keep memory flat).
+        """
+        return streaming.iter_run(self, years, every, until)
+
+    def save_checkpoint(self, path: str):
+        """Save population, RNG state, year and history; resuming continues bit-for-bit."""
+        gender_code = {g: i for i, g in enumerate(Gender)}
+        type_code = {t: i for i, t in enumerate(self.rules.types)}
+        arrays, meta = self.history.state()
+        rng_words, rng_meta = checkpoint.random_state(self.rng)
+        rules_arrays, rules_meta = checkpoint.rules_state(self.rules)
+        arrays.update(rules_arrays)
+        arrays.update(
+            gender=np.array([gender_code[p.gender] for p in self.population], dtype=np.int8),
+            person_type=np.array([type_code[p.person_type] for p in self.population], dtype=np.int8),
+            age=np.array([p.age for p in self.population], dtype=np.int32),
+            is_alive=np.array([p.is_alive for p in self.population], dtype=bool),
+            rng_state=rng_words,
+        )
+        meta.update(rng_meta)
+        meta.update(rules_meta, year=self.year, birth_rng=checkpoint.generator_state(self.birth_rng))
+        checkpoint.save(path, "Simulation", arrays, meta)
+
+    @classmethod
+    def from_checkpoint(cls, path: str) -> "Simulation":
+        arrays, meta = checkpoint.load(path, "Simulation")
+        sim = cls.__new__(cls)
+        sim.profiler = None
+        sim.year = meta["year"]
+        sim.history = History.from_state(arrays, meta)
+        sim.rng = checkpoint.restore_random(arrays["rng_state"], meta)
+        sim.birth_rng = checkpoint.restore_generator(meta["birth_rng"])
+        sim.rules = checkpoint.restore_rules(arrays, meta)
+
+        genders, types = list(Gender), sim.rules.types
+        sim.population = [
+            Person(gender=genders[g], person_type=types[t], age=int(age), is_alive=bool(alive))
+            for g, t, age, alive in zip(arrays["gender"], arrays["person_type"], arrays["age"], arrays["is_alive"])
+        ]
+        return sim
 
     def step(self):
         self.year += 1
+        prof = self.profiler
+        mark = prof.start() if prof is not None else None
         
         # 1. Aging and Death
         self._handle_aging()
+        if prof is not None:
+            mark = prof.lap("aging", mark)
         
         # 2. Reproduction
-        newborns = self._handle_reproduction()
+        pairs = self._pair_up()
+        if prof is not None:
+            mark = prof.lap("pairing", mark)
+        newborns = self._breed_pairs(pairs)
         self.population.extend(newborns)
+        if prof is not None:
+            mark = prof.lap("breeding", mark)
         
         # 3. Stats
         self._collect_stats()
+        if prof is not None:
+            prof.lap("stats", mark)
 
     def _handle_aging(self):
         # Age up everyone
@@ -54,64 +140,66 @@ class Simulation:
         # Remove dead people
         self.population = [p for p in self.population if p.is_alive]
 
-    def _handle_reproduction(self) -> List[Person]:
+    def _pair_up(self) -> List[Tuple[Person, Person]]:
         # Filter eligible parents: Age 20
         eligible_males = [p for p in self.population if p.age == 20 and p.gender == Gender.MALE]
         eligible_females = [p for p in self.population if p.age == 20 and p.gender == Gender.FEMALE]
         
-        random.shuffle(eligible_males)
-        random.shuffle(eligible_females)
+        self.rng.shuffle(eligible_males)
+        self.rng.shuffle(eligible_females)
         
         # Pair up
         pairs = []
         min_len = min(len(eligible_males), len(eligible_females))
         for i in range(min_len):
             pairs.append((eligible_males[i], eligible_females[i]))
-            
-        newborns = []
-        for father, mother in pairs:
-            children = self._breed(father, mother)
-            newborns.extend(children)
-            
-        return newborns
-
-    def _breed(self, father: Person, mother: Person) -> List[Person]:
-        # Rule 2:
-        # Ord M + Ord F -> Ord
-        # Ord M + Bio F -> Bio
-        # Bio M + Bio F -> Bio
-        # Bio M + Ord F -> None
-        
-        child_type = None
-        
-        if father.person_type == PersonType.ORDINARY and mother.person_type == PersonType.ORDINARY:
-            child_type = PersonType.ORDINARY
-        elif father.person_type == PersonType.ORDINARY and mother.person_type == PersonType.BIO:
-            child_type = PersonType.BIO
-        elif father.person_type == PersonType.BIO and mother.person_type == PersonType.BIO:
-            child_type = PersonType.BIO
-        elif father.person_type == PersonType.BIO and mother.person_type == PersonType.ORDINARY:
-            return [] # Infertility
-            
-        # Produce 2 children
-        children = []
-        for _ in range(2):
-            children.append(Person(
-                gender=random.choice(list(Gender)),
-                person_type=child_type,
-                age=0
-            ))
-            
-        return children
+        return pairs
+
+    def _breed_pairs(self, pairs: List[Tuple[Person, Person]]) -> List[Person]:
+        # The whole cohort of couples goes through the rule table at once
+        code = {t: i for i, t in enumerate(self.rules.types)}
+        father_type = np.fromiter((code[f.person_type] for f, _ in pairs), dtype=np.intp, count=len(pairs))
+        mother_type = np.fromiter((code[m.person_type] for _, m in pairs), dtype=np.intp, count=len(pairs))
+        child_type = self.rules.children(father_type, mother_type)
+        return self._newborns([self.rules.types[t] for t in child_type.tolist()])
+
+    def _newborns(self, types: List[PersonType]) -> List[Person]:
+        # Genders are drawn in one go, in Gender order (0=Male, 1=Female)
+        genders = tuple(Gender)
+        gender_codes = self.birth_rng.integers(0, 2, size=len(types)).tolist()
+        return [Person(gender=genders[g], person_type=t, age=0) for g, t in zip(gender_codes, types)]
 
     def _collect_stats(self):
-        ord_count = sum(1 for p in self.population if p.person_type == PersonType.ORDINARY)
-        bio_count = sum(1 for p in self.population if p.person_type == PersonType.BIO)
-        total = len(self.population)
+        if not self.history.wants(self.year):
+            return
+        
+        ord_count, bio_count = self._counts()
+        total = self._total()
         
-        self.history.append({
-            "year": self.year,
-            "ordinary": ord_count,
-            "bio": bio_count,
-            "total": total
-        })
+        self.history.record(self.year, ord_count, bio_count, total)
+
+    def _main_types(self) -> Tuple[PersonType, PersonType]:
+        # The rules' own ordinary and bio types (they may come from a larger Enum)
+        types = self.rules.types
+        return types[self.rules.code(PersonType.ORDINARY)], types[self.rules.code(PersonType.BIO)]
+
+    def _counts(self) -> Tuple[int, int]:
+        ordinary, bio = self._main_types()
+        ord_count = sum(1 for p in self.population if p.person_type == ordinary)
+        bio_count = sum(1 for p in self.population if p.person_type == bio)
+        return ord_count, bio_count
+
+    def _total(self) -> int:
+        return len(self.population)
+
+    def _age_structure(self) -> np.ndarray:
+        # Head count per [Age, Type] with types in rules order, same layout as MatrixSimulation's by default
+        structure = np.zeros((81, len(self.rules.types)))
+        type_index = {t: i for i, t in enumerate(self.rules.types)}
+        for p in self.population:
+            structure[p.age, type_index[p.person_type]] += 1
+        return structure
+
+    def _snapshot(self) -> Snapshot:
+        ord_count, bio_count = self._counts()
+        return Snapshot(self.year, ord_count, bio_count, self._total(), self.population)
@@ -0,0 +1,121 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Iterator, Optional, Sequence, Tuple
+import numpy as np
+
+from .engine import Simulation
+from .array_engine import ArraySimulation
+from .history import COLUMNS
+
+ENGINES = {
+    "agent": Simulation,
+    "array": ArraySimulation,
+}
+
+
+def replica_seeds(n_replicas: int, seed: Optional[int] = None) -> list:
+    """
+    Independent, reproducible integer seeds for each replica.
+    Replica k always gets the same seed for a given (seed, k), whatever n_replicas is.
+    """
+    children = np.random.SeedSequence(seed).spawn(n_replicas)
+    return [int.from_bytes(child.generate_state(4).tobytes(), "little") for child in children]
+
+
+def _run_replica(engine: str, seed: int, years: int, initial_ordinary: int, initial_bio: int) -> np.ndarray:
+    # Module-level so it can be pickled into worker processes
+    sim = ENGINES[engine](initial_ordinary=initial_ordinary, initial_bio=initial_bio, seed=seed)
+    sim.run(years)
+    return sim.history.to_numpy()
+
+
+def _run_replicas(engine: str, replicas: Sequence[Tuple[int, int]], *args) -> list:
+    # One pool task: [(replica index, history)] for a chunk of (index, seed) pairs
+    return [(k, _run_replica(engine, seed, *args)) for k, seed in replicas]
+
+
+def iter_ensemble(
+    n_replicas: int,
+    years: int,
+    initial_ordinary: int = 100,
+    initial_bio: int = 100,
+    seed: Optional[int] = None,
+    engine: str = "array",
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Run replicas across a process pool, yielding (replica index, history) as they finish,
+    a chunk of replicas at a time; with several workers that is not replica order.
+    Each history is a (years, 3) int array with columns COLUMNS, and depends only on
+    (seed, replica index), not on the number of workers.
+
+    workers=1 runs everything in this process (no pool), in replica order.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+
+    seeds = replica_seeds(n_replicas, seed)
+    args = (years, initial_ordinary, initial_bio)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or n_replicas == 1:
+        for k, s in enumerate(seeds):
+            yield k, _run_replica(engine, s, *args)
+        return
+
+    # Several replicas per task keeps the pickling overhead small next to the work
+    chunksize = max(1, n_replicas // (workers * 4))
+    replicas = list(enumerate(seeds))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = [pool.submit(_run_replicas, engine, replicas[start:start + chunksize], *args)
+                 for start in range(0, n_replicas, chunksize)]
+        for task in as_completed(tasks):
+            yield from task.result()
+
+
+@dataclass
+class EnsembleResult:
+    histories: np.ndarray  # (replicas, years, 3) with columns COLUMNS
+    percentiles: Tuple[float, ...]
+
+    @property
+    def years(self) -> np.ndarray:
+        return np.arange(1, self.histories.shape[1] + 1)
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.histories.mean(axis=0)
+
+    @property
+    def bands(self) -> np.ndarray:
+        """Percentile bands, shape (len(percentiles), years, 3)."""
+        return np.percentile(self.histories, self.percentiles, axis=0)
+
+    def to_dataframe(self):
+        """One row per year: mean and percentile columns for each of ordinary/bio/total."""
+        import pandas as pd
+
+        data = {"year": self.years}
+        for i, column in enumerate(COLUMNS):
+            data[f"{column}_mean"] = self.mean[:, i]
+            for q, band in zip(self.percentiles, self.bands):
+                data[f"{column}_p{q:g}"] = band[:, i]
+        return pd.DataFrame(data)
+
+
+def run_ensemble(
+    n_replicas: int,
+    years: int,
+    initial_ordinary: int = 100,
+    initial_bio: int = 100,
+    seed: Optional[int] = None,
+    engine: str = "array",
+    workers: Optional[int] = None,
+    percentiles: Sequence[float] = (5, 50, 95),
+) -> EnsembleResult:
+    """Run n_replicas independent stochastic runs and collect them for mean / percentile bands."""
+    histories = np.empty((n_replicas, years, len(COLUMNS)), dtype=np.int64)
+    for k, history in iter_ensemble(n_replicas, years, initial_ordinary, initial_bio, seed, engine, workers):
+        histories[k] = history
+    return EnsembleResult(histories, tuple(percentiles))
@@ -0,0 +1,165 @@
+import numpy as np
+from typing import Sequence, Tuple
+
+# Columns recorded by every population engine, same names as the old history dicts
+COLUMNS = ("ordinary", "bio", "total")
+
+# Relative slack when truncating expected-value counts, far above the rounding noise
+# of the float totals (a few ulps) and far below a whole person
+COUNT_RTOL = 1e-9
+
+
+def whole_counts(totals) -> np.ndarray:
+    """
+    Expected-value totals truncated to whole people, as int64.
+
+    Totals that should be exact integers come out a few ulps above or below them depending
+    on the order of summation, so plain truncation would record 400 as 399 in one engine
+    mode and 400 in another. The slack absorbs that noise; negative rounding drift
+    (e.g. -5e-15 after extinction) is clamped to 0.
+    """
+    totals = np.maximum(np.asarray(totals, dtype=np.float64), 0.0)
+    return np.floor(totals * (1 + COUNT_RTOL)).astype(np.int64)
+
+
+class History:
+    """
+    Preallocated, growable columnar history.
+
+    Each column is one contiguous buffer (plus a `year` column), so a million-year run
+    costs a few bytes per recorded year instead of a dict. Values may be scalars or
+    fixed-shape arrays per year (e.g. one value per replica with shape=(R,)).
+
+    Still reads like the old list of dicts:
+        history[-1]["total"], len(history), for row in history, pd.DataFrame(history)
+    plus column access and zero-copy exports:
+        history["bio"], history.years, history.to_numpy(), history.to_dataframe()
+    """
+
+    def __init__(self, columns: Sequence[str] = COLUMNS, shape: Tuple[int, ...] = (), dtype=np.int64,
+                 stride: int = 1, capacity: int = 256):
+        if stride < 1:
+            raise ValueError("stride must be >= 1")
+        self.columns = tuple(columns)
+        self.shape = tuple(shape)
+        self.stride = stride
+        self._size = 0
+        self._years = np.empty(capacity, dtype=np.int64)
+        self._data = np.empty((len(self.columns), capacity) + self.shape, dtype=dtype)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def reserve(self, n: int):
+        """Make room for n more records without reallocating."""
+        needed = self._size + n
+        capacity = len(self._years)
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity)
+
+        years = np.empty(capacity, dtype=self._years.dtype)
+        years[:self._size] = self._years[:self._size]
+        data = np.empty((len(self.columns), capacity) + self.shape, dtype=self._data.dtype)
+        data[:, :self._size] = self._data[:, :self._size]
+        self._years, self._data = years, data
+
+    def wants(self, year: int) -> bool:
+        """Whether `year` falls on the recording stride (lets engines skip computing stats)."""
+        return year % self.stride == 0
+
+    def record(self, year: int, *values, always: bool = False):
+        """Record one row; values are in `columns` order. Years off the stride are skipped unless `always`."""
+        if not (always or self.wants(year)):
+            return
+        if self._size == len(self._years):
+            self.reserve(1)
+        self._years[self._size] = year
+        for i, value in enumerate(values):
+            self._data[i, self._size] = value
+        self._size += 1
+
+    def extend(self, years: np.ndarray, *columns: np.ndarray):
+        """Record many rows at once; `columns` are arrays in `columns` order, one value per year."""
+        n = len(years)
+        self.reserve(n)
+        self._years[self._size:self._size + n] = years
+        for i, values in enumerate(columns):
+            self._data[i, self._size:self._size + n] = values
+        self._size += n
+
+    def concat(self, other: "History") -> "History":
+        """New History with this one's rows followed by `other`'s (same columns and shape)."""
+        if other.columns != self.columns or other.shape != self.shape:
+            raise ValueError("Histories have different columns")
+        history = History(self.columns, self.shape, self._data.dtype, self.stride,
+                          capacity=max(len(self) + len(other), 1))
+        for part in (self, other):
+            history.extend(part.years, *part._data[:, :part._size])
+        return history
+
+    def state(self) -> Tuple[dict, dict]:
+        """Recorded rows as ({name: array}, {json-able settings}) for checkpoints."""
+        arrays = {"history_years": self.years, "history_data": self._data[:, :self._size]}
+        return arrays, {"history_columns": list(self.columns), "history_stride": self.stride}
+
+    @classmethod
+    def from_state(cls, arrays: dict, meta: dict) -> "History":
+        """Rebuild a History from `state()` output."""
+        years, data = arrays["history_years"], arrays["history_data"]
+        history = cls(meta["history_columns"], shape=data.shape[2:], dtype=data.dtype,
+                      stride=meta["history_stride"], capacity=max(len(years), 1))
+        history._years[:len(years)] = years
+        history._data[:, :len(years)] = data
+        history._size = len(years)
+        return history
+
+    @property
+    def years(self) -> np.ndarray:
+        return self._years[:self._size]
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key == "year":
+                return self.years
+            return self._data[self.columns.index(key), :self._size]
+        if isinstance(key, slice):
+            return [self._row(i) for i in range(*key.indices(self._size))]
+
+        index = range(self._size)[key]  # normalizes negatives and raises IndexError
+        return self._row(index)
+
+    def _row(self, i: int) -> dict:
+        row = {"year": int(self._years[i])}
+        for c, name in enumerate(self.columns):
+            value = self._data[c, i]
+            row[name] = value.item() if value.ndim == 0 else value
+        return row
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self._row(i)
+
+    def to_numpy(self) -> np.ndarray:
+        """View of the recorded values, shape (records, *shape, columns). No copy."""
+        return np.moveaxis(self._data[:, :self._size], 0, -1)
+
+    def to_dataframe(self):
+        """
+        One row per recorded year with a `year` column. Scalar histories are wrapped without copying;
+        shaped histories are flattened to long form with one row per (year, element).
+        """
+        import pandas as pd
+
+        if not self.shape:
+            data = {"year": self.years}
+            data.update({name: self[name] for name in self.columns})
+            return pd.DataFrame(data, copy=False)
+
+        n_elements = int(np.prod(self.shape))
+        data = {
+            "year": np.repeat(self.years, n_elements),
+            "element": np.tile(np.arange(n_elements), self._size),
+        }
+        data.update({name: self[name].reshape(-1) for name in self.columns})
+        return pd.DataFrame(data)
@@ -1,57 +1,238 @@
 import numpy as np
-from typing import List, Dict
+from typing import Callable, Dict, Iterator, List, Optional, Union
 from .models import Gender, PersonType
+from .history import History, whole_counts
+from . import checkpoint, streaming
+from .streaming import Snapshot
+from .stopping import StopCriteria
+from just_for_fun.profiling import PhaseProfiler, profiler_for
 
 class MatrixSimulation:
-    def __init__(self, initial_ordinary: int = 100, initial_bio: int = 100):
+    # Years between a parent's birth and a child's: the 20-year-olds breed before
+    # aging, so their children are born into a population where they are 21
+    generation = 21
+
+    def __init__(self, initial_ordinary: int = 100, initial_bio: int = 100, ring_buffer: bool = False,
+                 record_every: int = 1, profile: Union[bool, PhaseProfiler] = False):
         self.year = 0
-        self.history = []
+        self.history = History(stride=record_every)  # Yearly stats, every `record_every` years
+        # Per-phase timings of step(), see profiler.report(); None = off.
+        # Pass PhaseProfiler(allocations=True) to also track allocations per phase
+        self.profiler = profiler_for(profile)
         
         # Population Tensor: [Age, Gender, Type]
         # Age: 0-80 (81 buckets)
         # Gender: 0=Male, 1=Female
         # Type: 0=Ordinary, 1=Bio
-        self.population = np.zeros((81, 2, 2), dtype=np.float64)
+        #
+        # With ring_buffer=True the age axis is a ring: age a lives in slot (head + a) % 81.
+        # Aging moves the head instead of rolling the whole array, newborns overwrite the
+        # expired slot in place, and totals are updated from the entering and leaving cohorts,
+        # so a year costs O(genders x types) instead of O(ages).
+        self.ring_buffer = ring_buffer
+        self._head = 0
+        self._population = np.zeros((81, 2, 2), dtype=np.float64)
         
         # Initialize population (assuming newborns for consistency with Agent model)
         # Ordinary: Type 0
         # Bio: Type 1
         
         # Split initial population evenly between genders
-        self.population[0, 0, 0] = initial_ordinary / 2  # Male Ordinary
-        self.population[0, 1, 0] = initial_ordinary / 2  # Female Ordinary
+        self._population[0, 0, 0] = initial_ordinary / 2  # Male Ordinary
+        self._population[0, 1, 0] = initial_ordinary / 2  # Female Ordinary
+        
+        self._population[0, 0, 1] = initial_bio / 2       # Male Bio
+        self._population[0, 1, 1] = initial_bio / 2       # Female Bio
         
-        self.population[0, 0, 1] = initial_bio / 2       # Male Bio
-        self.population[0, 1, 1] = initial_bio / 2       # Female Bio
+        # Running totals per Type (ring buffer mode)
+        self._totals = np.sum(self._population, axis=(0, 1))
+
+    @property
+    def population(self) -> np.ndarray:
+        # Age-ordered tensor; in ring buffer mode this is a rolled copy of the ring
+        if not self.ring_buffer:
+            return self._population
+        return np.roll(self._population, -self._head, axis=0)
+
+    def _slot(self, age: int) -> int:
+        return (self._head + age) % self._population.shape[0]
 
-    def run(self, years: int):
-        for _ in range(years):
+    def run(self, years: int, checkpoint_every: int = 0, checkpoint_path: Optional[str] = None,
+            stop: Optional[StopCriteria] = None) -> Optional[str]:
+        """
+        Advance `years` years. With checkpoint_every=N the state is saved to
+        checkpoint_path every N years; resume with from_checkpoint(path).run(...).
+
+        With stop=StopCriteria(...) the run ends early on extinction, a population cap
+        or a steady state; returns the reason (see simulation.stopping), or None.
+        """
+        self.history.reserve(years // self.history.stride + 1)
+        if stop is not None:
+            stop.reset(self)
+        for i in range(years):
             self.step()
+            if checkpoint.due(self.year, checkpoint_every, checkpoint_path):
+                self.save_checkpoint(checkpoint_path)
+            if stop is not None:
+                reason = stop.check(self, years_left=years - i - 1)
+                if reason is not None:
+                    return reason
+        return None
+
+    def iter_run(self, years: int, every: int = 1,
+                 until: Optional[Callable[[Snapshot], bool]] = None) -> Iterator[Snapshot]:
+        """
+        Like run(years), but yields a Snapshot every `every` years as it goes and
+        stops early once until(snapshot) is true, e.g. until=lambda s: s.extinct.
+        History is still recorded (use a large record_every to keep memory flat).
+        """
+        return streaming.iter_run(self, years, every, until)
+
+    def save_checkpoint(self, path: str):
+        """Save the tensor (ring layout and running totals as they are), year and history."""
+        arrays, meta = self.history.state()
+        arrays.update(population=self._population, totals=self._totals)
+        meta.update(year=self.year, head=self._head, ring_buffer=self.ring_buffer)
+        checkpoint.save(path, "MatrixSimulation", arrays, meta)
+
+    @classmethod
+    def from_checkpoint(cls, path: str) -> "MatrixSimulation":
+        arrays, meta = checkpoint.load(path, "MatrixSimulation")
+        sim = cls.__new__(cls)
+        sim.profiler = None
+        sim.year = meta["year"]
+        sim.history = History.from_state(arrays, meta)
+        sim.ring_buffer = meta["ring_buffer"]
+        sim._head = meta["head"]
+        sim._population = arrays["population"]
+        sim._totals = arrays["totals"]
+        return sim
+
+    def fast_forward(self, years: int, extinct_below: float = 1e-6) -> int:
+        """
+        Advance `years` years, jumping ahead in O(log years) once the dynamics are linear.
+        
+        The model is linear when only one type is left and the same sex limits pairing
+        in every cohort that still has to reach 20: then each year is a fixed Leslie-style
+        projection, and years of it are one matrix power (repeated squaring).
+        Until that regime is reached the simulation is stepped year by year.
+        
+        A type whose total is below `extinct_below` counts as extinct and is zeroed.
+        Of the jumped-over years nothing is recorded (they are not computed), but the
+        landing year always is, even off the record_every stride, so history[-1] is the
+        final state. Stepped years are recorded on the stride as in run().
+        Returns the number of years that were jumped rather than stepped.
+        """
+        remaining = years
+        while remaining > 0:
+            projection = self._linear_projection(extinct_below)
+            if projection is None:
+                self.step()
+                remaining -= 1
+                if remaining == 0 and not self.history.wants(self.year):
+                    self._collect_stats(always=True)
+                continue
+            
+            person_type, matrix = projection
+            population = self.population
+            state = population[:, :, person_type].reshape(-1)
+            
+            jumped = np.zeros_like(population)
+            jumped[:, :, person_type] = (np.linalg.matrix_power(matrix, remaining) @ state).reshape(81, 2)
+            self._set_population(jumped)
+            
+            self.year += remaining
+            self._collect_stats(always=True)
+            return remaining
+        return 0
+
+    def _linear_projection(self, extinct_below: float):
+        # Returns (type, one-year projection matrix over the flattened [Age, Gender] state of that type),
+        # or None if the dynamics are not linear from here on
+        population = self.population
+        totals = np.sum(population, axis=(0, 1))
+        alive = totals >= extinct_below
+        if alive.all():
+            return None
+        person_type = 1 if alive[1] else 0
+        
+        # Cohorts aged <= 20 will still breed; all of them must be limited by the same sex.
+        # Newborns are split 50/50, so cohorts born during the jump never break this.
+        males = population[:21, 0, person_type]
+        females = population[:21, 1, person_type]
+        if np.all(males >= females):
+            limiting = 1  # Female
+        elif np.all(females >= males):
+            limiting = 0  # Male
+        else:
+            return None
+        
+        # State index: age * 2 + gender
+        # Aging: age a -> a + 1, the 80-year-olds drop out
+        # Births: every couple of the 20-year-olds has 2 children, 1 Male and 1 Female,
+        # and there are as many couples as members of the limiting sex
+        n = 81 * 2
+        matrix = np.zeros((n, n))
+        idx = np.arange(80 * 2)
+        matrix[idx + 2, idx] = 1.0
+        matrix[0, 20 * 2 + limiting] = 1.0
+        matrix[1, 20 * 2 + limiting] = 1.0
+        return person_type, matrix
+
+    def _set_population(self, population: np.ndarray):
+        # Replace the age-ordered tensor (and realign the ring)
+        self._population = population
+        self._head = 0
+        self._totals = np.sum(population, axis=(0, 1))
 
     def step(self):
         self.year += 1
+        prof = self.profiler
+        mark = prof.start() if prof is not None else None
         
         # 1. Reproduction (before aging, using current 20-year-olds)
         newborns = self._calculate_newborns()
+        if prof is not None:
+            mark = prof.lap("breeding", mark)
         
-        # 2. Aging
-        # Shift population array along Age axis (axis 0)
-        # People at index i move to i+1
-        # People at index 80 move out (die)
-        self.population = np.roll(self.population, 1, axis=0)
-        
-        # 3. Births
-        # Place newborns at Age 0
-        # newborns is [Gender, Type]
-        self.population[0] = newborns
+        if self.ring_buffer:
+            # 2. Aging
+            # Moving the head back one slot makes every cohort a year older;
+            # the slot it lands on held the 80-year-olds, who die
+            self._totals -= np.sum(self._population[self._slot(80)], axis=0)
+            self._head = self._slot(-1)
+            
+            # 3. Births
+            # Newborns overwrite the expired slot in place
+            self._population[self._head] = newborns
+            self._totals += np.sum(newborns, axis=0)
+            
+            # Once per full turn of the ring, re-sum to stop rounding drift in the running totals
+            if self._head == 0:
+                self._totals = np.sum(self._population, axis=(0, 1))
+        else:
+            # 2. Aging
+            # Shift population array along Age axis (axis 0)
+            # People at index i move to i+1
+            # People at index 80 move out (die)
+            self._population = np.roll(self._population, 1, axis=0)
+            
+            # 3. Births
+            # Place newborns at Age 0
+            # newborns is [Gender, Type]
+            self._population[0] = newborns
+        if prof is not None:
+            mark = prof.lap("aging", mark)
         
         # 4. Stats
         self._collect_stats()
+        if prof is not None:
+            prof.lap("stats", mark)
 
     def _calculate_newborns(self) -> np.ndarray:
         # Get 20-year-olds
         # Shape: [Gender, Type]
-        cohort_20 = self.population[20]
+        cohort_20 = self._population[self._slot(20)]
         
         m_ord = cohort_20[0, 0]
         m_bio = cohort_20[0, 1]
@@ -124,19 +305,33 @@ class MatrixSimulation:
         
         return newborns
 
-    def _collect_stats(self):
-        # Sum across Age and Gender axes to get total per Type
-        # Axis 0 = Age, Axis 1 = Gender, Axis 2 = Type
-        # Sum over 0 and 1 -> [Type]
-        totals = np.sum(self.population, axis=(0, 1))
+    def _collect_stats(self, always: bool = False):
+        if not (always or self.history.wants(self.year)):
+            return
         
-        ord_count = int(totals[0])
-        bio_count = int(totals[1])
+        ord_count, bio_count = self._counts()
         total = ord_count + bio_count
         
-        self.history.append({
-            "year": self.year,
-            "ordinary": ord_count,
-            "bio": bio_count,
-            "total": total
-        })
+        self.history.record(self.year, ord_count, bio_count, total, always=always)
+
+    def _counts(self):
+        # Sum across Age and Gender axes to get total per Type
+        # Axis 0 = Age, Axis 1 = Gender, Axis 2 = Type
+        # Sum over 0 and 1 -> [Type]
+        if self.ring_buffer:
+            totals = self._totals
+        else:
+            totals = np.sum(self._population, axis=(0, 1))
+        ord_count, bio_count = whole_counts(totals)
+        return int(ord_count), int(bio_count)
+
+    def _total(self) -> int:
+        return sum(self._counts())
+
+    def _age_structure(self) -> np.ndarray:
+        # Sum over Gender -> [Age, Type]
+        return np.sum(self.population, axis=1)
+
+    def _snapshot(self) -> Snapshot:
+        ord_count, bio_count = self._counts()
+        return Snapshot(self.year, ord_count, bio_count, ord_count + bio_count, self.population)
@@ -0,0 +1,126 @@
+import numpy as np
+from typing import Optional
+
+from .array_engine import MALE, FEMALE, FERTILE_AGE, LIFESPAN
+from .breeding import BreedingRules, DEFAULT_RULES, INFERTILE
+from .history import History
+from .models import PersonType
+
+
+class StochasticMatrixSimulation:
+    """
+    Stochastic counterpart of MatrixSimulation: many independent replicas of the
+    agent model advanced together as one integer tensor [Replica, Age, Gender, Type].
+
+    Instead of tracking individuals, each year draws the agent model's random choices
+    for a whole cohort at once:
+    - which males / females get a partner (hypergeometric, random subset of the larger sex)
+    - how the chosen males and females are matched by type (hypergeometric)
+    - the gender of every child (binomial, 50/50)
+    These have exactly the distributions of Simulation's shuffle-and-pair, so the
+    counts match the agent model in distribution (mean, variance, ...).
+
+    What each pairing of types has comes from the same BreedingRules tables as the
+    agent engines, with the types in rules.types order along the Type axis.
+
+    Aging and breeding happen in the same order as Simulation (age first, then the
+    20-year-olds breed, death at 80), so ages 0..79 are stored.
+    """
+
+    def __init__(self, n_replicas: int = 1000, initial_ordinary: int = 100, initial_bio: int = 100,
+                 seed: Optional[int] = None, record_every: int = 1, rules: BreedingRules = DEFAULT_RULES):
+        self.year = 0
+        # One value per replica per recorded year; history.to_numpy() is (years, replicas, 3)
+        self.history = History(shape=(n_replicas,), stride=record_every)
+        self.n_replicas = n_replicas
+        self.rng = np.random.default_rng(seed)
+        self.rules = rules
+        n_types = len(rules.types)
+        self._ordinary, self._bio = rules.code(PersonType.ORDINARY), rules.code(PersonType.BIO)
+
+        # Children of one couple by type: offspring[father type, mother type, child type]
+        self._offspring = np.zeros((n_types, n_types, n_types), dtype=np.int64)
+        fertile = rules.child_type != INFERTILE
+        fathers, mothers = np.nonzero(fertile)
+        self._offspring[fathers, mothers, rules.child_type[fertile]] = rules.litter[fertile]
+
+        # Population Tensor: [Replica, Age, Gender, Type]
+        self.population = np.zeros((n_replicas, LIFESPAN, 2, n_types), dtype=np.int64)
+
+        # Newborns, each with a random gender like in the agent model
+        initial = np.zeros(n_types, dtype=np.int64)
+        initial[self._ordinary] = initial_ordinary
+        initial[self._bio] = initial_bio
+        males = self.rng.binomial(initial, 0.5, size=(n_replicas, n_types))
+        self.population[:, 0, MALE] = males
+        self.population[:, 0, FEMALE] = initial - males
+
+        # Running totals per [Replica, Type], updated from the cohorts entering and leaving
+        self._totals = np.tile(initial, (n_replicas, 1))
+
+    def run(self, years: int):
+        self.history.reserve(years // self.history.stride + 1)
+        for _ in range(years):
+            self.step()
+
+    def step(self):
+        self.year += 1
+
+        # 1. Aging and Death
+        # Shift every replica's age axis by one in place; the oldest cohort falls off
+        self._totals -= self.population[:, -1].sum(axis=1)
+        self.population[:, 1:] = self.population[:, :-1]
+
+        # 2. Reproduction (the cohort that just turned 20)
+        newborns = self._draw_newborns(self.population[:, FERTILE_AGE])
+        self.population[:, 0] = newborns
+        self._totals += newborns.sum(axis=1)
+
+        # 3. Stats
+        self._collect_stats()
+
+    def _draw_newborns(self, cohort: np.ndarray) -> np.ndarray:
+        # cohort: [Replica, Gender, Type]
+        males, females = cohort[:, MALE], cohort[:, FEMALE]
+        couples = np.minimum(males.sum(axis=1), females.sum(axis=1))
+
+        # Random subset of each sex gets a partner: how many of each type
+        paired_males = self._draw_subset(males, couples)
+        paired_females = self._draw_subset(females, couples)
+
+        # Random matching of the paired males to the paired females:
+        # matches[:, f, m] couples of a type-f father and a type-m mother
+        matches = np.empty(males.shape + males.shape[-1:], dtype=np.int64)
+        unmatched = paired_females
+        for father in range(males.shape[1] - 1):
+            matches[:, father] = self._draw_subset(unmatched, paired_males[:, father])
+            unmatched = unmatched - matches[:, father]
+        # The last type's males get whichever females are left
+        matches[:, -1] = unmatched
+
+        # Breeding rules (see BreedingRules): each couple's litter, all of the child type
+        children = np.einsum('rfm,fmt->rt', matches, self._offspring)
+
+        newborns = np.empty_like(cohort)
+        newborns[:, MALE] = self.rng.binomial(children, 0.5)
+        newborns[:, FEMALE] = children - newborns[:, MALE]
+        return newborns
+
+    def _draw_subset(self, counts: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        """
+        Types of a random subset of sizes[r] people drawn from counts[r] people per type,
+        for every replica r (multivariate hypergeometric, one type at a time).
+        """
+        drawn = np.empty_like(counts)
+        others = counts.sum(axis=1)
+        left = sizes
+        for t in range(counts.shape[1] - 1):
+            others = others - counts[:, t]
+            drawn[:, t] = self.rng.hypergeometric(counts[:, t], others, left)
+            left = left - drawn[:, t]
+        drawn[:, -1] = left
+        return drawn
+
+    def _collect_stats(self):
+        totals = self._totals
+        self.history.record(self.year, totals[:, self._ordinary], totals[:, self._bio], totals.sum(axis=1))
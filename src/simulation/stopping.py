@@ -0,0 +1,134 @@
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from .history import History, whole_counts
+from .models import PersonType
+
+# Reasons returned by StopCriteria.check and the engines' run()
+EXTINCTION = "extinction"
+POPULATION_CAP = "population_cap"
+STEADY_STATE = "steady_state"
+
+# Years between a cohort's birth and its children's, for engines without a `generation`
+# attribute. Every couple breeds at the same age, so the age structure repeats
+# (up to a growth factor) every generation, not every year.
+GENERATION = 20
+
+
+class StopCriteria:
+    """
+    When a population run may end before the requested number of years.
+
+    Passed to run(years, stop=...) of Simulation, ArraySimulation and MatrixSimulation,
+    which return the reason they stopped (EXTINCTION, POPULATION_CAP, STEADY_STATE) or None.
+
+    - extinction: stop once either type has died out.
+    - max_population: stop once the total exceeds this.
+    - steady_state: stop once the (age, type) structure is the one `period` years back
+      (default: the engine's generation length) scaled by a constant growth factor,
+      for `period` years in a row, to within `tolerance` relative to the total.
+      The matrix engine gets there exactly; the stochastic engines only with a
+      tolerance wider than their noise.
+      With extrapolate=True the rest of the requested years is then projected
+      analytically (the last cycle times growth factor ** cycles) into `extrapolated`,
+      a History of its own: the engine and its history stay at the year the steady
+      state was detected, so they can be run on without duplicating years.
+      engine.history.concat(stop.extrapolated) is the full history.
+    """
+
+    def __init__(self, extinction: bool = True, max_population: Optional[float] = None,
+                 steady_state: bool = False, period: Optional[int] = None, tolerance: float = 1e-9,
+                 extrapolate: bool = False):
+        if period is not None and period < 1:
+            raise ValueError("period must be >= 1")
+        self.extinction = extinction
+        self.max_population = max_population
+        self.steady_state = steady_state
+        self.period = period
+        self.tolerance = tolerance
+        self.extrapolate = extrapolate
+        self.growth_factor: Optional[float] = None  # Per period, once a steady state is found
+        self.extrapolated: Optional[History] = None  # Projected years, with extrapolate=True
+        self.reset()
+
+    def reset(self, engine=None):
+        """Forget earlier years; called by run() before the first step."""
+        self._period = self.period or getattr(engine, "generation", GENERATION)
+        # Age structure columns of the ordinary and bio counts (more types with custom rules)
+        rules = getattr(engine, "rules", None)
+        self._columns = (0, 1) if rules is None else (rules.code(PersonType.ORDINARY), rules.code(PersonType.BIO))
+        # Last period + 1 years of (year, per-type totals, age structure)
+        self._recent = deque(maxlen=self._period + 1)
+        self._factor = None
+        self._streak = 0
+        self.growth_factor = None
+        self.extrapolated = None
+
+    def check(self, engine, years_left: int = 0) -> Optional[str]:
+        """
+        Test the engine after a step; returns the reason to stop, or None to go on.
+        On a steady state with extrapolate=True, first projects the next `years_left`
+        years into self.extrapolated.
+        """
+        if self.extinction:
+            ord_count, bio_count = engine._counts()
+            if ord_count == 0 or bio_count == 0:
+                return EXTINCTION
+        if self.max_population is not None and engine._total() > self.max_population:
+            return POPULATION_CAP
+
+        if self.steady_state and self._is_steady(engine):
+            self.growth_factor = self._factor
+            if self.extrapolate and years_left > 0:
+                self.extrapolated = self._extrapolate(engine.history, years_left)
+            return STEADY_STATE
+        return None
+
+    def _is_steady(self, engine) -> bool:
+        structure = engine._age_structure()
+        self._recent.append((engine.year, structure.sum(axis=0), structure))
+        if len(self._recent) <= self._period:
+            return False
+
+        past = self._recent[0][2]
+        past_total = past.sum()
+        total = structure.sum()
+        if past_total <= 0:
+            self._streak = 0
+            return False
+
+        factor = total / past_total
+        tolerance = self.tolerance * max(total, 1.0)
+        same_shape = np.max(np.abs(structure - factor * past)) <= tolerance
+        same_factor = self._factor is None or abs(factor - self._factor) <= self.tolerance * max(factor, 1.0)
+        self._streak = self._streak + 1 if same_shape and same_factor else 0
+        self._factor = factor if self._streak else None
+        # A full period in a row, so every phase of the cycle has been seen to repeat
+        return self._streak >= self._period
+
+    def _extrapolate(self, history: History, years_left: int) -> History:
+        # Year last_year + k repeats year last_year - period + r (r = 1..period),
+        # scaled by growth_factor ** m, where k = r + (m - 1) * period
+        last_cycle = list(self._recent)[1:]
+        last_year = last_cycle[-1][0]
+        type_totals = np.array([totals for _, totals, _ in last_cycle])
+
+        years = np.arange(last_year + 1, last_year + years_left + 1)
+        years = years[years % history.stride == 0]
+        k = years - last_year
+        r = (k - 1) % self._period
+        m = (k - 1) // self._period + 1
+        counts = type_totals[r] * (self.growth_factor ** m)[:, None]
+
+        if self.max_population is not None:
+            over = np.flatnonzero(counts.sum(axis=1) > self.max_population)
+            if len(over):
+                years, counts = years[:over[0] + 1], counts[:over[0] + 1]
+
+        per_type = whole_counts(counts)
+        ordinary, bio = self._columns
+        extrapolated = History(history.columns, stride=history.stride, capacity=max(len(years), 1))
+        extrapolated.extend(years, per_type[:, ordinary], per_type[:, bio], per_type.sum(axis=1))
+        return extrapolated
@@ -0,0 +1,41 @@
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+
+class Snapshot(NamedTuple):
+    """
+    State of a population engine after one year, as yielded by iter_run().
+
+    `state` is the engine's own population data, without copying:
+    Simulation -> its list of Person, ArraySimulation -> (age, gender, person_type) arrays,
+    MatrixSimulation -> the (age, gender, type) tensor. The engine keeps changing it
+    in place, so copy anything that must outlive the next step.
+    """
+    year: int
+    ordinary: int
+    bio: int
+    total: int
+    state: Any = None
+
+    @property
+    def extinct(self) -> bool:
+        """Whether either type has died out."""
+        return self.ordinary == 0 or self.bio == 0
+
+
+def iter_run(engine, years: int, every: int = 1,
+             until: Optional[Callable[[Snapshot], bool]] = None) -> Iterator[Snapshot]:
+    """
+    Step `engine` for `years` years, yielding engine._snapshot() every `every` years
+    and after the last one. Stops early after yielding the first snapshot for which
+    until(snapshot) is true. Stopping the loop on the consumer side works too.
+    """
+    if every < 1:
+        raise ValueError("every must be >= 1")
+    for i in range(1, years + 1):
+        engine.step()
+        if i % every and i != years:
+            continue
+        snapshot = engine._snapshot()
+        yield snapshot
+        if until is not None and until(snapshot):
+            return
@@ -0,0 +1,140 @@
+import itertools
+import numpy as np
+
+from .array_engine import MALE, FEMALE, ORDINARY, BIO
+from .history import COLUMNS, whole_counts
+
+
+class MatrixSweep:
+    """
+    Many MatrixSimulation scenarios advanced together as one tensor
+    [Scenario, Age, Gender, Type].
+
+    Every parameter may be a scalar or a 1-D sequence; they are broadcast against
+    each other to give one scenario per element. Use `from_grid` for a full
+    cartesian product. Each scenario follows the same expected-value rules as
+    MatrixSimulation, and counts are truncated the same way, so a single default
+    scenario records the same history as MatrixSimulation().
+    """
+
+    def __init__(self, initial_ordinary=100, initial_bio=100, fertile_age=20, lifespan=80, litter_size=2):
+        params = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(p)) for p in (initial_ordinary, initial_bio, fertile_age, lifespan, litter_size))
+        )
+        initial_ordinary, initial_bio, fertile_age, lifespan, litter_size = params
+
+        self.fertile_age = fertile_age.astype(np.intp)
+        self.lifespan = lifespan.astype(np.intp)
+        self.litter_size = litter_size.astype(np.float64)
+        if np.any(self.fertile_age > self.lifespan) or np.any(self.fertile_age < 1):
+            raise ValueError("fertile_age must be between 1 and lifespan")
+
+        self.n_scenarios = len(self.lifespan)
+        self._index = np.arange(self.n_scenarios)
+        self.year = 0
+        self._history = []
+
+        # Ages 0..lifespan are alive (like MatrixSimulation's 81 buckets for lifespan 80).
+        # The age axis is a ring buffer: age a of every scenario lives in slot (head + a) % n_ages,
+        # so aging is just moving the head instead of copying the whole tensor.
+        self._ring = np.zeros((self.n_scenarios, self.lifespan.max() + 1, 2, 2), dtype=np.float64)
+        self._head = 0
+
+        # Split initial population evenly between genders
+        self._ring[:, 0, :, ORDINARY] = initial_ordinary[:, None] / 2
+        self._ring[:, 0, :, BIO] = initial_bio[:, None] / 2
+
+        # Running totals per [Scenario, Type], updated from the cohorts entering and leaving
+        self._totals = self._ring[:, 0].sum(axis=1)
+
+    @classmethod
+    def from_grid(cls, **axes):
+        """
+        Cartesian product of parameter values, e.g.
+        MatrixSweep.from_grid(initial_bio=[50, 100, 200], lifespan=range(60, 101, 5))
+        The scenario order is that of itertools.product over the given keyword order.
+        """
+        names = list(axes)
+        grid = list(itertools.product(*(np.atleast_1d(axes[n]) for n in names)))
+        columns = {n: np.array([g[i] for g in grid]) for i, n in enumerate(names)}
+        return cls(**columns)
+
+    @property
+    def population(self) -> np.ndarray:
+        """Age-ordered copy of the population tensor [Scenario, Age, Gender, Type]."""
+        return np.roll(self._ring, -self._head, axis=1)
+
+    def _slot(self, age):
+        return (self._head + age) % self._ring.shape[1]
+
+    @property
+    def history(self) -> np.ndarray:
+        """All recorded years, shape (years, scenarios, 3) with columns COLUMNS (whole people, int64)."""
+        if not self._history:
+            return np.empty((0, self.n_scenarios, len(COLUMNS)), dtype=np.int64)
+        return np.concatenate(self._history)
+
+    def run(self, years: int) -> np.ndarray:
+        """Advance every scenario `years` years; returns those years' history (years, scenarios, 3)."""
+        out = np.empty((years, self.n_scenarios, len(COLUMNS)), dtype=np.int64)
+        for i in range(years):
+            self.step()
+            out[i, :, :2] = whole_counts(self._totals)
+        out[:, :, 2] = out[:, :, 0] + out[:, :, 1]
+        self._history.append(out)
+        return out
+
+    def step(self):
+        self.year += 1
+
+        # 1. Reproduction (before aging, using current fertile-age cohorts)
+        newborns = self._calculate_newborns()
+
+        # 2. Aging: moving the head back one slot ages everyone by a year,
+        # then clear the cohort that just passed its lifespan
+        self._totals -= self._ring[self._index, self._slot(self.lifespan)].sum(axis=1)
+        self._head = self._slot(-1)
+        self._ring[self._index, self._slot(self.lifespan + 1)] = 0
+
+        # 3. Births (into the slot the oldest bucket just vacated)
+        self._ring[:, self._head] = newborns
+        self._totals += newborns.sum(axis=1)
+
+        # Once per full turn of the ring, re-sum to stop rounding drift in the running totals
+        if self._head == 0:
+            self._totals = self._ring.sum(axis=(1, 2))
+
+    def _calculate_newborns(self) -> np.ndarray:
+        # Fertile cohort of every scenario: [Scenario, Gender, Type]
+        cohort = self._ring[self._index, self._slot(self.fertile_age)]
+
+        m_ord = cohort[:, MALE, ORDINARY]
+        m_bio = cohort[:, MALE, BIO]
+        f_ord = cohort[:, FEMALE, ORDINARY]
+        f_bio = cohort[:, FEMALE, BIO]
+
+        total_males = m_ord + m_bio
+        total_females = f_ord + f_bio
+        total_couples = np.minimum(total_males, total_females)
+
+        # Same expected-value pairing as MatrixSimulation._calculate_newborns;
+        # scenarios with no males or females get no couples
+        with np.errstate(invalid="ignore", divide="ignore"):
+            p_f_ord = np.where(total_females > 0, f_ord / total_females, 0.0)
+            p_f_bio = np.where(total_females > 0, f_bio / total_females, 0.0)
+            m_ord_active = np.where(total_males > 0, total_couples * m_ord / total_males, 0.0)
+            m_bio_active = np.where(total_males > 0, total_couples * m_bio / total_males, 0.0)
+
+        # Breeding rules:
+        # Ord M + Ord F -> Ord
+        # Ord M + Bio F -> Bio
+        # Bio M + Bio F -> Bio
+        # Bio M + Ord F -> None
+        total_new_ord = m_ord_active * p_f_ord * self.litter_size
+        total_new_bio = (m_ord_active + m_bio_active) * p_f_bio * self.litter_size
+
+        # Split by gender (50/50)
+        newborns = np.empty_like(cohort)
+        newborns[:, :, ORDINARY] = total_new_ord[:, None] / 2
+        newborns[:, :, BIO] = total_new_bio[:, None] / 2
+        return newborns
@@ -0,0 +1,56 @@
+import numpy as np
+
+from sun_earth.config import M_EARTH
+from sun_earth.model.body import Body
+from sun_earth.model.system import SolarSystem
+from sun_earth.model.integrators import Integrator
+
+# (method, dt in years, options) settings to compare, from coarse to fine
+SETTINGS = [
+    ('leapfrog', 1 / 365, {}),
+    ('leapfrog', 1 / 3650, {}),
+    ('yoshida4', 1 / 100, {}),
+    ('yoshida4', 1 / 365, {}),
+    ('rk45', 1 / 12, {'rtol': 1e-8}),
+    ('rk45', 1 / 12, {'rtol': 1e-10}),
+    ('adaptive_leapfrog', 1 / 12, {'eta': 0.02}),
+    ('adaptive_leapfrog', 1 / 12, {'eta': 0.005}),
+]
+
+
+def make_system(eccentricity):
+    """Sun-Earth system with the Earth at perihelion of an orbit with a = 1 AU."""
+    r_peri = 1.0 - eccentricity
+    v_peri = 2 * np.pi * np.sqrt((1 + eccentricity) / r_peri)
+    sun = Body(name='Sun', mass=1.0, position=[0, 0], velocity=[0, 0])
+    earth = Body(name='Earth', mass=M_EARTH, position=[r_peri, 0], velocity=[0, v_peri])
+    return SolarSystem([sun, earth])
+
+
+def measure(method, dt, options, eccentricity, years=1):
+    """Run one setting; returns (force evaluations, relative energy error)."""
+    system = make_system(eccentricity)
+    system.compute_forces()
+    initial_energy = system.get_total_energy()
+    system.force_evaluations = 0
+
+    for _ in range(int(round(years / dt))):
+        Integrator.step(system, dt, method=method, **options)
+
+    energy_error = abs((system.get_total_energy() - initial_energy) / initial_energy)
+    return system.force_evaluations, energy_error
+
+
+def run_comparison(eccentricities=(0.0, 0.7)):
+    print("Comparing integrators over 1 year: force evaluations vs energy error")
+    for eccentricity in eccentricities:
+        print(f"\nEccentricity {eccentricity}:")
+        print(f"  {'method':<18} {'dt':>8} {'options':<16} {'force evals':>11} {'|dE/E|':>9}")
+        for method, dt, options in SETTINGS:
+            evaluations, energy_error = measure(method, dt, options, eccentricity)
+            opts = ', '.join(f'{k}={v}' for k, v in options.items())
+            print(f"  {method:<18} {dt:>8.2e} {opts:<16} {evaluations:>11.0f} {energy_error:>9.1e}")
+
+
+if __name__ == "__main__":
+    run_comparison()
@@ -0,0 +1,183 @@
+
+import numpy as np
+
+from .forces import direct_accelerations
+
+# Deepest quadtree level; bodies closer than box_size / 2**MAX_DEPTH share a leaf
+MAX_DEPTH = 16
+
+# Nodes with at most this many bodies are not subdivided; they interact body by body
+LEAF_SIZE = 8
+
+
+def _morton_keys(cells):
+    """Interleave the bits of (x, y) integer cell coordinates into one key per body."""
+    keys = np.zeros(len(cells), dtype=np.uint64)
+    x = cells[:, 0].astype(np.uint64)
+    y = cells[:, 1].astype(np.uint64)
+    for bit in range(MAX_DEPTH):
+        b = np.uint64(bit)
+        keys |= ((x >> b) & np.uint64(1)) << np.uint64(2 * bit)
+        keys |= ((y >> b) & np.uint64(1)) << np.uint64(2 * bit + 1)
+    return keys
+
+
+class QuadTree:
+    """
+    Linear quadtree over a set of bodies.
+
+    Bodies are sorted by Morton key, so every node is a contiguous range of the sorted
+    bodies and every node's children are a contiguous range of the next level's nodes.
+    Nodes of all levels are stored in flat arrays (level 0 = root first).
+    """
+
+    def __init__(self, positions, masses, leaf_size=LEAF_SIZE):
+        n = len(positions)
+        lo = positions.min(axis=0)
+        hi = positions.max(axis=0)
+        self.size = max(float(np.max(hi - lo)), 1e-12) * (1 + 1e-9)
+        self.origin = lo
+
+        cells = ((positions - lo) / self.size * (1 << MAX_DEPTH)).astype(np.int64)
+        cells = np.clip(cells, 0, (1 << MAX_DEPTH) - 1)
+        keys = _morton_keys(cells)
+
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+        self.positions = positions[self.order]
+        self.masses = masses[self.order]
+
+        weighted = self.positions * self.masses[:, None]
+
+        levels = []
+        level_starts = np.array([0])
+        for level in range(MAX_DEPTH + 1):
+            prefix = self.keys >> np.uint64(2 * (MAX_DEPTH - level))
+            if level > 0:
+                new = np.flatnonzero(prefix[1:] != prefix[:-1]) + 1
+                level_starts = np.concatenate([[0], new])
+            level_ends = np.append(level_starts[1:], n)
+
+            mass = np.add.reduceat(self.masses, level_starts)
+            moment = np.add.reduceat(weighted, level_starts, axis=0)
+            centroid = np.add.reduceat(self.positions, level_starts, axis=0) / (level_ends - level_starts)[:, None]
+            com = np.where(mass[:, None] > 0, moment / np.where(mass > 0, mass, 1.0)[:, None], centroid)
+
+            levels.append((level_starts, level_ends, prefix[level_starts], mass, com))
+            if np.all(level_ends - level_starts <= leaf_size):
+                break
+
+        # Flatten levels into global node arrays
+        offsets = np.cumsum([0] + [len(lv[0]) for lv in levels])
+        self.start = np.concatenate([lv[0] for lv in levels])
+        self.end = np.concatenate([lv[1] for lv in levels])
+        self.prefix = np.concatenate([lv[2] for lv in levels])
+        self.mass = np.concatenate([lv[3] for lv in levels])
+        self.com = np.concatenate([lv[4] for lv in levels])
+        self.level = np.concatenate([np.full(len(lv[0]), i) for i, lv in enumerate(levels)])
+        self.width = self.size / 2.0**self.level
+
+        # Children of a level-l node: the level-(l+1) nodes whose body range starts inside its range
+        self.child_first = np.zeros(len(self.start), dtype=np.int64)
+        self.child_last = np.zeros(len(self.start), dtype=np.int64)
+        for i in range(len(levels) - 1):
+            nodes = slice(offsets[i], offsets[i + 1])
+            child_starts = levels[i + 1][0]
+            self.child_first[nodes] = offsets[i + 1] + np.searchsorted(child_starts, self.start[nodes])
+            self.child_last[nodes] = offsets[i + 1] + np.searchsorted(child_starts, self.end[nodes])
+
+        # A node is opened into single bodies if it is small or has no deeper level
+        self.is_leaf = ((self.end - self.start) <= leaf_size) | (self.child_first == self.child_last)
+
+
+def _expand(owners, first, last):
+    """For each owner, emit it once per index in [first, last); returns (owners, indices)."""
+    counts = last - first
+    total = int(counts.sum())
+    owners = np.repeat(owners, counts)
+    indices = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(total)
+    return owners, indices
+
+
+def barnes_hut_accelerations(positions, masses, G, theta=0.5, softening=0.0, leaf_size=LEAF_SIZE, out=None):
+    """
+    Gravitational accelerations with the Barnes-Hut approximation, O(N log N).
+
+    A tree node is treated as a point mass at its centre of mass when
+    node width < theta * distance to it; otherwise it is opened. Small nodes
+    are summed body by body. All bodies walk the tree together, one level per
+    iteration, so the work is done in NumPy rather than per body.
+
+    Args:
+        positions (np.array): (N, 2) positions in AU
+        masses (np.array): (N,) masses in solar masses
+        G (float): Gravitational constant in simulation units
+        theta (float): Opening angle; smaller is more accurate and slower (0 = direct sum)
+        softening (float): Plummer softening length in AU
+        leaf_size (int): Bodies per leaf below which nodes are not subdivided
+        out (np.array): Optional (N, 2) array to write the result into
+
+    Returns:
+        np.array: (N, 2) accelerations in AU/Year^2
+    """
+    n = len(positions)
+    acc = np.zeros((n, 2)) if out is None else out
+    if n < 2:
+        acc.fill(0.0)
+        return acc
+
+    tree = QuadTree(positions, masses, leaf_size)
+    pos = tree.positions
+    sorted_acc = np.zeros((n, 2))
+
+    def accumulate(bodies, source_pos, source_mass):
+        r_vec = source_pos - pos[bodies]
+        r_sq = np.einsum('ij,ij->i', r_vec, r_vec) + softening**2
+        w = np.zeros_like(r_sq)
+        np.power(r_sq, -1.5, out=w, where=r_sq > 0)
+        w *= source_mass
+        sorted_acc[:, 0] += np.bincount(bodies, weights=w * r_vec[:, 0], minlength=n)
+        sorted_acc[:, 1] += np.bincount(bodies, weights=w * r_vec[:, 1], minlength=n)
+
+    # Every body starts at the root
+    bodies = np.arange(n)
+    nodes = np.zeros(n, dtype=np.int64)
+    shifts = (2 * (MAX_DEPTH - tree.level)).astype(np.uint64)
+
+    while len(bodies):
+        r_vec = tree.com[nodes] - pos[bodies]
+        dist = np.sqrt(np.einsum('ij,ij->i', r_vec, r_vec))
+
+        # Never approximate a node that contains the body itself
+        contains = (tree.keys[bodies] >> shifts[nodes]) == tree.prefix[nodes]
+        far = (tree.width[nodes] < theta * dist) & ~contains
+        if far.any():
+            accumulate(bodies[far], tree.com[nodes[far]], tree.mass[nodes[far]])
+
+        near = ~far
+        leaf = near & tree.is_leaf[nodes]
+        if leaf.any():
+            owner, other = _expand(bodies[leaf], tree.start[nodes[leaf]], tree.end[nodes[leaf]])
+            not_self = owner != other
+            accumulate(owner[not_self], pos[other[not_self]], tree.masses[other[not_self]])
+
+        opened = near & ~tree.is_leaf[nodes]
+        bodies, nodes = _expand(bodies[opened], tree.child_first[nodes[opened]], tree.child_last[nodes[opened]])
+
+    acc[tree.order] = sorted_acc
+    acc *= G
+    return acc
+
+
+def force_error(positions, masses, G, theta=0.5, softening=0.0, leaf_size=LEAF_SIZE):
+    """
+    Relative error of the Barnes-Hut accelerations against direct summation.
+
+    Returns:
+        dict: 'max' and 'rms' of |a_bh - a_direct| / |a_direct| over all bodies
+    """
+    exact = direct_accelerations(positions, masses, G, softening)
+    approx = barnes_hut_accelerations(positions, masses, G, theta, softening, leaf_size)
+    norm = np.linalg.norm(exact, axis=1)
+    err = np.linalg.norm(approx - exact, axis=1) / np.where(norm > 0, norm, 1.0)
+    return {'max': float(err.max()), 'rms': float(np.sqrt(np.mean(err**2)))}
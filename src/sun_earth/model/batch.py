@@ -0,0 +1,141 @@
+
+import numpy as np
+from ..config import G, M_SUN, M_EARTH, DEFAULT_DT
+
+
+class BatchSystem:
+    def __init__(self, masses, positions, velocities, softening=0.0):
+        """
+        B independent systems of N bodies each, stored as (B, N, 2) arrays and
+        advanced in lockstep. Meant for ensembles of small systems (e.g. hundreds of
+        perturbed Sun-Earth orbits); every force pass is one broadcast over (B, N, N).
+
+        Args:
+            masses (np.array): (B, N) masses in solar masses, or (N,) shared by all systems
+            positions (np.array): (B, N, 2) positions in AU
+            velocities (np.array): (B, N, 2) velocities in AU/Year
+            softening (float): Plummer softening length in AU
+        """
+        self.positions = np.array(positions, dtype=float)
+        self.velocities = np.array(velocities, dtype=float)
+        self.masses = np.broadcast_to(np.asarray(masses, dtype=float), self.positions.shape[:2]).copy()
+        self.accelerations = np.zeros_like(self.positions)
+        self.softening = softening
+
+    @classmethod
+    def from_systems(cls, systems):
+        """Stack SolarSystem objects that all have the same number of bodies."""
+        return cls(
+            np.stack([s.masses for s in systems]),
+            np.stack([s.positions for s in systems]),
+            np.stack([s.velocities for s in systems]),
+            softening=systems[0].softening if systems else 0.0,
+        )
+
+    @property
+    def n_systems(self):
+        return self.positions.shape[0]
+
+    def compute_forces(self):
+        """Accelerations of every body in every system (no interaction between systems)."""
+        # r_vec[b, i, j] points from body i to body j
+        r_vec = self.positions[:, None, :, :] - self.positions[:, :, None, :]
+        r_sq = np.einsum('bijk,bijk->bij', r_vec, r_vec)
+        if self.softening:
+            r_sq += self.softening**2
+
+        w = np.zeros_like(r_sq)
+        np.power(r_sq, -1.5, out=w, where=r_sq > 0)
+        w *= self.masses[:, None, :]
+        np.einsum('bij,bijk->bik', w, r_vec, out=self.accelerations)
+        self.accelerations *= G
+
+    def get_total_energy(self):
+        """Total energy (Kinetic + Potential) of each system, shape (B,)."""
+        kinetic = 0.5 * np.einsum('bi,bik,bik->b', self.masses, self.velocities, self.velocities)
+
+        r_vec = self.positions[:, None, :, :] - self.positions[:, :, None, :]
+        r_sq = np.einsum('bijk,bijk->bij', r_vec, r_vec) + self.softening**2
+        # No self-energy (only nonzero with softening)
+        r_sq[:, np.arange(r_sq.shape[1]), np.arange(r_sq.shape[1])] = 0.0
+        inv_r = np.zeros_like(r_sq)
+        np.power(r_sq, -0.5, out=inv_r, where=r_sq > 0)
+        # Every pair appears twice (i, j and j, i)
+        potential = -0.5 * G * np.einsum('bi,bij,bj->b', self.masses, inv_r, self.masses)
+        return kinetic + potential
+
+
+def sun_earth_orbits(eccentricities, semi_major_axis=1.0, earth_mass=M_EARTH):
+    """
+    Sun-Earth systems starting at perihelion on orbits of the given eccentricities.
+
+    The Sun starts at rest at the origin and the Earth on the +x axis with the vis-viva
+    perihelion speed, so e=0 starts the circular orbit of docs/Sun-Earth-Model.md. The Sun
+    is not pinned: BatchIntegrator moves it under the Earth's pull like any other body.
+    """
+    e = np.atleast_1d(np.asarray(eccentricities, dtype=float))
+    r_peri = semi_major_axis * (1 - e)
+    v_peri = np.sqrt(G * M_SUN * (1 + e) / r_peri)
+
+    positions = np.zeros((len(e), 2, 2))
+    velocities = np.zeros((len(e), 2, 2))
+    positions[:, 1, 0] = r_peri
+    velocities[:, 1, 1] = v_peri
+    return BatchSystem([M_SUN, earth_mass], positions, velocities)
+
+
+class BatchIntegrator:
+    @staticmethod
+    def step(batch, dt, method='leapfrog'):
+        """
+        Advance every system in the batch by one time step dt using the specified method.
+        """
+        if method == 'euler':
+            BatchIntegrator.euler_step(batch, dt)
+        elif method == 'leapfrog':
+            BatchIntegrator.leapfrog_step(batch, dt)
+        else:
+            raise ValueError(f"Unknown integration method: {method}")
+
+    @staticmethod
+    def euler_step(batch, dt):
+        """Explicit Euler, same scheme as Integrator.euler_step."""
+        batch.compute_forces()
+        batch.positions += batch.velocities * dt
+        batch.velocities += batch.accelerations * dt
+
+    @staticmethod
+    def leapfrog_step(batch, dt):
+        """Velocity Verlet, same scheme as Integrator.leapfrog_step (expects valid accelerations)."""
+        batch.velocities += 0.5 * dt * batch.accelerations
+        batch.positions += batch.velocities * dt
+        batch.compute_forces()
+        batch.velocities += 0.5 * dt * batch.accelerations
+
+    @staticmethod
+    def integrate(batch, steps, dt=DEFAULT_DT, method='leapfrog', record_every=1):
+        """
+        Run `steps` steps and record the trajectories of every system.
+
+        Args:
+            batch (BatchSystem): Systems to advance (modified in place)
+            steps (int): Number of time steps
+            dt (float): Time step in years
+            method (str): 'euler' or 'leapfrog'
+            record_every (int): Keep every n-th step of the trajectory
+
+        Returns:
+            tuple: (trajectory, energy_drift) where trajectory is (steps // record_every, B, N, 2)
+                positions and energy_drift is the (B,) relative energy change |dE / E0|
+        """
+        batch.compute_forces()
+        initial_energy = batch.get_total_energy()
+
+        trajectory = np.empty((steps // record_every,) + batch.positions.shape)
+        for i in range(steps):
+            BatchIntegrator.step(batch, dt, method)
+            if (i + 1) % record_every == 0:
+                trajectory[(i + 1) // record_every - 1] = batch.positions
+
+        energy_drift = np.abs((batch.get_total_energy() - initial_energy) / initial_energy)
+        return trajectory, energy_drift
@@ -1,11 +1,55 @@
 
+from collections import deque
 import numpy as np
 
+# Trail length kept by a body that is not part of a SolarSystem
+HISTORY_LIMIT = 5000
+
+
+class _StateField:
+    """
+    Body attribute that lives in the owning SolarSystem's arrays once the body is added.
+
+    Before that the body keeps its own value (a float for the mass, an array otherwise).
+    Afterwards, reading returns a view of its row (e.g. system.positions[i]), so in-place
+    updates like `body.position += dv` write through, and assigning copies the value into the row.
+
+    A view is only valid until the system reallocates its arrays, which add_body() does:
+    a `p = body.position` taken before then keeps the old values and no longer writes
+    through. Read the attribute again after adding bodies.
+    """
+
+    def __init__(self, array_name):
+        self.array_name = array_name
+
+    def __set_name__(self, owner, name):
+        self.private_name = '_' + name
+
+    def __get__(self, body, owner=None):
+        if body is None:
+            return self
+        if body._system is None:
+            return getattr(body, self.private_name)
+        return getattr(body._system, self.array_name)[body._index]
+
+    def __set__(self, body, value):
+        if body._system is None:
+            value = np.array(value, dtype=float)
+            setattr(body, self.private_name, float(value) if value.ndim == 0 else value)
+        else:
+            getattr(body._system, self.array_name)[body._index] = value
+
+
 class Body:
+    mass = _StateField('masses')
+    position = _StateField('positions')
+    velocity = _StateField('velocities')
+    acceleration = _StateField('accelerations')
+
     def __init__(self, name, mass, position, velocity, color='white', texture_path=None):
         """
         Initialize a celestial body.
-        
+
         Args:
             name (str): Name of the body (e.g., 'Earth')
             mass (float): Mass in solar masses
@@ -14,27 +58,48 @@ class Body:
             color (str): Fallback color for visualization
             texture_path (str): Path to texture image (optional)
         """
+        # Owning SolarSystem and row index, set by SolarSystem.add_body
+        self._system = None
+        self._index = None
+
         self.name = name
         self.mass = mass
-        self.position = np.array(position, dtype=float)
-        self.velocity = np.array(velocity, dtype=float)
+        self.position = position
+        self.velocity = velocity
         self.acceleration = np.zeros(2, dtype=float)
         self.color = color
         self.texture_path = texture_path
-        
-        # History for trail
-        self.history = []
+
+        # Trail while not in a system; afterwards the system's Trajectory records it
+        self._history = deque(maxlen=HISTORY_LIMIT)
+
+    def _attach(self, system, index):
+        """Hand the body's state over to row `index` of `system`'s arrays."""
+        self._system = system
+        self._index = index
+
+    @property
+    def history(self):
+        """
+        Trail of past positions: a (records, 2) view of the system's trajectory,
+        or the body's own bounded list of positions before it joins a system.
+        """
+        if self._system is None:
+            return self._history
+        return self._system.trajectory.body(self._index)
 
     def update_pos(self, dt):
         self.position += self.velocity * dt
-        self.history.append(self.position.copy())
-        # Limit history size to prevent memory issues 
-        # (Though for 1-10 years daily steps it's fine, ~3650 points)
-        if len(self.history) > 5000:
-             self.history.pop(0)
+        # Bodies in a system are recorded by the system (see SolarSystem.record_history)
+        if self._system is None:
+            self._history.append(self.position.copy())
 
     def update_vel(self, dt):
         self.velocity += self.acceleration * dt
-    
+
     def clear_history(self):
-        self.history = []
+        """Clear the trail; for a body in a system this clears the whole system's trajectory."""
+        if self._system is None:
+            self._history.clear()
+        else:
+            self._system.trajectory.clear()
@@ -0,0 +1,75 @@
+
+import numpy as np
+
+# Recorded quantities, one column each
+COLUMNS = ('time', 'kinetic', 'potential', 'energy', 'momentum_x', 'momentum_y', 'angular_momentum')
+
+
+class Diagnostics:
+    """
+    Conserved quantities of a SolarSystem recorded every `stride` steps:
+    kinetic, potential and total energy, total momentum and angular momentum.
+
+    The potential energy comes out of the force pass of the recorded step
+    (see SolarSystem.compute_forces), and the rest is O(N), so tracking the
+    invariants costs about nothing on top of the integration itself.
+    Columns are growable NumPy buffers, read with diagnostics['energy'] etc.
+    """
+
+    def __init__(self, stride=1, capacity=256):
+        if stride < 1:
+            raise ValueError("stride must be at least 1")
+        self.stride = stride
+        self._data = np.empty((len(COLUMNS), capacity))
+        self._size = 0
+        self._steps = 0
+
+    def __len__(self):
+        return self._size
+
+    def wants_next(self):
+        """Whether the step in progress will be recorded."""
+        return (self._steps + 1) % self.stride == 0
+
+    def count_step(self):
+        """Count a finished step; returns whether it falls on the stride."""
+        self._steps += 1
+        return self._steps % self.stride == 0
+
+    def record(self, *values):
+        """Record one row; values are in COLUMNS order."""
+        if self._size == self._data.shape[1]:
+            grown = np.empty((len(COLUMNS), 2 * self._data.shape[1]))
+            grown[:, :self._size] = self._data[:, :self._size]
+            self._data = grown
+        self._data[:, self._size] = values
+        self._size += 1
+
+    def __getitem__(self, name):
+        return self._data[COLUMNS.index(name), :self._size]
+
+    def to_numpy(self):
+        """(records, columns) view of everything recorded."""
+        return self._data[:, :self._size].T
+
+    def energy_drift(self):
+        """Relative energy change |(E - E0) / E0| of every record against the first."""
+        energy = self['energy']
+        if not len(energy):
+            return energy
+        return np.abs((energy - energy[0]) / energy[0])
+
+    def state(self):
+        """Recorded data as ({name: array}, {json-able settings}) for checkpoints."""
+        arrays = {'diagnostics': self._data[:, :self._size]}
+        return arrays, {'diagnostics_stride': self.stride, 'diagnostics_steps': self._steps}
+
+    @classmethod
+    def from_state(cls, arrays, meta):
+        """Rebuild Diagnostics from `state()` output."""
+        data = arrays['diagnostics']
+        diagnostics = cls(meta['diagnostics_stride'], capacity=max(data.shape[1], 1))
+        diagnostics._data[:, :data.shape[1]] = data
+        diagnostics._size = data.shape[1]
+        diagnostics._steps = meta['diagnostics_steps']
+        return diagnostics
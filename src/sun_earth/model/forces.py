@@ -0,0 +1,179 @@
+
+import numpy as np
+
+# Bodies per tile: pairwise work is done on (TILE, TILE) blocks, which keeps
+# temporaries small (a few MB) no matter how many bodies there are.
+TILE = 512
+
+# Up to this many bodies a single (N, N, 2) block is used; fewer NumPy calls
+# matter more than halving the pair work for e.g. the Sun-Earth pair.
+SMALL_N = 64
+
+
+def _tiles(n):
+    """Yield (I, J) slice pairs covering every unordered pair of tiles once (J >= I)."""
+    for start_i in range(0, n, TILE):
+        rows = slice(start_i, min(start_i + TILE, n))
+        for start_j in range(start_i, n, TILE):
+            yield rows, slice(start_j, min(start_j + TILE, n))
+
+
+def _pair_block(pos_i, pos_j, softening):
+    """
+    Separations and inverse distances between two groups of bodies.
+
+    Returns (dx, dy, inv_r) with shape (len(pos_i), len(pos_j)); dx, dy point from i to j.
+    Coincident pairs with no softening (including a body with itself) get inv_r = 0,
+    i.e. they are ignored like in the original pair loop.
+    """
+    dx = pos_j[None, :, 0] - pos_i[:, None, 0]
+    dy = pos_j[None, :, 1] - pos_i[:, None, 1]
+    r_sq = dx * dx
+    r_sq += dy * dy
+    r_sq += softening**2
+
+    inv_r = np.zeros_like(r_sq)
+    np.sqrt(r_sq, out=inv_r)
+    np.divide(1.0, inv_r, out=inv_r, where=r_sq > 0)
+    return dx, dy, inv_r
+
+
+def direct_accelerations(positions, masses, G, softening=0.0, out=None, potentials=None):
+    """
+    Gravitational acceleration on every body by direct summation.
+
+    Each pair of tiles is evaluated once and applied to both sides with opposite
+    sign (Newton's third law), so only about half of the N^2 pair terms are computed.
+    If `potentials` is given, the potential of every body, -G sum_j m_j / r_ij, is
+    filled in from the same inverse distances (total PE = 0.5 * masses @ potentials).
+
+    Args:
+        positions (np.array): (N, 2) positions in AU
+        masses (np.array): (N,) masses in solar masses
+        G (float): Gravitational constant in simulation units
+        softening (float): Plummer softening length in AU (0 = exact Newtonian)
+        out (np.array): Optional (N, 2) array to write the result into
+        potentials (np.array): Optional (N,) array to write the per-body potentials into
+
+    Returns:
+        np.array: (N, 2) accelerations in AU/Year^2
+    """
+    n = len(positions)
+    if n <= SMALL_N:
+        return _small_accelerations(positions, masses, G, softening, out, potentials)
+
+    acc = np.zeros((n, 2)) if out is None else out
+    acc.fill(0.0)
+    if potentials is not None:
+        potentials.fill(0.0)
+
+    for rows, cols in _tiles(n):
+        dx, dy, inv_r = _pair_block(positions[rows], positions[cols], softening)
+        if cols.start == rows.start:
+            # With softening a body would otherwise see itself at distance softening
+            np.fill_diagonal(inv_r, 0.0)
+        inv_r3 = inv_r**3
+        if potentials is not None:
+            potentials[rows] += inv_r @ masses[cols]
+            if cols.start != rows.start:
+                potentials[cols] += masses[rows] @ inv_r
+
+        # a_i += G * m_j * r_ij / |r_ij|^3
+        w = inv_r3 * masses[cols]
+        acc[rows, 0] += np.einsum('ij,ij->i', w, dx)
+        acc[rows, 1] += np.einsum('ij,ij->i', w, dy)
+
+        # a_j -= G * m_i * r_ij / |r_ij|^3 (same pairs seen from the other side)
+        if cols.start != rows.start:
+            w = inv_r3 * masses[rows][:, None]
+            acc[cols, 0] -= np.einsum('ij,ij->j', w, dx)
+            acc[cols, 1] -= np.einsum('ij,ij->j', w, dy)
+
+    acc *= G
+    if potentials is not None:
+        potentials *= -G
+    return acc
+
+
+def _small_accelerations(positions, masses, G, softening, out, potentials=None):
+    r_vec = positions[None, :, :] - positions[:, None, :]
+    r_sq = np.einsum('ijk,ijk->ij', r_vec, r_vec)
+    if softening:
+        r_sq += softening**2
+        np.fill_diagonal(r_sq, 0.0)
+
+    w = np.zeros_like(r_sq)
+    np.power(r_sq, -1.5, out=w, where=r_sq > 0)
+    if potentials is not None:
+        # 1/r = r^2 * (1/r^3)
+        np.multiply(-G, (r_sq * w) @ masses, out=potentials)
+    w *= masses
+    return np.multiply(G, np.einsum('ij,ijk->ik', w, r_vec), out=out)
+
+
+def direct_accelerations_on(targets, positions, masses, G, softening=0.0):
+    """
+    Accelerations of the bodies `targets` (index array) due to all bodies, O(len(targets) * N).
+    Used when only some bodies need new forces (block time steps).
+    """
+    acc = np.zeros((len(targets), 2))
+    for start in range(0, len(targets), TILE):
+        rows = slice(start, start + TILE)
+        dx, dy, inv_r = _pair_block(positions[targets[rows]], positions, softening)
+        w = inv_r**3 * masses
+        acc[rows, 0] = np.einsum('ij,ij->i', w, dx)
+        acc[rows, 1] = np.einsum('ij,ij->i', w, dy)
+    acc *= G
+    return acc
+
+
+def dynamical_times(positions, masses, G, targets=None):
+    """
+    Shortest two-body dynamical time of every body, min over j of sqrt(r_ij^3 / (G (m_i + m_j))).
+    Roughly the orbital time scale / 2 pi of its tightest pair; used to pick adaptive time steps.
+    With `targets` (index array) only those bodies' times are computed, O(len(targets) * N).
+    """
+    if targets is not None:
+        times = np.empty(len(targets))
+        for start in range(0, len(targets), TILE):
+            rows = targets[start:start + TILE]
+            times[start:start + TILE] = _min_pair_times(positions[rows], positions, masses[rows], masses, G, axis=1)
+        return times
+
+    n = len(positions)
+    times = np.full(n, np.inf)
+    for rows, cols in _tiles(n):
+        pos_i, pos_j, m_i, m_j = positions[rows], positions[cols], masses[rows], masses[cols]
+        # The pair's time applies to both bodies
+        times[rows] = np.minimum(times[rows], _min_pair_times(pos_i, pos_j, m_i, m_j, G, axis=1))
+        times[cols] = np.minimum(times[cols], _min_pair_times(pos_i, pos_j, m_i, m_j, G, axis=0))
+    return times
+
+
+def _min_pair_times(pos_i, pos_j, m_i, m_j, G, axis):
+    _, _, inv_r = _pair_block(pos_i, pos_j, 0.0)
+    total_mass = m_i[:, None] + m_j
+    # 1 / t^2 per pair; coincident pairs and massless pairs get 0 (no constraint)
+    rate_sq = np.zeros_like(inv_r)
+    np.multiply(inv_r**3, G * total_mass, out=rate_sq, where=total_mass > 0)
+    with np.errstate(divide='ignore'):
+        return 1.0 / np.sqrt(rate_sq.max(axis=axis, initial=0.0))
+
+
+def potential_energy(positions, masses, G, softening=0.0):
+    """Total gravitational potential energy, - sum over pairs of G * m_i * m_j / r_ij."""
+    total = 0.0
+    for rows, cols in _tiles(len(positions)):
+        _, _, inv_r = _pair_block(positions[rows], positions[cols], softening)
+        if cols.start == rows.start:
+            # No self-energy (only nonzero with softening)
+            np.fill_diagonal(inv_r, 0.0)
+        pair_sum = masses[rows] @ inv_r @ masses[cols]
+        # A diagonal tile holds every pair twice (i, j and j, i)
+        total += 0.5 * pair_sum if cols.start == rows.start else pair_sum
+    return -G * float(total)
+
+
+def kinetic_energy(velocities, masses):
+    """Total kinetic energy, sum of 0.5 * m * v^2."""
+    return 0.5 * float(np.sum(masses * np.einsum('ij,ij->i', velocities, velocities)))
@@ -1,17 +1,115 @@
 
+from typing import NamedTuple
+
+import numpy as np
+from ..config import G
+from .kepler import propagate
+
+# Yoshida / Forest-Ruth 4th order: three leapfrog sub-steps of w1, w0, w1 times dt
+_YOSHIDA_W1 = 1.0 / (2.0 - 2.0 ** (1.0 / 3.0))
+_YOSHIDA_W0 = 1.0 - 2.0 * _YOSHIDA_W1
+
+# Dormand-Prince 5(4) tableau
+_DP_A = [
+    [],
+    [1 / 5],
+    [3 / 40, 9 / 40],
+    [44 / 45, -56 / 15, 32 / 9],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+    [35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84],
+]
+# 5th order weights are the last row of A (FSAL); E = 5th order - 4th order weights
+_DP_E = np.array([35 / 384 - 5179 / 57600, 0.0, 500 / 1113 - 7571 / 16695, 125 / 192 - 393 / 640,
+                  -2187 / 6784 + 92097 / 339200, 11 / 84 - 187 / 2100, -1 / 40])
+
+
+class StepSnapshot(NamedTuple):
+    """
+    State after a step, as yielded by Integrator.iter_run. positions and velocities
+    are the system's own (N, 2) arrays, not copies: they change with the next step.
+    """
+    step: int
+    time: float
+    positions: np.ndarray
+    velocities: np.ndarray
+    system: object
+
+
 class Integrator:
     @staticmethod
-    def step(system, dt, method='leapfrog'):
+    def step(system, dt, method='leapfrog', **options):
         """
         Advance the system by one time step dt using the specified method.
+
+        Methods:
+            'euler'              Explicit Euler (1st order, drifts)
+            'leapfrog'           Velocity Verlet (2nd order, symplectic)
+            'yoshida4'           Yoshida / Forest-Ruth (4th order, symplectic)
+            'rk45'               Dormand-Prince RK45 with error control (adaptive sub-steps)
+            'adaptive_leapfrog'  Leapfrog with per-body or global power-of-two sub-steps
+            'kepler'             Exact analytic two-body motion (two bodies only)
+            'wisdom_holman'      Kepler drifts about the heaviest body + kicks from the others
+
+        Extra keyword options are passed to the method (e.g. rtol for 'rk45').
         """
         if method == 'euler':
             Integrator.euler_step(system, dt)
         elif method == 'leapfrog':
             Integrator.leapfrog_step(system, dt)
+        elif method == 'yoshida4':
+            Integrator.yoshida4_step(system, dt)
+        elif method == 'rk45':
+            Integrator.rk45_step(system, dt, **options)
+        elif method == 'adaptive_leapfrog':
+            Integrator.adaptive_leapfrog_step(system, dt, **options)
+        elif method == 'kepler':
+            Integrator.kepler_step(system, dt)
+        elif method == 'wisdom_holman':
+            Integrator.wisdom_holman_step(system, dt)
         else:
             raise ValueError(f"Unknown integration method: {method}")
 
+    @staticmethod
+    def run(system, steps, dt, method='leapfrog', checkpoint_every=0, checkpoint_path=None, **options):
+        """
+        Take `steps` steps of `method`. With checkpoint_every=N the system is saved to
+        checkpoint_path every N steps; resume with
+        Integrator.run(SolarSystem.from_checkpoint(path), remaining_steps, dt, method).
+        Like step(), assumes a(t) is valid (call system.compute_forces() before the first step).
+        With diagnostics on, the starting state is recorded first if nothing has been yet.
+        """
+        if checkpoint_every and checkpoint_path is None:
+            raise ValueError("checkpoint_every needs a checkpoint_path")
+        if system.diagnostics is not None and len(system.diagnostics) == 0:
+            system.record_diagnostics()
+        for i in range(1, steps + 1):
+            Integrator.step(system, dt, method, **options)
+            if checkpoint_every and i % checkpoint_every == 0:
+                system.save_checkpoint(checkpoint_path)
+
+    @staticmethod
+    def iter_run(system, steps, dt, method='leapfrog', every=1, until=None, **options):
+        """
+        Like run(), but yields a StepSnapshot every `every` steps (and after the last one)
+        so results can be consumed as they are produced. Stops early after yielding the
+        first snapshot for which until(snapshot) is true, e.g. an orbit escaping:
+
+            until=lambda s: len(s.system.escaping_bodies()) > 0
+        """
+        if every < 1:
+            raise ValueError("every must be >= 1")
+        if system.diagnostics is not None and len(system.diagnostics) == 0:
+            system.record_diagnostics()
+        for i in range(1, steps + 1):
+            Integrator.step(system, dt, method, **options)
+            if i % every and i != steps:
+                continue
+            snapshot = StepSnapshot(i, system.time, system.positions, system.velocities, system)
+            yield snapshot
+            if until is not None and until(snapshot):
+                return
+
     @staticmethod
     def euler_step(system, dt):
         """
@@ -19,40 +117,31 @@ class Integrator:
         v(t+dt) = v(t) + a(t) * dt
         x(t+dt) = x(t) + v(t) * dt
         """
+        prof = system.profiler
+        mark = prof.start() if prof is not None else None
+
         system.compute_forces() # Update a(t) based on x(t)
-        
-        for body in system.bodies:
-            # We must use curr vel for pos update in explicit Euler
-            # But we update vel in place, so careful with order if we want strict Euler
-            # Standard implementation often does:
-            # v += a * dt
-            # x += v * dt (This is actually Semi-Implicit Euler / Symplectic Euler)
-            
-            # Strict Explicit Euler:
-            # x_new = x + v * dt
-            # v_new = v + a * dt
-            
-            # Implementing Symplectic Euler (better stability than explicit)
-            # v += a * dt
-            # x += v * dt
-            
-            # Wait, user asked for Euler to show it's BAD (drifts). 
-            # Explicit Euler is the bad one.
-            
-            # Save current velocity for position update
-            v_curr = body.velocity.copy()
-            
-            body.velocity += body.acceleration * dt
-            body.position += v_curr * dt # Use old velocity
-            
-            body.history.append(body.position.copy())
+        if prof is not None:
+            mark = prof.lap('forces', mark)
+
+        # User asked for Euler to show it's BAD (drifts), so this is strict
+        # explicit Euler, not symplectic Euler: the position update must use
+        # the old velocity, so update positions first.
+        system.positions += system.velocities * dt
+        if prof is not None:
+            mark = prof.lap('drift', mark)
+        system.velocities += system.accelerations * dt
+        if prof is not None:
+            prof.lap('kick', mark)
+
+        system.end_step(dt)
 
     @staticmethod
     def leapfrog_step(system, dt):
         """
         Leapfrog / Velocity Verlet (Second Order, Symplectic).
         Good for energy conservation.
-        
+
         Drift-Kick-Drift or Kick-Drift-Kick form.
         Here using a synchronized form (Velocity Verlet):
         v(t+0.5dt) = v(t) + 0.5 * a(t) * dt
@@ -60,28 +149,308 @@ class Integrator:
         Include force update a(t+dt)
         v(t+dt) = v(t+0.5dt) + 0.5 * a(t+dt) * dt
         """
-        
-        # 1. First half-kick: v += 0.5 * a * dt
-        # We need a(t) first.
-        # Assuming system.compute_forces() was called before or acceleration is valid from last step.
-        # For the very first step, we might need to compute forces manually if not done.
-        # But generally, we can assume acceleration is current.
-        
+
         # Note: If this is the START of simulation, caller should ensure compute_forces() is called once.
         # Let's enforce it here just in case? No, that doubles work.
         # We'll assume a(t) is valid.
-        
-        for body in system.bodies:
-            body.velocity += 0.5 * body.acceleration * dt
-            
+        Integrator._kick_drift_kick(system, dt)
+        system.end_step(dt)
+
+    @staticmethod
+    def _kick_drift_kick(system, dt):
+        prof = system.profiler
+        mark = prof.start() if prof is not None else None
+
+        # 1. First half-kick: v += 0.5 * a * dt
+        system.velocities += 0.5 * dt * system.accelerations
+        if prof is not None:
+            mark = prof.lap('kick', mark)
+
         # 2. Drift: x += v * dt
-        for body in system.bodies:
-            body.position += body.velocity * dt
-            body.history.append(body.position.copy())
-            
+        system.positions += system.velocities * dt
+        if prof is not None:
+            mark = prof.lap('drift', mark)
+
         # 3. Update forces: a(t+dt)
         system.compute_forces()
-        
+        if prof is not None:
+            mark = prof.lap('forces', mark)
+
         # 4. Second half-kick: v += 0.5 * a_new * dt
-        for body in system.bodies:
-            body.velocity += 0.5 * body.acceleration * dt
+        system.velocities += 0.5 * dt * system.accelerations
+        if prof is not None:
+            prof.lap('kick', mark)
+
+    @staticmethod
+    def yoshida4_step(system, dt):
+        """
+        Yoshida / Forest-Ruth (Fourth Order, Symplectic).
+
+        Three leapfrog sub-steps of w1*dt, w0*dt, w1*dt with
+        w1 = 1 / (2 - 2^(1/3)), w0 = 1 - 2*w1 (w0 < 0: the middle sub-step goes back in time).
+        The second-order errors of the sub-steps cancel, so errors fall as dt^4
+        for 3 force evaluations per step. Like leapfrog, assumes a(t) is valid.
+        """
+        Integrator._kick_drift_kick(system, _YOSHIDA_W1 * dt)
+        Integrator._kick_drift_kick(system, _YOSHIDA_W0 * dt)
+        Integrator._kick_drift_kick(system, _YOSHIDA_W1 * dt)
+        system.end_step(dt)
+
+    @staticmethod
+    def rk45_step(system, dt, rtol=1e-9, atol=1e-12):
+        """
+        Dormand-Prince RK45 (Fifth Order, embedded Fourth Order error estimate).
+
+        Advances exactly dt using as many adaptive sub-steps as the tolerance needs:
+        small sub-steps near perihelion, large ones elsewhere. The proposed sub-step size
+        is kept in system.integrator_state for the next call. Like leapfrog, assumes a(t)
+        is valid, and leaves a(t+dt) valid (the last stage is evaluated at the new state).
+        Not symplectic: energy drifts slowly, but the error per step is controlled.
+
+        Args:
+            rtol (float): Relative tolerance on positions and velocities
+            atol (float): Absolute tolerance on positions and velocities
+        """
+        prof = system.profiler
+        mark = prof.start() if prof is not None else None
+
+        # State y = [positions, velocities]; dy/dt = [velocities, a(positions)]
+        y = np.stack([system.positions, system.velocities])
+        k_first = np.stack([system.velocities, system.accelerations])
+
+        h_next = system.integrator_state.get('rk45_h', dt)
+        t = 0.0
+        while dt - t > 1e-12 * dt:
+            h = min(h_next, dt - t)
+            k = [k_first]
+            for stage in range(1, 7):
+                y_stage = y + h * sum(a * k_j for a, k_j in zip(_DP_A[stage], k) if a)
+                if prof is not None:
+                    mark = prof.lap('stages', mark)
+                acc = system.accelerations_at(y_stage[0])
+                if prof is not None:
+                    mark = prof.lap('forces', mark)
+                k.append(np.stack([y_stage[1], acc]))
+
+            # The last stage is the 5th order solution; E gives its difference to the 4th order one
+            error = h * sum(e * k_j for e, k_j in zip(_DP_E, k) if e)
+            scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_stage))
+            err = np.sqrt(np.mean((error / scale) ** 2))
+            factor = min(5.0, max(0.2, 0.9 * max(err, 1e-10) ** -0.2))
+
+            if err <= 1.0:
+                t += h
+                y = y_stage
+                k_first = k[6]
+                # A step shortened to land on dt says nothing new about the right step size
+                if h == h_next or factor < 1.0:
+                    h_next = h * factor
+            else:
+                h_next = h * factor
+            if prof is not None:
+                mark = prof.lap('error_control', mark)
+
+        system.positions[...] = y[0]
+        system.velocities[...] = y[1]
+        system.accelerations[...] = k_first[1]
+        system.integrator_state['rk45_h'] = float(h_next)
+        system.end_step(dt)
+
+    @staticmethod
+    def adaptive_leapfrog_step(system, dt, eta=0.01, criterion='per_body', max_level=16):
+        """
+        Leapfrog with adaptive power-of-two sub-steps (block time steps).
+
+        Each body wants a step of at most eta * (its shortest two-body dynamical time),
+        rounded down to dt / 2^level. At the end of each of its own steps a body gets new
+        forces and picks its level again (a coarser level only once it lines up with the
+        coarser grid), so a planet speeds up its stepping through perihelion and slows
+        down again afterwards. Bodies only pay for force evaluations at their own step
+        ends; between those events everything drifts together in one array operation.
+        With criterion='global' all bodies share the finest level that any body wants.
+        The step is still kick-drift-kick; assumes a(t) is valid, like leapfrog.
+
+        Args:
+            eta (float): Fraction of the dynamical time per step; smaller is more accurate
+            criterion (str): 'per_body' or 'global'
+            max_level (int): At most 2^max_level sub-steps per dt
+        """
+        if criterion not in ('per_body', 'global'):
+            raise ValueError(f"Unknown time step criterion: {criterion}")
+
+        # Time is counted in units of the finest possible sub-step h
+        n_sub = 1 << max_level
+        h = dt / n_sub
+
+        def wanted_levels(targets):
+            with np.errstate(divide='ignore'):
+                levels = np.ceil(np.log2(dt / (eta * system.dynamical_times(targets))))
+            levels = np.clip(np.nan_to_num(levels, nan=0.0, neginf=0.0), 0, max_level).astype(np.int64)
+            if criterion == 'global':
+                levels[:] = levels.max(initial=0)
+            return levels
+
+        prof = system.profiler
+        mark = prof.start() if prof is not None else None
+
+        everyone = np.arange(len(system.masses))
+        levels = wanted_levels(everyone if criterion == 'per_body' else None)
+        body_dt = dt / (1 << levels)
+        next_end = 1 << (max_level - levels)
+        if prof is not None:
+            mark = prof.lap('levels', mark)
+
+        # Opening half-kick for everyone
+        system.velocities += 0.5 * body_dt[:, None] * system.accelerations
+        if prof is not None:
+            mark = prof.lap('kick', mark)
+
+        s = 0
+        while s < n_sub:
+            # Drift everyone to the next step end
+            s_next = int(next_end.min())
+            system.positions += system.velocities * ((s_next - s) * h)
+            s = s_next
+            if prof is not None:
+                mark = prof.lap('drift', mark)
+
+            # Closing half-kick (with fresh forces) for the bodies whose step ends now
+            ending = np.flatnonzero(next_end == s)
+            if len(ending) == len(everyone):
+                system.compute_forces()
+            else:
+                system.accelerations[ending] = system.accelerations_at(system.positions, targets=ending)
+            if prof is not None:
+                mark = prof.lap('forces', mark)
+            system.velocities[ending] += 0.5 * body_dt[ending, None] * system.accelerations[ending]
+            if prof is not None:
+                mark = prof.lap('kick', mark)
+            if s == n_sub:
+                break
+
+            # New level: what the body wants now, but no coarser than the grid at s allows
+            new_levels = wanted_levels(ending if criterion == 'per_body' else None)
+            if criterion == 'global':
+                new_levels = new_levels[ending]
+            aligned_level = max_level - ((s & -s).bit_length() - 1)
+            levels[ending] = np.maximum(new_levels, aligned_level)
+            body_dt[ending] = dt / (1 << levels[ending])
+            next_end[ending] = s + (1 << (max_level - levels[ending]))
+            if prof is not None:
+                mark = prof.lap('levels', mark)
+
+            # Opening half-kick of the new step
+            system.velocities[ending] += 0.5 * body_dt[ending, None] * system.accelerations[ending]
+            if prof is not None:
+                mark = prof.lap('kick', mark)
+
+        system.end_step(dt)
+
+    @staticmethod
+    def kepler_step(system, dt):
+        """
+        Exact two-body step: the relative orbit follows the analytic Kepler solution
+        (see kepler.propagate) and the centre of mass moves in a straight line.
+        No error accumulates, so any dt gives the same orbit. Ignores softening.
+        """
+        if len(system.masses) != 2:
+            raise ValueError("The 'kepler' method needs exactly two bodies; use 'wisdom_holman'")
+
+        prof = system.profiler
+        mark = prof.start() if prof is not None else None
+
+        m1, m2 = system.masses
+        total = m1 + m2
+        com = (m1 * system.positions[0] + m2 * system.positions[1]) / total
+        com_vel = (m1 * system.velocities[0] + m2 * system.velocities[1]) / total
+
+        rel_pos, rel_vel = propagate(system.positions[1] - system.positions[0],
+                                     system.velocities[1] - system.velocities[0], dt, G * total)
+        com += com_vel * dt
+
+        system.positions[0] = com - m2 / total * rel_pos
+        system.positions[1] = com + m1 / total * rel_pos
+        system.velocities[0] = com_vel - m2 / total * rel_vel
+        system.velocities[1] = com_vel + m1 / total * rel_vel
+        if prof is not None:
+            mark = prof.lap('kepler', mark)
+
+        system.compute_forces()
+        if prof is not None:
+            prof.lap('forces', mark)
+        system.end_step(dt)
+
+    @staticmethod
+    def wisdom_holman_step(system, dt):
+        """
+        Wisdom-Holman mixed-variable symplectic step (democratic heliocentric form).
+
+        The heaviest body is the central mass. Every other body moves on its exact Kepler
+        orbit about it (the drift, all bodies in one vectorized kepler.propagate call);
+        the forces between the other bodies, which are small perturbations, are applied
+        as kicks on either side:
+
+            kick(dt/2) - central drift(dt/2) - Kepler(dt) - central drift(dt/2) - kick(dt/2)
+
+        Positions are heliocentric, velocities barycentric; the centre of mass moves in
+        a straight line. The error scales with the size of the perturbations rather than
+        with the Kepler motion itself, so dt can be much larger than for leapfrog
+        (a few percent of the shortest orbital period). Each step costs one force pass
+        among the non-central bodies, with the system's force backend (direct or
+        Barnes-Hut). system.accelerations are the perturbing (kick) accelerations,
+        not the full ones.
+        """
+        prof = system.profiler
+        mark = prof.start() if prof is not None else None
+
+        masses = system.masses
+        sun = int(np.argmax(masses))
+        others = np.flatnonzero(np.arange(len(masses)) != sun)
+        m_sun, m_others = masses[sun], masses[others]
+        total = masses.sum()
+
+        com = masses @ system.positions / total
+        com_vel = masses @ system.velocities / total
+        q = system.positions[others] - system.positions[sun]
+        u = system.velocities[others] - com_vel
+
+        if prof is not None:
+            mark = prof.lap('coordinates', mark)
+
+        def kick(h, mark):
+            # Forces among the non-central bodies only, with the system's force backend
+            acc = system.accelerations_at(q, masses=m_others)
+            if prof is not None:
+                mark = prof.lap('forces', mark)
+            u[...] += h * acc
+            if prof is not None:
+                mark = prof.lap('kick', mark)
+            return acc, mark
+
+        def central_drift(h, mark):
+            # Motion of the central body with respect to the barycentre
+            q[...] += h * (m_others @ u) / m_sun
+            if prof is not None:
+                mark = prof.lap('drift', mark)
+            return mark
+
+        _, mark = kick(0.5 * dt, mark)
+        mark = central_drift(0.5 * dt, mark)
+        q, u = propagate(q, u, dt, G * m_sun)
+        if prof is not None:
+            mark = prof.lap('kepler', mark)
+        mark = central_drift(0.5 * dt, mark)
+        acc, mark = kick(0.5 * dt, mark)
+
+        com += com_vel * dt
+        sun_pos = com - m_others @ q / total
+        system.positions[sun] = sun_pos
+        system.positions[others] = q + sun_pos
+        system.velocities[sun] = com_vel - m_others @ u / m_sun
+        system.velocities[others] = u + com_vel
+        system.accelerations[sun] = 0.0
+        system.accelerations[others] = acc
+        if prof is not None:
+            prof.lap('coordinates', mark)
+
+        system.end_step(dt)
@@ -0,0 +1,150 @@
+
+import numpy as np
+
+# Newton iterations on Kepler's equation stop once every correction is below this (radians)
+KEPLER_TOL = 1e-14
+KEPLER_MAX_ITER = 50
+
+
+def solve_kepler(mean_anomaly, eccentricity):
+    """
+    Eccentric anomaly E with E - e sin E = M, for arrays of M (any shape, broadcast with e).
+
+    Newton's method from Danby's starting guess E = M + 0.85 e sign(sin M),
+    which converges for every 0 <= e < 1 in a handful of iterations.
+    """
+    M = np.mod(mean_anomaly, 2 * np.pi)
+    e = np.asarray(eccentricity, dtype=float)
+    E = M + 0.85 * e * np.sign(np.sin(M))
+    for _ in range(KEPLER_MAX_ITER):
+        delta = (E - e * np.sin(E) - M) / (1 - e * np.cos(E))
+        E -= delta
+        if np.all(np.abs(delta) < KEPLER_TOL):
+            break
+    return E
+
+
+def propagate(positions, velocities, times, mu):
+    """
+    Exact two-body motion: state of a body after `times` on a Kepler orbit about a fixed mass.
+
+    Uses Lagrange's f and g functions in terms of the change of eccentric anomaly, so the
+    orbit orientation is never computed explicitly. Long times are reduced modulo the
+    period first, so the cost and accuracy do not depend on how far ahead one looks.
+    Everything broadcasts: positions/velocities (..., 2) against times (...), e.g. one
+    state and (T,) times, or (K, 2) states and one shared time step.
+
+    Args:
+        positions (np.array): (..., 2) positions relative to the central mass in AU
+        velocities (np.array): (..., 2) velocities relative to the central mass in AU/Year
+        times (np.array): Times since the given state in years (may be negative)
+        mu (float or np.array): G * (central mass + body mass), broadcast like times
+
+    Returns:
+        tuple: (positions, velocities) at the requested times, each (..., 2)
+
+    Raises:
+        ValueError: If an orbit is not bound (parabolic or hyperbolic)
+    """
+    r0_vec = np.asarray(positions, dtype=float)
+    v0_vec = np.asarray(velocities, dtype=float)
+    t = np.asarray(times, dtype=float)
+    mu = np.asarray(mu, dtype=float)
+
+    r0 = np.sqrt(np.einsum('...k,...k->...', r0_vec, r0_vec))
+    v0_sq = np.einsum('...k,...k->...', v0_vec, v0_vec)
+    radial = np.einsum('...k,...k->...', r0_vec, v0_vec)
+
+    # Vis-viva: 1/a = 2/r - v^2/mu
+    inv_a = 2.0 / r0 - v0_sq / mu
+    if np.any(inv_a <= 0):
+        raise ValueError("Kepler propagation needs bound (elliptic) orbits")
+    a = 1.0 / inv_a
+    n = np.sqrt(mu * inv_a**3)
+
+    # e cos E0 and e sin E0 of the starting point
+    e_cos = 1.0 - r0 * inv_a
+    e_sin = radial / np.sqrt(mu * a)
+    e = np.hypot(e_cos, e_sin)
+    E0 = np.arctan2(e_sin, e_cos)
+    M0 = E0 - e_sin
+
+    # Reduce to within one period: the reduced time is what the f, g functions see
+    M = np.mod(M0 + n * t, 2 * np.pi)
+    t_reduced = (M - M0) / n
+    dE = solve_kepler(M, e) - E0
+
+    sin_dE, cos_dE = np.sin(dE), np.cos(dE)
+    r = a * (1.0 - e_cos * cos_dE + e_sin * sin_dE)
+
+    f = 1.0 - a / r0 * (1.0 - cos_dE)
+    g = t_reduced - (dE - sin_dE) / n
+    f_dot = -np.sqrt(mu * a) * sin_dE / (r * r0)
+    g_dot = 1.0 - a / r * (1.0 - cos_dE)
+
+    new_positions = f[..., None] * r0_vec + g[..., None] * v0_vec
+    new_velocities = f_dot[..., None] * r0_vec + g_dot[..., None] * v0_vec
+    return new_positions, new_velocities
+
+
+class KeplerOrbit:
+    """
+    Analytic orbit of one body about another (e.g. the Earth about the Sun).
+
+    Positions and velocities are relative to the central body. Any number of query
+    times is evaluated in one vectorized call, O(1) per time, with no time stepping.
+    """
+
+    def __init__(self, position, velocity, mu, epoch=0.0):
+        """
+        Args:
+            position (np.array): (2,) position relative to the central body in AU
+            velocity (np.array): (2,) velocity relative to the central body in AU/Year
+            mu (float): G * (central mass + body mass)
+            epoch (float): Time of the given state in years
+        """
+        self.position = np.array(position, dtype=float)
+        self.velocity = np.array(velocity, dtype=float)
+        self.mu = float(mu)
+        self.epoch = epoch
+
+    @classmethod
+    def from_bodies(cls, central, body, G, epoch=0.0):
+        """Orbit of `body` about `central` from their current states."""
+        return cls(body.position - central.position, body.velocity - central.velocity,
+                   G * (central.mass + body.mass), epoch)
+
+    @property
+    def semi_major_axis(self):
+        return 1.0 / (2.0 / np.linalg.norm(self.position) - self.velocity @ self.velocity / self.mu)
+
+    @property
+    def eccentricity(self):
+        # Laplace-Runge-Lenz vector / mu; in 2D h is the scalar x vy - y vx
+        h = self.position[0] * self.velocity[1] - self.position[1] * self.velocity[0]
+        e_vec = np.array([self.velocity[1] * h, -self.velocity[0] * h]) / self.mu
+        e_vec -= self.position / np.linalg.norm(self.position)
+        return float(np.linalg.norm(e_vec))
+
+    @property
+    def period(self):
+        return 2 * np.pi * np.sqrt(self.semi_major_axis**3 / self.mu)
+
+    def state_at(self, times):
+        """
+        Relative position and velocity at the given absolute times.
+
+        Args:
+            times (float or np.array): Times in years, any shape
+
+        Returns:
+            tuple: (positions, velocities), each of shape times.shape + (2,)
+        """
+        t = np.asarray(times, dtype=float) - self.epoch
+        return propagate(self.position, self.velocity, t, self.mu)
+
+    def positions_at(self, times):
+        return self.state_at(times)[0]
+
+    def velocities_at(self, times):
+        return self.state_at(times)[1]
@@ -0,0 +1,234 @@
+
+import json
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from .. import config
+
+# Records per chunk file; a (4096, N, 2) float64 chunk is 128 KiB per body
+DEFAULT_CHUNK_SIZE = 4096
+
+META_FILE = 'meta.json'
+FIELDS = ('time', 'positions', 'velocities', 'energy')
+
+
+def _chunk_path(path, field, index):
+    return os.path.join(path, f'{field}_{index:05d}.npy')
+
+
+def _units():
+    """Simulation units and constants from sun_earth.config, stored with every run."""
+    return {
+        'distance': 'AU', 'time': 'year', 'mass': 'solar mass',
+        'G': config.G,
+        'si': {'distance_m': config.UNIT_DIST, 'time_s': config.UNIT_TIME, 'mass_kg': config.UNIT_MASS},
+    }
+
+
+class TrajectoryWriter:
+    """
+    Streams a run to disk as chunked .npy files that are filled through memory maps.
+
+    Layout of the output directory:
+        meta.json                dt, units, body names/masses, chunk size, record count
+        time_00000.npy           (chunk,) times in years
+        positions_00000.npy      (chunk, N, 2) positions in AU
+        velocities_00000.npy     (chunk, N, 2) velocities in AU/Year
+        energy_00000.npy         (chunk,) total energy (only if energy=True)
+        ...
+
+    Only the current chunk is mapped, so memory use does not grow with the run length.
+    Attach to a system with SolarSystem.stream_to(); close (or use as a context manager)
+    to finish the last chunk and write the metadata.
+    """
+
+    def __init__(self, path, names, masses, chunk_size=DEFAULT_CHUNK_SIZE, record_every=1, energy=True):
+        """
+        Args:
+            path (str): Output directory (created if needed)
+            names (list): Body names
+            masses (np.array): (N,) body masses in solar masses
+            chunk_size (int): Records per chunk file
+            record_every (int): Write every n-th step
+            energy (bool): Also write the total energy (an O(N^2) pass per record)
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.names = list(names)
+        self.masses = np.asarray(masses, dtype=float).copy()
+        self.chunk_size = chunk_size
+        self.record_every = record_every
+        self.energy = energy
+        self.fields = FIELDS if energy else FIELDS[:3]
+
+        self.dt = None
+        self.closed = False
+        self.n_records = 0
+        self._steps = 0
+        self._chunks = 0
+        self._maps = None
+
+    def _open_chunk(self):
+        n = len(self.names)
+        shapes = {'time': (), 'positions': (n, 2), 'velocities': (n, 2), 'energy': ()}
+        self._maps = {
+            field: open_memmap(_chunk_path(self.path, field, self._chunks), mode='w+',
+                               dtype=np.float64, shape=(self.chunk_size,) + shapes[field])
+            for field in self.fields
+        }
+        self._chunks += 1
+
+    def _close_chunk(self):
+        filled = self.n_records - (self._chunks - 1) * self.chunk_size
+        maps, self._maps = self._maps, None
+        for array in maps.values():
+            array.flush()
+        if filled < self.chunk_size:
+            # Last chunk: rewrite with only the filled records (after dropping the maps)
+            parts = {field: np.array(array[:filled]) for field, array in maps.items()}
+            del maps
+            for field, part in parts.items():
+                np.save(_chunk_path(self.path, field, self._chunks - 1), part)
+
+    def append(self, system, dt):
+        """Write the system's current state if this step falls on the recording stride."""
+        if self.closed:
+            raise ValueError("Trajectory output is closed")
+        self._steps += 1
+        if self.dt is None:
+            self.dt = dt
+        if self._steps % self.record_every:
+            return
+
+        if self._maps is None:
+            self._open_chunk()
+        row = self.n_records % self.chunk_size
+        self._maps['time'][row] = system.time
+        self._maps['positions'][row] = system.positions
+        self._maps['velocities'][row] = system.velocities
+        if self.energy:
+            self._maps['energy'][row] = system.get_total_energy()
+        self.n_records += 1
+
+        if self.n_records % self.chunk_size == 0:
+            self._close_chunk()
+
+    def close(self):
+        """Finish the last chunk and write meta.json."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._maps is not None:
+            self._close_chunk()
+        meta = {
+            'dt': self.dt,
+            'record_every': self.record_every,
+            'units': _units(),
+            'names': self.names,
+            'masses': self.masses.tolist(),
+            'chunk_size': self.chunk_size,
+            'n_records': self.n_records,
+            'n_chunks': self._chunks,
+            'fields': list(self.fields),
+        }
+        with open(os.path.join(self.path, META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryReader:
+    """
+    Lazy reader for a directory written by TrajectoryWriter.
+
+    Chunks are opened as read-only memory maps on first use, so slicing a time range
+    or a few bodies only touches the chunks (and pages) that hold them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.names = self.meta['names']
+        self.dt = self.meta['dt']
+        self.chunk_size = self.meta['chunk_size']
+        self._maps = {}
+        self._times = None
+
+    def __len__(self):
+        return self.meta['n_records']
+
+    def _chunk(self, field, index):
+        key = (field, index)
+        if key not in self._maps:
+            self._maps[key] = np.load(_chunk_path(self.path, field, index), mmap_mode='r')
+        return self._maps[key]
+
+    @property
+    def times(self):
+        """(records,) times of all records (one float per record, loaded once)."""
+        if self._times is None:
+            chunks = [self._chunk('time', i) for i in range(self.meta['n_chunks'])]
+            self._times = np.concatenate(chunks) if chunks else np.zeros(0)
+        return self._times
+
+    def _body_indices(self, bodies):
+        if bodies is None:
+            return slice(None)
+        return [self.names.index(b) if isinstance(b, str) else b for b in bodies]
+
+    def _records(self, field, first, last, bodies=None):
+        """Records [first, last) of a field, gathered from the chunks that hold them."""
+        parts = []
+        for index in range(first // self.chunk_size, -(-last // self.chunk_size)):
+            offset = index * self.chunk_size
+            rows = slice(max(first - offset, 0), min(last - offset, self.chunk_size))
+            chunk = self._chunk(field, index)
+            parts.append(chunk[rows] if bodies is None else chunk[rows][:, bodies])
+        if not parts:
+            n_bodies = len(self.names) if bodies is None else len(bodies)
+            shape = (0,) if field in ('time', 'energy') else (0, n_bodies, 2)
+            return np.zeros(shape)
+        return np.concatenate(parts)
+
+    def time_range(self, start=None, stop=None):
+        """Record indices [first, last) with start <= time < stop."""
+        times = self.times
+        first = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+        last = len(times) if stop is None else int(np.searchsorted(times, stop, side='left'))
+        return first, last
+
+    def positions(self, start=None, stop=None, bodies=None):
+        """
+        (records, bodies, 2) positions with start <= time < stop.
+
+        Args:
+            start, stop (float): Time range in years (None = open end)
+            bodies (list): Body names or indices (None = all)
+        """
+        first, last = self.time_range(start, stop)
+        body_index = self._body_indices(bodies)
+        return self._records('positions', first, last, None if bodies is None else body_index)
+
+    def velocities(self, start=None, stop=None, bodies=None):
+        """(records, bodies, 2) velocities with start <= time < stop."""
+        first, last = self.time_range(start, stop)
+        body_index = self._body_indices(bodies)
+        return self._records('velocities', first, last, None if bodies is None else body_index)
+
+    def energy(self, start=None, stop=None):
+        """(records,) total energy with start <= time < stop."""
+        if 'energy' not in self.meta['fields']:
+            raise KeyError("This run was written without energy")
+        first, last = self.time_range(start, stop)
+        return self._records('energy', first, last)
+
+    def body(self, name, start=None, stop=None):
+        """(records, 2) positions of one body, e.g. for plotting its orbit."""
+        return self.positions(start, stop, [name])[:, 0]
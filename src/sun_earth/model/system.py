@@ -1,59 +1,302 @@
 
 import numpy as np
+from just_for_fun import checkpoint
 from ..config import G
+from .body import Body
+from .forces import (direct_accelerations, direct_accelerations_on, dynamical_times,
+                     potential_energy, kinetic_energy)
+from .barnes_hut import barnes_hut_accelerations, force_error
+from .trajectory import Trajectory
+from .output import TrajectoryWriter, DEFAULT_CHUNK_SIZE
+from .diagnostics import Diagnostics
+from just_for_fun.profiling import profiler_for
+
+FORCE_BACKENDS = ('direct', 'barnes_hut')
+# Engine name in the checkpoint header, checked on load
+CHECKPOINT_ENGINE = 'SolarSystem'
 
 class SolarSystem:
-    def __init__(self, bodies=None):
-        self.bodies = bodies if bodies else []
+    def __init__(self, bodies=None, softening=0.0, force_backend='direct', theta=0.5,
+                 trajectory_capacity=None, record_every=1, diagnostics_every=0, profile=False):
+        """
+        The system owns the state of all its bodies as contiguous arrays:
+        positions, velocities, accelerations (N, 2) and masses (N,).
+        Each Body becomes a view of its row, so `earth.position` still works
+        while integrators update everything with whole-array operations.
+
+        Args:
+            bodies (list): Initial list of Body objects
+            softening (float): Plummer softening length in AU, avoids huge forces in close encounters
+            force_backend (str): 'direct' (exact O(N^2) sum) or 'barnes_hut' (O(N log N) quadtree)
+            theta (float): Barnes-Hut opening angle, smaller is more accurate
+            trajectory_capacity (int): Number of recorded states kept (oldest are overwritten);
+                None keeps trajectory.DEFAULT_CAPACITY, or fewer for many bodies (see Trajectory)
+            record_every (int): Record the positions every n-th step
+            diagnostics_every (int): Record energy, momentum and angular momentum every n-th step (0 = off)
+            profile (bool or PhaseProfiler): Time the phases of each step (kick, drift, forces, history...),
+                see profiler.report(); pass PhaseProfiler(allocations=True) to also track allocations
+        """
+        if force_backend not in FORCE_BACKENDS:
+            raise ValueError(f"Unknown force backend: {force_backend}")
+
+        self.bodies = []
+        self.softening = softening
+        self.force_backend = force_backend
+        self.theta = theta
+
+        # Simulated time in years, advanced by the integrators
+        self.time = 0.0
+        self.trajectory = Trajectory(0, trajectory_capacity, record_every)
+        # Optional on-disk output, see stream_to()
+        self.output = None
+
+        # Optional invariants tracking; the potential comes from the force pass of recorded steps
+        self.diagnostics = Diagnostics(diagnostics_every) if diagnostics_every else None
+        self._potentials = None
+        self._potential_positions = None
+
+        # Per-phase timings of the integrator steps; None = off
+        self.profiler = profiler_for(profile)
+
+        # Number of full force passes so far (partial passes count as a fraction)
+        self.force_evaluations = 0.0
+        # Per-method state kept between steps by adaptive integrators (e.g. RK45's next step size)
+        self.integrator_state = {}
+
+        self.masses = np.zeros(0, dtype=float)
+        self.positions = np.zeros((0, 2), dtype=float)
+        self.velocities = np.zeros((0, 2), dtype=float)
+        self.accelerations = np.zeros((0, 2), dtype=float)
+
+        for body in bodies or []:
+            self.add_body(body)
+
+    @classmethod
+    def from_arrays(cls, masses, positions, velocities, names=None, **kwargs):
+        """
+        Build a system straight from state arrays (e.g. thousands of asteroids)
+        without going through one add_body call per body.
+        """
+        system = cls(**kwargs)
+        system.masses = np.array(masses, dtype=float)
+        system.positions = np.array(positions, dtype=float).reshape(-1, 2)
+        system.velocities = np.array(velocities, dtype=float).reshape(-1, 2)
+        system.accelerations = np.zeros_like(system.positions)
+
+        n = len(system.masses)
+        names = names if names is not None else [f'Body {i}' for i in range(n)]
+        for i, name in enumerate(names):
+            body = Body(name, system.masses[i], system.positions[i], system.velocities[i])
+            body._attach(system, i)
+            system.bodies.append(body)
+        return system
 
     def add_body(self, body):
+        """
+        Add `body`: its state is copied into a new row of the state arrays and it becomes a view of it.
+
+        The arrays are reallocated, so array handles taken earlier (`system.positions`,
+        `earth.position`, ...) are detached copies from then on; read them again.
+        """
+        self.masses = np.append(self.masses, body.mass)
+        self.positions = np.vstack([self.positions, body.position])
+        self.velocities = np.vstack([self.velocities, body.velocity])
+        self.accelerations = np.vstack([self.accelerations, body.acceleration])
+
+        body._attach(self, len(self.bodies))
         self.bodies.append(body)
 
+    def record_history(self):
+        """Offer the current positions to the trajectory recorder (kept every record_every calls)."""
+        self.trajectory.append(self.time, self.positions)
+
+    def end_step(self, dt):
+        """Called by the integrators after each step: advance the clock and record."""
+        prof = self.profiler
+        mark = prof.start() if prof is not None else None
+
+        self.time += dt
+        self.record_history()
+        if prof is not None:
+            mark = prof.lap('history', mark)
+        if self.diagnostics is not None and self.diagnostics.count_step():
+            self.record_diagnostics()
+            if prof is not None:
+                mark = prof.lap('diagnostics', mark)
+        if self.output is not None and not self.output.closed:
+            self.output.append(self, dt)
+            if prof is not None:
+                prof.lap('output', mark)
+
+    def stream_to(self, path, chunk_size=DEFAULT_CHUNK_SIZE, record_every=1, energy=True):
+        """
+        Also write every step's positions, velocities and energy to chunked .npy files
+        in `path` (see output.TrajectoryWriter; read back with output.TrajectoryReader).
+        Returns the writer, which must be closed (or used in a `with` block) at the end.
+        """
+        self.output = TrajectoryWriter(path, [body.name for body in self.bodies], self.masses,
+                                       chunk_size, record_every, energy)
+        return self.output
+
+    def save_checkpoint(self, path):
+        """
+        Save body state, time, integrator state, trajectory and diagnostics to one .npz
+        in the same format as the population engines (see just_for_fun.checkpoint).
+        SolarSystem.from_checkpoint(path) continues bit-for-bit. A stream_to() output
+        is not part of the checkpoint.
+        """
+        arrays, meta = self.trajectory.state()
+        arrays.update(masses=self.masses, positions=self.positions,
+                      velocities=self.velocities, accelerations=self.accelerations)
+        if self.diagnostics is not None:
+            diagnostic_arrays, diagnostic_meta = self.diagnostics.state()
+            arrays.update(diagnostic_arrays)
+            meta.update(diagnostic_meta)
+        meta.update(
+            time=self.time,
+            softening=self.softening,
+            force_backend=self.force_backend,
+            theta=self.theta,
+            force_evaluations=self.force_evaluations,
+            integrator_state=self.integrator_state,
+            bodies=[{'name': b.name, 'color': b.color, 'texture_path': b.texture_path} for b in self.bodies],
+        )
+        checkpoint.save(path, CHECKPOINT_ENGINE, arrays, meta)
+
+    @classmethod
+    def from_checkpoint(cls, path):
+        """Restore a system saved with save_checkpoint(); raises ValueError for any other checkpoint."""
+        arrays, meta = checkpoint.load(path, CHECKPOINT_ENGINE)
+
+        system = cls.from_arrays(arrays['masses'], arrays['positions'], arrays['velocities'],
+                                 names=[b['name'] for b in meta['bodies']], softening=meta['softening'],
+                                 force_backend=meta['force_backend'], theta=meta['theta'])
+        system.accelerations[...] = arrays['accelerations']
+        for body, saved in zip(system.bodies, meta['bodies']):
+            body.color = saved['color']
+            body.texture_path = saved['texture_path']
+        system.time = meta['time']
+        system.force_evaluations = meta['force_evaluations']
+        system.integrator_state = meta['integrator_state']
+        system.trajectory = Trajectory.from_state(arrays, meta)
+        if 'diagnostics' in arrays:
+            system.diagnostics = Diagnostics.from_state(arrays, meta)
+        return system
+
     def compute_forces(self):
         """
-        Compute gravitational forces on all bodies.
-        Currently optimized for Sun-Earth (Sun fixed at origin, Earth moves).
-        For a general N-body, we would iterate all pairs.
-        """
-        # Reset accelerations
-        for body in self.bodies:
-            body.acceleration = np.zeros(2, dtype=float)
-
-        # Basic N-body (O(N^2)) - fine for small N
-        for i, body1 in enumerate(self.bodies):
-            for j, body2 in enumerate(self.bodies):
-                if i == j:
-                    continue
-                
-                # Vector from body1 to body2
-                r_vec = body2.position - body1.position
-                r_mag = np.linalg.norm(r_vec)
-                
-                if r_mag == 0:
-                    continue
-                
-                # F = G * m1 * m2 / r^2
-                # a1 = F / m1 = G * m2 / r^2 * (r_vec / r)
-                # a1 = G * m2 * r_vec / r^3
-                
-                acc = G * body2.mass * r_vec / (r_mag**3)
-                body1.acceleration += acc
-    
+        Compute gravitational forces on all bodies with the selected backend
+        (see forces.direct_accelerations and barnes_hut.barnes_hut_accelerations).
+        On steps that diagnostics will record, the direct sum also keeps the
+        per-body potentials, so the potential energy needs no extra pass.
+        """
+        if self.diagnostics is not None and self.force_backend == 'direct' and self.diagnostics.wants_next():
+            self.force_evaluations += 1
+            if self._potentials is None or len(self._potentials) != len(self.masses):
+                self._potentials = np.empty(len(self.masses))
+            direct_accelerations(self.positions, self.masses, G, self.softening,
+                                 out=self.accelerations, potentials=self._potentials)
+            self._potential_positions = self.positions.copy()
+            return
+        self.accelerations_at(self.positions, out=self.accelerations)
+
+    def record_diagnostics(self):
+        """
+        Record energy, momentum and angular momentum of the current state now
+        (done automatically every diagnostics_every steps; call once before a run
+        to have the initial state as the reference for energy_drift()).
+        """
+        if self.diagnostics is None:
+            self.diagnostics = Diagnostics()
+
+        # Potentials from this step's force pass, unless the bodies have moved since
+        # (e.g. RK45 only evaluates forces at trial positions)
+        if self._potential_positions is not None and np.array_equal(self._potential_positions, self.positions):
+            potential = 0.5 * float(self.masses @ self._potentials)
+        else:
+            potential = potential_energy(self.positions, self.masses, G, self.softening)
+        self._potential_positions = None
+
+        # Everything else is O(N) from the momenta m v
+        mv = self.masses[:, None] * self.velocities
+        kinetic = 0.5 * float(np.vdot(mv, self.velocities))
+        momentum = mv.sum(axis=0)
+        # In 2D, L = sum m (x vy - y vx)
+        angular_momentum = float(self.positions[:, 0] @ mv[:, 1] - self.positions[:, 1] @ mv[:, 0])
+        self.diagnostics.record(self.time, kinetic, potential, kinetic + potential,
+                                momentum[0], momentum[1], angular_momentum)
+
+    def accelerations_at(self, positions, targets=None, out=None, masses=None):
+        """
+        Accelerations the bodies would have at `positions`, without changing the system.
+
+        Args:
+            positions (np.array): (N, 2) trial positions
+            targets (np.array): Optional indices of the bodies whose accelerations are needed
+            out (np.array): Optional array to write the result into
+            masses (np.array): Optional masses of the bodies at `positions` if they are not
+                all of the system's bodies (e.g. the planets alone for Wisdom-Holman kicks)
+
+        Returns:
+            np.array: (N, 2) accelerations, or (len(targets), 2) if targets is given
+        """
+        if masses is None:
+            masses = self.masses
+        if targets is None:
+            # A pass over a subset of the bodies counts as that fraction of a full one
+            self.force_evaluations += 1 if masses is self.masses else len(masses) / len(self.masses)
+            if self.force_backend == 'barnes_hut':
+                return barnes_hut_accelerations(positions, masses, G, self.theta, self.softening, out=out)
+            return direct_accelerations(positions, masses, G, self.softening, out=out)
+
+        if self.force_backend == 'direct':
+            # Only the requested rows: a fraction of a full pass
+            self.force_evaluations += len(targets) / len(self.masses)
+            acc = direct_accelerations_on(targets, positions, masses, G, self.softening)
+        else:
+            acc = self.accelerations_at(positions, masses=masses)[targets]
+
+        if out is None:
+            return acc
+        out[...] = acc
+        return out
+
+    def dynamical_times(self, targets=None):
+        """Shortest two-body dynamical time of every body, or of `targets` (see forces.dynamical_times)."""
+        return dynamical_times(self.positions, self.masses, G, targets)
+
+    def escaping_bodies(self, radius=None):
+        """
+        Indices of the bodies that are leaving: on unbound (positive energy) orbits about
+        the heaviest body, or farther than `radius` AU from it.
+        """
+        central = int(np.argmax(self.masses))
+        r_vec = self.positions - self.positions[central]
+        v_vec = self.velocities - self.velocities[central]
+        r = np.sqrt(np.einsum('ij,ij->i', r_vec, r_vec))
+        mu = G * (self.masses[central] + self.masses)
+        energy = np.zeros(len(r))
+        # Specific two-body energy v^2/2 - mu/r
+        np.divide(mu, r, out=energy, where=r > 0)
+        energy = 0.5 * np.einsum('ij,ij->i', v_vec, v_vec) - energy
+
+        leaving = energy > 0
+        if radius is not None:
+            leaving |= r > radius
+        leaving[central] = False
+        return np.flatnonzero(leaving)
+
+    def force_error(self):
+        """
+        Relative error of the Barnes-Hut forces against the direct sum for the current state.
+
+        Returns:
+            dict: 'max' and 'rms' relative acceleration error over all bodies
+        """
+        return force_error(self.positions, self.masses, G, self.theta, self.softening)
+
     def get_total_energy(self):
         """Calculate total energy (Kinetic + Potential) of the system."""
-        kinetic = 0.0
-        potential = 0.0
-        
-        for i, body1 in enumerate(self.bodies):
-            # Kinetic Energy: 0.5 * m * v^2
-            v_sq = np.sum(body1.velocity**2)
-            kinetic += 0.5 * body1.mass * v_sq
-            
-            # Potential Energy: - G * m1 * m2 / r
-            for j in range(i + 1, len(self.bodies)):
-                body2 = self.bodies[j]
-                r = np.linalg.norm(body1.position - body2.position)
-                if r > 0:
-                    potential -= G * body1.mass * body2.mass / r
-                    
+        kinetic = kinetic_energy(self.velocities, self.masses)
+        potential = potential_energy(self.positions, self.masses, G, self.softening)
         return kinetic + potential
@@ -0,0 +1,149 @@
+
+import numpy as np
+
+# Default number of recorded states kept per system (older ones are overwritten)
+DEFAULT_CAPACITY = 5000
+
+# Upper bound on the buffer size for the default capacity: with many bodies fewer
+# records are kept (e.g. ~800 at N=5000 instead of 5000 records, which would be 800 MB)
+DEFAULT_MAX_BYTES = 128 * 2**20
+
+# Records allocated for a new recording; the buffer doubles as it fills, up to capacity
+INITIAL_RECORDS = 64
+
+# Buffer bytes per record and body: two copies of an (x, y) float64 pair
+RECORD_BYTES = 2 * 2 * 8
+
+
+class Trajectory:
+    """
+    Bounded recording of a system's positions over time.
+
+    States are kept in a ring buffer of `capacity` records; once full, the oldest
+    record is overwritten, so appends are amortised O(1) and memory stays bounded no
+    matter how long the run. Only every `stride`-th appended state is stored.
+
+    Every record is written twice, at slot k and k + size of a (2 * size, N, 2)
+    buffer, so the last `len(self)` records are always one contiguous slice: `positions`
+    and `times` are zero-copy views in chronological order, ready for plotting.
+
+    The buffer starts at INITIAL_RECORDS records and doubles as it fills, so a full
+    recording costs RECORD_BYTES * N * capacity bytes but a short one about what it holds.
+    Without an explicit capacity, DEFAULT_CAPACITY records are kept, or fewer if they
+    would not fit in DEFAULT_MAX_BYTES.
+    """
+
+    def __init__(self, n_bodies=0, capacity=None, stride=1):
+        """
+        Args:
+            n_bodies (int): Number of bodies per record
+            capacity (int): Number of records kept (None = default, scaled down for large N)
+            stride (int): Record every n-th appended state
+        """
+        if (capacity is not None and capacity < 1) or stride < 1:
+            raise ValueError("capacity and stride must be at least 1")
+        self.requested_capacity = capacity
+        self.stride = stride
+        self._allocate(n_bodies)
+
+    def _allocate(self, n_bodies):
+        """Start a new, empty recording of `n_bodies` bodies."""
+        if self.requested_capacity is None:
+            budget = DEFAULT_MAX_BYTES // (RECORD_BYTES * max(n_bodies, 1))
+            self.capacity = max(1, min(DEFAULT_CAPACITY, budget))
+        else:
+            self.capacity = self.requested_capacity
+        self._positions = np.empty((0, n_bodies, 2))
+        self._times = np.empty(0)
+        self._size = 0      # Records the buffer has room for (half its length)
+        self._slot = -1     # Slot (0 .. size-1) of the latest record
+        self._count = 0     # Records currently held
+        self._seen = 0      # States offered to append, recorded or not
+        self._reserve(min(INITIAL_RECORDS, self.capacity))
+
+    def _reserve(self, size):
+        """Reallocate the buffer for `size` records, keeping the current ones (oldest at slot 0)."""
+        positions = np.empty((2 * size, self.n_bodies, 2))
+        times = np.empty(2 * size)
+        count = self._count
+        for offset in (0, size):
+            positions[offset:offset + count] = self.positions
+            times[offset:offset + count] = self.times
+        self._positions, self._times = positions, times
+        self._size = size
+        self._slot = count - 1
+
+    @property
+    def n_bodies(self):
+        return self._positions.shape[1]
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        """Forget all records (keeps the buffer)."""
+        self._slot = -1
+        self._count = 0
+        self._seen = 0
+
+    def append(self, time, positions):
+        """
+        Offer the state at `time`; it is stored if it falls on the recording stride.
+        A change in the number of bodies starts a new, empty recording.
+        """
+        if len(positions) != self.n_bodies:
+            self._allocate(len(positions))
+
+        self._seen += 1
+        if self._seen % self.stride:
+            return
+
+        if self._count == self._size < self.capacity:
+            self._reserve(min(2 * self._size, self.capacity))
+
+        slot = (self._slot + 1) % self._size
+        self._positions[slot] = positions
+        self._positions[slot + self._size] = positions
+        self._times[slot] = time
+        self._times[slot + self._size] = time
+        self._slot = slot
+        self._count = min(self._count + 1, self.capacity)
+
+    def state(self):
+        """Recorded data as ({name: array}, {json-able settings}) for checkpoints."""
+        arrays = {'trajectory_times': self.times, 'trajectory_positions': self.positions}
+        meta = {'trajectory_capacity': self.requested_capacity, 'trajectory_stride': self.stride,
+                'trajectory_seen': self._seen, 'trajectory_bodies': self.n_bodies}
+        return arrays, meta
+
+    @classmethod
+    def from_state(cls, arrays, meta):
+        """Rebuild a Trajectory from `state()` output."""
+        trajectory = cls(meta['trajectory_bodies'], meta['trajectory_capacity'], meta['trajectory_stride'])
+        count = len(arrays['trajectory_times'])
+        trajectory._reserve(max(count, trajectory._size))
+        for offset in (0, trajectory._size):
+            trajectory._positions[offset:offset + count] = arrays['trajectory_positions']
+            trajectory._times[offset:offset + count] = arrays['trajectory_times']
+        trajectory._slot = count - 1
+        trajectory._count = count
+        trajectory._seen = meta['trajectory_seen']
+        return trajectory
+
+    def _window(self):
+        end = self._slot + self._size + 1
+        return slice(end - self._count, end)
+
+    @property
+    def positions(self):
+        """(records, N, 2) recorded positions, oldest first (a view; copy to keep)."""
+        return self._positions[self._window()]
+
+    @property
+    def times(self):
+        """(records,) times of the recorded positions."""
+        return self._times[self._window()]
+
+    def body(self, index):
+        """(records, 2) recorded positions of one body."""
+        return self.positions[:, index]
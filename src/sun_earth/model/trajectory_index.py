@@ -0,0 +1,280 @@
+from typing import NamedTuple
+
+import numpy as np
+
+# Secant refinements of each periapsis / apoapsis time on the interpolated orbit
+EVENT_REFINE_STEPS = 4
+# Points per grid cell the default cell size aims for
+POINTS_PER_CELL = 16
+# Upper bound on the number of grid cells, so a tiny cell_size cannot overflow the cell ids
+MAX_CELLS = 2 ** 40
+
+
+class Events(NamedTuple):
+    """Periapsis or apoapsis passages of one body: when, how far from the central body, and where."""
+    times: np.ndarray
+    distances: np.ndarray
+    positions: np.ndarray
+
+
+class TrajectoryIndex:
+    """
+    Query structure over a recorded run: states at arbitrary times, orbital events
+    and samples inside a region, without scanning the whole recording.
+
+    - Records are kept as time-sorted arrays, so a time lookup is a binary search,
+      and positions between records come from cubic Hermite interpolation of the
+      stored positions and velocities (errors O(dt^4) instead of O(dt^2) for linear).
+    - Periapsis and apoapsis passages of every body about the central body are found
+      once, at construction: sign changes of the radial velocity r.v, refined on the
+      interpolated orbit.
+    - Every (record, body) sample is bucketed in a uniform grid (cells sorted by id,
+      CSR style), so a region query only looks at the cells it overlaps.
+
+    Build one from a streamed run with from_reader(), or from the in-memory
+    recording of a SolarSystem with from_system().
+    """
+
+    def __init__(self, times, positions, velocities=None, names=None, masses=None, central=None, cell_size=None):
+        """
+        Args:
+            times (np.array): (records,) times in years
+            positions (np.array): (records, N, 2) positions in AU
+            velocities (np.array): (records, N, 2) velocities in AU/Year; estimated
+                from the positions (second-order finite differences) if not given
+            names (list): Body names, so bodies can be looked up by name
+            masses (np.array): (N,) masses; the heaviest body is the default central body
+            central (int or str): Body the events are measured from
+            cell_size (float): Grid cell size in AU (default: about POINTS_PER_CELL samples per cell)
+        """
+        times = np.asarray(times, dtype=float)
+        positions = np.asarray(positions, dtype=float)
+        if positions.ndim != 3 or len(positions) != len(times):
+            raise ValueError("positions must be (records, N, 2) with one record per time")
+        if len(times) < 2:
+            raise ValueError("need at least two records")
+
+        order = None if np.all(np.diff(times) > 0) else np.argsort(times, kind='stable')
+        self.times = times if order is None else times[order]
+        self.positions = positions if order is None else positions[order]
+        if velocities is None:
+            self.velocities = np.gradient(self.positions, self.times, axis=0, edge_order=2)
+        else:
+            velocities = np.asarray(velocities, dtype=float)
+            self.velocities = velocities if order is None else velocities[order]
+
+        self.names = list(names) if names is not None else [str(i) for i in range(positions.shape[1])]
+        if central is None:
+            central = int(np.argmax(masses)) if masses is not None else 0
+        self.central = self._body(central)
+
+        self._events = self._find_events()
+        self._build_grid(cell_size)
+
+    @classmethod
+    def from_reader(cls, reader, start=None, stop=None, **options):
+        """Index the records of an output.TrajectoryReader with start <= time < stop."""
+        first, last = reader.time_range(start, stop)
+        return cls(reader.times[first:last], reader.positions(start, stop), reader.velocities(start, stop),
+                   names=reader.names, masses=reader.meta['masses'], **options)
+
+    @classmethod
+    def from_system(cls, system, **options):
+        """
+        Index the states a SolarSystem has recorded in its trajectory buffer. The buffer
+        holds no velocities, so they are estimated from the positions.
+        """
+        trajectory = system.trajectory
+        return cls(trajectory.times.copy(), trajectory.positions.copy(),
+                   names=[body.name for body in system.bodies], masses=system.masses, **options)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def n_bodies(self):
+        return self.positions.shape[1]
+
+    def _body(self, body):
+        return self.names.index(body) if isinstance(body, str) else int(body)
+
+    # --- Interpolation -----------------------------------------------------------------
+
+    def _interval(self, t):
+        # Record i with times[i] <= t <= times[i + 1] (clamped to the recorded span)
+        i = np.searchsorted(self.times, t, side='right') - 1
+        return np.clip(i, 0, len(self.times) - 2)
+
+    def state_at(self, t, bodies=None):
+        """
+        Positions and velocities at time(s) t, interpolated with cubic Hermite splines.
+
+        Args:
+            t (float or np.array): Time(s) in years within the recorded span
+            bodies (list): Body names or indices (None = all)
+        Returns:
+            (positions, velocities), each (..., bodies, 2) for t of shape (...)
+        """
+        t = np.asarray(t, dtype=float)
+        if np.any((t < self.times[0]) | (t > self.times[-1])):
+            raise ValueError(f"t outside the recorded span [{self.times[0]}, {self.times[-1]}]")
+        columns = slice(None) if bodies is None else [self._body(b) for b in bodies]
+
+        i = self._interval(t)
+        t0 = self.times[i]
+        h = (self.times[i + 1] - t0)[..., None, None]
+        s = ((t - t0) / (self.times[i + 1] - t0))[..., None, None]
+        p0, p1 = self.positions[i][..., columns, :], self.positions[i + 1][..., columns, :]
+        v0, v1 = self.velocities[i][..., columns, :], self.velocities[i + 1][..., columns, :]
+
+        s2, s3 = s * s, s * s * s
+        position = ((2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * h * v0
+                    + (3 * s2 - 2 * s3) * p1 + (s3 - s2) * h * v1)
+        velocity = ((6 * s2 - 6 * s) * (p0 - p1) / h + (3 * s2 - 4 * s + 1) * v0 + (3 * s2 - 2 * s) * v1)
+        return position, velocity
+
+    def position_at(self, t, body):
+        """(..., 2) position of one body at time(s) t."""
+        return self.state_at(t, [body])[0][..., 0, :]
+
+    # --- Periapsis / apoapsis ----------------------------------------------------------
+
+    def _relative(self, positions, velocities, body_index):
+        r = positions[..., body_index, :] - positions[..., [self.central], :]
+        v = velocities[..., body_index, :] - velocities[..., [self.central], :]
+        return r, v
+
+    def _find_events(self):
+        bodies = [b for b in range(self.n_bodies) if b != self.central]
+        r, v = self._relative(self.positions, self.velocities, bodies)
+        radial = np.einsum('tbk,tbk->tb', r, v)  # r.v: negative falling in, positive moving out
+
+        events = {}
+        for column, body in enumerate(bodies):
+            rv = radial[:, column]
+            crossing = np.flatnonzero(np.sign(rv[:-1]) != np.sign(rv[1:]))
+            crossing = crossing[rv[crossing] != 0]
+            if len(crossing) == 0:
+                empty = Events(np.zeros(0), np.zeros(0), np.zeros((0, 2)))
+                events[body] = {'periapsis': empty, 'apoapsis': empty}
+                continue
+
+            # Secant steps on r.v of the interpolated orbit, from the bracketing records
+            ta, tb = self.times[crossing], self.times[crossing + 1]
+            fa, fb = rv[crossing], rv[crossing + 1]
+            t = ta - fa * (tb - ta) / (fb - fa)
+            for _ in range(EVENT_REFINE_STEPS):
+                f = self._radial_velocity(t, body)
+                left = np.sign(f) == np.sign(fa)
+                ta, fa = np.where(left, t, ta), np.where(left, f, fa)
+                tb, fb = np.where(left, tb, t), np.where(left, fb, f)
+                t = np.where(fb != fa, ta - fa * (tb - ta) / (fb - fa), t)
+
+            position, velocity = self.state_at(t, [body, self.central])
+            separation = position[:, 0] - position[:, 1]
+            distance = np.hypot(separation[:, 0], separation[:, 1])
+            # Falling in before the crossing -> periapsis, moving out before it -> apoapsis
+            periapsis = rv[crossing] < 0
+            events[body] = {
+                'periapsis': Events(t[periapsis], distance[periapsis], position[periapsis, 0]),
+                'apoapsis': Events(t[~periapsis], distance[~periapsis], position[~periapsis, 0]),
+            }
+        return events
+
+    def _radial_velocity(self, t, body):
+        position, velocity = self.state_at(t, [body, self.central])
+        r = position[:, 0] - position[:, 1]
+        v = velocity[:, 0] - velocity[:, 1]
+        return np.einsum('ek,ek->e', r, v)
+
+    def events(self, body, kind='periapsis', start=None, stop=None):
+        """
+        Periapsis or apoapsis passages of `body` about the central body with start <= time < stop.
+
+        Args:
+            body (int or str): Body index or name
+            kind (str): 'periapsis' or 'apoapsis'
+        """
+        body = self._body(body)
+        if body == self.central:
+            raise ValueError("The central body has no events about itself")
+        if kind not in ('periapsis', 'apoapsis'):
+            raise ValueError(f"Unknown event kind: {kind}")
+        found = self._events[body][kind]
+        first = 0 if start is None else np.searchsorted(found.times, start, side='left')
+        last = len(found.times) if stop is None else np.searchsorted(found.times, stop, side='left')
+        return Events(found.times[first:last], found.distances[first:last], found.positions[first:last])
+
+    def closest_approach(self, body, start=None, stop=None):
+        """(time, distance) of the closest periapsis of `body` in [start, stop), or None if there is none."""
+        found = self.events(body, 'periapsis', start, stop)
+        if len(found.times) == 0:
+            return None
+        k = int(np.argmin(found.distances))
+        return float(found.times[k]), float(found.distances[k])
+
+    # --- Spatial grid ------------------------------------------------------------------
+
+    def _build_grid(self, cell_size):
+        points = self.positions.reshape(-1, 2)
+        self._origin = points.min(axis=0)
+        extent = np.maximum(points.max(axis=0) - self._origin, 1e-12)
+        if cell_size is None:
+            cells = max(len(points) / POINTS_PER_CELL, 1.0)
+            cell_size = np.sqrt(extent[0] * extent[1] / cells) or extent.max() / cells
+        shape = np.floor(extent / cell_size).astype(np.int64) + 1
+        if np.prod(shape.astype(float)) > MAX_CELLS:
+            raise ValueError("cell_size is too small for the extent of the run")
+        self.cell_size = float(cell_size)
+        self._shape = shape
+
+        cell = self._cell_ids(points)
+        self._order = np.argsort(cell, kind='stable')
+        self._sorted_cells = cell[self._order]
+
+    def _cells_of(self, xy):
+        return np.clip(np.floor((xy - self._origin) / self.cell_size).astype(np.int64), 0, self._shape - 1)
+
+    def _cell_ids(self, points):
+        ix, iy = self._cells_of(points).T
+        return iy * self._shape[0] + ix
+
+    def in_region(self, xmin, xmax, ymin, ymax, bodies=None, start=None, stop=None):
+        """
+        Samples with xmin <= x <= xmax and ymin <= y <= ymax.
+
+        Args:
+            bodies (list): Only these body names or indices (None = all)
+            start, stop (float): Only records with start <= time < stop
+        Returns:
+            (record indices, body indices), sorted by record; times are self.times[records]
+        """
+        lo = self._cells_of(np.array([xmin, ymin]))
+        hi = self._cells_of(np.array([xmax, ymax]))
+        # Each row of overlapped cells is one contiguous run of cell ids
+        rows = np.arange(lo[1], hi[1] + 1) * self._shape[0]
+        first = np.searchsorted(self._sorted_cells, rows + lo[0], side='left')
+        last = np.searchsorted(self._sorted_cells, rows + hi[0], side='right')
+        candidates = np.concatenate([self._order[a:b] for a, b in zip(first, last)]) if len(rows) else np.zeros(0, int)
+
+        records, body = np.divmod(candidates, self.n_bodies)
+        xy = self.positions[records, body]
+        keep = (xy[:, 0] >= xmin) & (xy[:, 0] <= xmax) & (xy[:, 1] >= ymin) & (xy[:, 1] <= ymax)
+        if bodies is not None:
+            keep &= np.isin(body, [self._body(b) for b in bodies])
+        if start is not None:
+            keep &= self.times[records] >= start
+        if stop is not None:
+            keep &= self.times[records] < stop
+
+        records, body = records[keep], body[keep]
+        order = np.lexsort((body, records))
+        return records[order], body[order]
+
+    def within(self, center, radius, bodies=None, start=None, stop=None):
+        """Samples within `radius` AU of `center`, as (record indices, body indices)."""
+        cx, cy = center
+        records, body = self.in_region(cx - radius, cx + radius, cy - radius, cy + radius, bodies, start, stop)
+        offset = self.positions[records, body] - np.asarray(center, dtype=float)
+        keep = np.einsum('ik,ik->i', offset, offset) <= radius * radius
+        return records[keep], body[keep]
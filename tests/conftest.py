@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from sun_earth.config import G, M_SUN
+from sun_earth.model.system import SolarSystem
+
+
+def make_disk_system(n_bodies, seed=0, **kwargs):
+    """A Sun plus n_bodies - 1 light bodies on near-circular orbits between 0.5 and 5 AU, forces computed."""
+    rng = np.random.default_rng(seed)
+    n = n_bodies - 1
+    radius = rng.uniform(0.5, 5.0, n)
+    angle = rng.uniform(0, 2 * np.pi, n)
+    speed = np.sqrt(G * M_SUN / radius)
+
+    masses = np.concatenate([[M_SUN], rng.uniform(1e-9, 1e-6, n)])
+    positions = np.zeros((n_bodies, 2))
+    velocities = np.zeros((n_bodies, 2))
+    positions[1:] = radius[:, None] * np.column_stack([np.cos(angle), np.sin(angle)])
+    velocities[1:] = speed[:, None] * np.column_stack([-np.sin(angle), np.cos(angle)])
+
+    system = SolarSystem.from_arrays(masses, positions, velocities, **kwargs)
+    system.compute_forces()
+    return system
+
+
+@pytest.fixture
+def disk_system():
+    """make_disk_system(n_bodies, seed=0, **SolarSystem options)"""
+    return make_disk_system
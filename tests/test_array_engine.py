@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from simulation.array_engine import ArraySimulation
+from simulation.engine import Simulation
+from simulation.models import Gender
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("record_every", [1, 3])
+def test_same_history_as_the_agent_engine(seed, record_every):
+    agent = Simulation(150, 150, seed=seed, record_every=record_every)
+    array = ArraySimulation(150, 150, seed=seed, record_every=record_every)
+    agent.run(200)
+    array.run(200)
+
+    assert np.array_equal(agent.history.years, array.history.years)
+    assert np.array_equal(agent.history.to_numpy(), array.history.to_numpy())
+    assert np.array_equal(agent._age_structure(), array._age_structure())
+
+
+def test_views_match_the_agent_population():
+    agent = Simulation(80, 120, seed=9)
+    array = ArraySimulation(80, 120, seed=9)
+    agent.run(45)
+    array.run(45)
+
+    codes = {t: i for i, t in enumerate(agent.rules.types)}
+    genders = list(Gender)
+    assert array.age.tolist() == [p.age for p in agent.population]
+    assert array.person_type.tolist() == [codes[p.person_type] for p in agent.population]
+    assert array.gender.tolist() == [genders.index(p.gender) for p in agent.population]
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from sun_earth.config import G
+from sun_earth.model.barnes_hut import barnes_hut_accelerations, force_error
+from sun_earth.model.forces import direct_accelerations
+
+
+@pytest.mark.parametrize("softening", [0.0, 0.1])
+def test_theta_zero_is_the_direct_sum(disk_system, softening):
+    system = disk_system(300)
+    # Coincident bodies must not see each other unsoftened, nor themselves
+    system.positions[2] = system.positions[1]
+    exact = direct_accelerations(system.positions, system.masses, G, softening)
+    approx = barnes_hut_accelerations(system.positions, system.masses, G, theta=0.0, softening=softening)
+    assert np.allclose(approx, exact, rtol=1e-10, atol=0)
+
+
+@pytest.mark.parametrize("n_bodies, bound", [(100, 1e-2), (700, 5e-2)])
+def test_error_at_the_default_theta_is_bounded(disk_system, n_bodies, bound):
+    system = disk_system(n_bodies, force_backend="barnes_hut")
+    error = system.force_error()
+    assert error["max"] < bound
+    assert error["rms"] < bound / 10
+
+
+def test_error_shrinks_with_theta(disk_system):
+    system = disk_system(300)
+    errors = [force_error(system.positions, system.masses, G, theta)["max"] for theta in (1.0, 0.5, 0.25)]
+    assert errors[0] > errors[1] > errors[2]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from sun_earth.model.batch import BatchIntegrator, BatchSystem, sun_earth_orbits
+from sun_earth.model.integrators import Integrator
+from sun_earth.model.system import SolarSystem
+
+ECCENTRICITIES = [0.0, 0.2, 0.6]
+DT = 1 / 365
+
+
+def lone_systems(batch):
+    return [SolarSystem.from_arrays(batch.masses[b], batch.positions[b], batch.velocities[b])
+            for b in range(batch.n_systems)]
+
+
+@pytest.mark.parametrize("method", ["euler", "leapfrog"])
+def test_members_match_lone_systems_bit_for_bit(method):
+    batch = sun_earth_orbits(ECCENTRICITIES)
+    systems = lone_systems(batch)
+    trajectory, _ = BatchIntegrator.integrate(batch, 365, DT, method, record_every=73)
+
+    for b, system in enumerate(systems):
+        system.compute_forces()
+        for i in range(1, 366):
+            Integrator.step(system, DT, method)
+            if i % 73 == 0:
+                assert np.array_equal(trajectory[i // 73 - 1, b], system.positions)
+        assert np.array_equal(batch.positions[b], system.positions)
+        assert np.array_equal(batch.velocities[b], system.velocities)
+
+
+def test_energy_drift_per_member():
+    batch = sun_earth_orbits(ECCENTRICITIES)
+    systems = lone_systems(batch)
+    start = [system.get_total_energy() for system in systems]
+    assert np.allclose(batch.get_total_energy(), start, rtol=1e-14, atol=0)
+
+    _, drift = BatchIntegrator.integrate(batch, 365, DT)
+    assert drift.shape == (3,)
+    expected = [abs(energy / e0 - 1) for energy, e0 in zip(batch.get_total_energy(), start)]
+    assert np.allclose(drift, expected, rtol=1e-6, atol=1e-15)
+    # Leapfrog over a year: tiny on the circle, growing with the eccentricity
+    assert drift[0] < 1e-10
+    assert drift[0] < drift[1] < drift[2] < 1e-3
+
+    _, euler_drift = BatchIntegrator.integrate(sun_earth_orbits(ECCENTRICITIES), 365, DT, "euler")
+    assert np.all(euler_drift > 10 * drift)
+
+
+def test_softened_batch_energy_matches_solar_system():
+    batch = sun_earth_orbits(ECCENTRICITIES)
+    softened = BatchSystem(batch.masses, batch.positions, batch.velocities, softening=0.05)
+    systems = [SolarSystem.from_arrays(s.masses, s.positions, s.velocities, softening=0.05)
+               for s in lone_systems(batch)]
+    assert np.allclose(softened.get_total_energy(), [s.get_total_energy() for s in systems], rtol=1e-14, atol=0)
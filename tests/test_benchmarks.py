@@ -0,0 +1,20 @@
+import numpy as np
+
+from just_for_fun.benchmarks.suites import FORCE_BACKENDS, nbody_cases
+
+
+def test_nbody_cases_run_with_the_labelled_backend():
+    cases = nbody_cases(["leapfrog", "wisdom_holman"], FORCE_BACKENDS, [100], [3])
+    assert [case.name for case in cases] == [f"{method}/{backend}" for method in ("leapfrog", "wisdom_holman")
+                                             for backend in FORCE_BACKENDS]
+
+    results = {}
+    for case in cases:
+        system = case.setup()
+        assert case.name.endswith("/" + system.force_backend)
+        case.run(system)
+        results[case.name] = system.positions.copy()
+
+    # Barnes-Hut (theta = 0.5) is not the direct sum, so each backend must leave its trace
+    for method in ("leapfrog", "wisdom_holman"):
+        assert not np.array_equal(results[f"{method}/direct"], results[f"{method}/barnes_hut"])
@@ -0,0 +1,48 @@
+import numpy as np
+
+from sun_earth.config import M_EARTH
+from sun_earth.model.body import Body
+from sun_earth.model.system import SolarSystem
+
+
+def make_bodies():
+    sun = Body("Sun", 1.0, [0.0, 0.0], [0.0, 0.0])
+    earth = Body("Earth", M_EARTH, [1.0, 0.0], [0.0, 6.28])
+    return sun, earth
+
+
+def test_detached_mass_is_a_float():
+    _, earth = make_bodies()
+    assert type(earth.mass) is float
+    earth.mass = np.float32(2.0)
+    assert type(earth.mass) is float and earth.mass == 2.0
+    assert isinstance(earth.position, np.ndarray) and earth.position.shape == (2,)
+
+
+def test_attached_state_writes_through():
+    sun, earth = make_bodies()
+    system = SolarSystem([sun, earth])
+    earth.position += [0.5, 0.0]
+    earth.mass = 2 * M_EARTH
+    assert np.array_equal(system.positions[1], [1.5, 0.0])
+    assert system.masses[1] == 2 * M_EARTH
+    assert isinstance(earth.mass, float)
+
+
+def test_handles_from_before_add_body_are_detached():
+    sun, earth = make_bodies()
+    system = SolarSystem([sun])
+    position = sun.position
+    positions = system.positions
+    system.add_body(earth)
+
+    # The old handles are copies now: writes no longer reach the system
+    assert not np.shares_memory(position, system.positions)
+    assert not np.shares_memory(positions, system.positions)
+    position += 1.0
+    assert np.array_equal(system.positions[0], [0.0, 0.0])
+
+    # Reading the attribute again gives a live view
+    sun.position += 1.0
+    assert np.array_equal(system.positions[0], [1.0, 1.0])
+    assert np.array_equal(earth.position, [1.0, 0.0])
@@ -0,0 +1,71 @@
+from enum import Enum, auto
+
+import numpy as np
+import pytest
+
+from simulation.array_engine import ArraySimulation
+from simulation.breeding import BreedingRules
+from simulation.engine import Simulation
+from simulation.models import PersonType
+from simulation.stopping import POPULATION_CAP, StopCriteria
+
+
+class Lineage(Enum):
+    HYBRID = auto()  # Not last, so codes differ from PersonType's
+    ORDINARY = auto()
+    BIO = auto()
+
+
+RULES = BreedingRules.from_dict({
+    (Lineage.ORDINARY, Lineage.ORDINARY): Lineage.ORDINARY,
+    (Lineage.ORDINARY, Lineage.BIO): Lineage.HYBRID,
+    (Lineage.BIO, Lineage.BIO): Lineage.BIO,
+    (Lineage.HYBRID, Lineage.HYBRID): Lineage.HYBRID,
+    (Lineage.HYBRID, Lineage.ORDINARY): Lineage.ORDINARY,
+}, types=tuple(Lineage))
+
+
+def test_code_matches_person_types_by_name():
+    assert RULES.code(PersonType.ORDINARY) == RULES.code(Lineage.ORDINARY) == 1
+    assert RULES.code(PersonType.BIO) == 2
+    with pytest.raises(ValueError):
+        BreedingRules.from_dict({}, types=(Lineage.HYBRID, Lineage.BIO)).code(PersonType.ORDINARY)
+
+
+@pytest.mark.parametrize("seed", [0, 3])
+def test_third_type_in_both_agent_engines(seed):
+    agent = Simulation(200, 200, seed=seed, rules=RULES)
+    array = ArraySimulation(200, 200, seed=seed, rules=RULES)
+    agent.run(120)
+    array.run(120)
+
+    assert np.array_equal(agent.history.to_numpy(), array.history.to_numpy())
+    assert agent.history[-1]["total"] == len(agent.population) == len(array)
+    hybrids = sum(p.person_type is Lineage.HYBRID for p in agent.population)
+    last = agent.history[-1]
+    assert hybrids > 0
+    assert last["ordinary"] + last["bio"] + hybrids == last["total"]
+
+    assert agent._age_structure().sum() == array._age_structure().sum() == last["total"]
+    assert np.array_equal(agent._age_structure(), array._age_structure())
+
+
+@pytest.mark.parametrize("engine", [Simulation, ArraySimulation])
+def test_third_type_survives_a_checkpoint(engine, tmp_path):
+    path = str(tmp_path / "sim.npz")
+    straight = engine(100, 100, seed=5, rules=RULES)
+    straight.run(80)
+
+    first = engine(100, 100, seed=5, rules=RULES)
+    first.run(40, checkpoint_every=40, checkpoint_path=path)
+    resumed = engine.from_checkpoint(path)
+    assert resumed.rules.types == tuple(Lineage)
+    resumed.run(40)
+    assert np.array_equal(resumed.history.to_numpy(), straight.history.to_numpy())
+
+
+def test_population_cap_counts_every_type():
+    sim = Simulation(200, 200, seed=1, rules=RULES)
+    assert sim.run(200, stop=StopCriteria(extinction=False, max_population=600)) == POPULATION_CAP
+    last = sim.history[-1]
+    assert last["ordinary"] + last["bio"] <= 600 < last["total"]
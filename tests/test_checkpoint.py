@@ -0,0 +1,64 @@
+from functools import partial
+
+import numpy as np
+import pytest
+
+from simulation.array_engine import ArraySimulation
+from simulation.engine import Simulation
+from simulation.matrix_engine import MatrixSimulation
+from sun_earth.model.integrators import Integrator
+from sun_earth.model.system import SolarSystem
+
+ENGINES = {
+    "agent": partial(Simulation, seed=7),
+    "array": partial(ArraySimulation, seed=7),
+    "matrix": MatrixSimulation,
+    "matrix-ring": partial(MatrixSimulation, ring_buffer=True),
+}
+
+
+@pytest.mark.parametrize("name", list(ENGINES))
+def test_population_resume_is_bit_for_bit(name, tmp_path):
+    path = str(tmp_path / "sim.npz")
+    make = ENGINES[name]
+    straight = make(60, 60, record_every=3)
+    straight.run(90)
+
+    first = make(60, 60, record_every=3)
+    first.run(45, checkpoint_every=45, checkpoint_path=path)
+    resumed = type(first).from_checkpoint(path)
+    resumed.run(45)
+
+    assert resumed.year == straight.year
+    assert np.array_equal(resumed.history.years, straight.history.years)
+    assert np.array_equal(resumed.history.to_numpy(), straight.history.to_numpy())
+
+
+@pytest.mark.parametrize("method", ["leapfrog", "rk45", "wisdom_holman"])
+def test_solar_system_resume_is_bit_for_bit(method, tmp_path, disk_system):
+    path = str(tmp_path / "system.npz")
+    straight = disk_system(8)
+    Integrator.run(straight, 40, 0.01, method)
+
+    first = disk_system(8)
+    Integrator.run(first, 20, 0.01, method, checkpoint_every=20, checkpoint_path=path)
+    resumed = SolarSystem.from_checkpoint(path)
+    Integrator.run(resumed, 20, 0.01, method)
+
+    assert resumed.time == straight.time
+    assert np.array_equal(resumed.positions, straight.positions)
+    assert np.array_equal(resumed.velocities, straight.velocities)
+    assert resumed.integrator_state == straight.integrator_state
+
+
+def test_checkpoints_are_checked_against_the_model(tmp_path, disk_system):
+    population_path, system_path = str(tmp_path / "sim.npz"), str(tmp_path / "system.npz")
+    MatrixSimulation().save_checkpoint(population_path)
+    disk_system(4).save_checkpoint(system_path)
+
+    with pytest.raises(ValueError, match="MatrixSimulation"):
+        SolarSystem.from_checkpoint(population_path)
+    with pytest.raises(ValueError, match="SolarSystem"):
+        MatrixSimulation.from_checkpoint(system_path)
+    with pytest.raises(ValueError, match="MatrixSimulation"):
+        Simulation.from_checkpoint(population_path)
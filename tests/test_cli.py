@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from simulation.cli import main, write_history
+from simulation.history import History
+
+
+def read_csv(path):
+    return np.loadtxt(path, delimiter=",", skiprows=1)
+
+
+def test_resume_continues_the_run(tmp_path):
+    straight, resumed, ckpt = (str(tmp_path / name) for name in ("straight.csv", "resumed.csv", "run.npz"))
+    main(["--engine", "array", "--seed", "4", "--years", "60", "--output", straight])
+    main(["--engine", "array", "--seed", "4", "--years", "30", "--checkpoint", ckpt, "--checkpoint-every", "30"])
+    main(["--engine", "array", "--years", "30", "--resume", ckpt, "--profile", "--output", resumed])
+    assert np.array_equal(read_csv(resumed), read_csv(straight))
+
+
+# Also when given their default value: they would still be ignored
+@pytest.mark.parametrize("option", [["--seed", "1"], ["--record-every", "5"], ["--bio", "10"],
+                                    ["--ordinary", "100"], ["--record-every=1"]])
+def test_resume_rejects_settings_from_the_checkpoint(option, tmp_path, capsys):
+    ckpt = str(tmp_path / "run.npz")
+    main(["--engine", "array", "--years", "5", "--checkpoint", ckpt, "--checkpoint-every", "5"])
+    with pytest.raises(SystemExit):
+        main(["--engine", "array", "--years", "5", "--resume", ckpt] + option)
+    assert option[0].split("=")[0] in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("options, message", [
+    (["--extrapolate"], "--extrapolate needs --steady-state"),
+    (["--engine", "matrix", "--seed", "3"], "--seed only applies"),
+    (["--engine", "matrix-ring", "--seed", "3"], "--seed only applies"),
+])
+def test_rejects_options_that_would_be_ignored(options, message, capsys):
+    with pytest.raises(SystemExit):
+        main(["--years", "5"] + options)
+    assert message in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("engine", ["agent", "matrix-ring"])
+def test_resume_from_another_engine_is_a_usage_error(engine, tmp_path, capsys):
+    ckpt = str(tmp_path / "run.npz")
+    main(["--engine", "matrix", "--years", "5", "--checkpoint", ckpt, "--checkpoint-every", "5"])
+    with pytest.raises(SystemExit):
+        main(["--engine", engine, "--years", "5", "--resume", ckpt])
+    assert "Checkpoint is for" in capsys.readouterr().err
+
+
+def test_extrapolated_years_are_written(tmp_path, capsys):
+    full, fast = str(tmp_path / "full.csv"), str(tmp_path / "fast.csv")
+    main(["--years", "3000", "--output", full])
+    main(["--years", "3000", "--steady-state", "--extrapolate", "--output", fast])
+    assert "Extrapolated to year 3000" in capsys.readouterr().out
+    assert np.array_equal(read_csv(fast), read_csv(full))
+
+
+def test_write_history_keeps_fractions(tmp_path):
+    path = str(tmp_path / "history.csv")
+    history = History(dtype=np.float64)
+    history.record(1, 0.5, 1.25, 1.75)
+    write_history(history, path)
+    assert np.array_equal(read_csv(path), [1, 0.5, 1.25, 1.75])
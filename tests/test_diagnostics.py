@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from sun_earth.config import G, M_EARTH
+from sun_earth.model.integrators import Integrator
+from sun_earth.model.system import SolarSystem
+
+DT = 1 / 365
+
+
+def circular_orbit(**kwargs):
+    """Sun and Earth on a circular orbit of 1 AU about their barycentre."""
+    total = 1.0 + M_EARTH
+    speed = np.sqrt(G * total)
+    positions = np.array([[-M_EARTH / total, 0.0], [1.0 / total, 0.0]])
+    velocities = np.array([[0.0, -M_EARTH / total * speed], [0.0, speed / total]])
+    return SolarSystem.from_arrays([1.0, M_EARTH], positions, velocities, names=["Sun", "Earth"], **kwargs)
+
+
+def angular_momentum(system):
+    mv = system.masses[:, None] * system.velocities
+    return float(np.sum(system.positions[:, 0] * mv[:, 1] - system.positions[:, 1] * mv[:, 0]))
+
+
+@pytest.mark.parametrize("softening", [0.0, 0.1])
+def test_leapfrog_conserves_the_invariants_over_a_period(softening):
+    system = circular_orbit(diagnostics_every=5, softening=softening)
+    system.compute_forces()
+    Integrator.run(system, 365, DT)
+    diagnostics = system.diagnostics
+
+    # The starting state plus every 5th step
+    assert len(diagnostics) == 1 + 365 // 5
+    assert diagnostics['time'][-1] == pytest.approx(365 // 5 * 5 * DT)
+    assert diagnostics.energy_drift()[0] == 0.0
+    # Leapfrog's energy error oscillates within the orbit and returns to ~0 after a period
+    drift = diagnostics.energy_drift()
+    assert drift.max() < 1e-5
+    assert drift[-1] < 1e-7
+    assert np.allclose(diagnostics['angular_momentum'], diagnostics['angular_momentum'][0], rtol=1e-12, atol=0)
+    assert np.abs(diagnostics['momentum_x']).max() < 1e-15
+    assert np.abs(diagnostics['momentum_y']).max() < 1e-15
+
+
+@pytest.mark.parametrize("softening", [0.0, 0.1])
+@pytest.mark.parametrize("method", ["leapfrog", "rk45"])
+def test_recorded_values_match_the_system(softening, method):
+    system = circular_orbit(diagnostics_every=1, softening=softening)
+    system.positions[1] *= 1.1  # Eccentric, so the energy terms change over the run
+    system.compute_forces()
+    for _ in range(20):
+        Integrator.step(system, DT, method)
+        row = system.diagnostics.to_numpy()[-1]
+        kinetic = 0.5 * float(np.sum(system.masses[:, None] * system.velocities ** 2))
+        assert row[0] == system.time
+        assert row[1] == pytest.approx(kinetic, rel=1e-14)
+        # The potential comes from the force pass for leapfrog and from a separate pass for RK45
+        assert row[3] == pytest.approx(system.get_total_energy(), rel=1e-13)
+        assert row[6] == pytest.approx(angular_momentum(system), rel=1e-13)
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from simulation.ensemble import iter_ensemble, replica_seeds, run_ensemble
+
+
+@pytest.mark.parametrize("engine", ["agent", "array"])
+def test_results_do_not_depend_on_the_number_of_workers(engine):
+    serial = run_ensemble(12, 45, 30, 30, seed=7, engine=engine, workers=1)
+    parallel = run_ensemble(12, 45, 30, 30, seed=7, engine=engine, workers=3)
+    assert np.array_equal(serial.histories, parallel.histories)
+    # Replicas are independent runs, not copies of one
+    assert len({history.tobytes() for history in serial.histories}) > 1
+
+
+def test_every_replica_is_yielded_once():
+    indices = [k for k, _ in iter_ensemble(10, 25, 20, 20, seed=1, workers=2)]
+    assert sorted(indices) == list(range(10))
+
+
+def test_replica_seeds_do_not_depend_on_the_ensemble_size():
+    assert replica_seeds(5, seed=3) == replica_seeds(8, seed=3)[:5]
+    assert replica_seeds(5, seed=3) != replica_seeds(5, seed=4)
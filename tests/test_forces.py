@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from sun_earth.config import G
+from sun_earth.model import forces
+from sun_earth.model.forces import (direct_accelerations, direct_accelerations_on, dynamical_times,
+                                    potential_energy)
+
+
+def bodies(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-5.0, 5.0, (n, 2)), rng.uniform(1e-6, 1e-3, n)
+
+
+def pairwise(positions, masses, softening=0.0):
+    """Reference: the plain double loop over pairs. Returns (accelerations, potentials, dynamical times)."""
+    n = len(positions)
+    acc, potentials, times = np.zeros((n, 2)), np.zeros(n), np.full(n, np.inf)
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                continue
+            r = positions[j] - positions[i]
+            dist = np.sqrt(r @ r + softening**2)
+            acc[i] += G * masses[j] * r / dist**3
+            potentials[i] -= G * masses[j] / dist
+            times[i] = min(times[i], np.sqrt((r @ r)**1.5 / (G * (masses[i] + masses[j]))))
+    return acc, potentials, times
+
+
+@pytest.fixture(params=["small", "tiled"])
+def n_bodies(request, monkeypatch):
+    """Body counts for the single-block path and, with small tiles, the tiled path with a ragged last tile."""
+    if request.param == "small":
+        return 20
+    monkeypatch.setattr(forces, "TILE", 16)
+    return forces.SMALL_N + 7
+
+
+@pytest.mark.parametrize("softening", [0.0, 0.05])
+def test_direct_sum_matches_the_pair_loop(n_bodies, softening):
+    positions, masses = bodies(n_bodies)
+    expected_acc, expected_potentials, _ = pairwise(positions, masses, softening)
+
+    potentials = np.empty(n_bodies)
+    acc = direct_accelerations(positions, masses, G, softening, potentials=potentials)
+    assert np.allclose(acc, expected_acc, rtol=1e-12, atol=0)
+    assert np.allclose(potentials, expected_potentials, rtol=1e-12, atol=0)
+    assert potential_energy(positions, masses, G, softening) == pytest.approx(0.5 * masses @ expected_potentials,
+                                                                            rel=1e-12)
+
+    targets = np.array([0, 3, n_bodies - 1])
+    assert np.allclose(direct_accelerations_on(targets, positions, masses, G, softening), expected_acc[targets],
+                       rtol=1e-12, atol=0)
+
+
+def test_dynamical_times_match_the_pair_loop(n_bodies):
+    positions, masses = bodies(n_bodies)
+    _, _, expected = pairwise(positions, masses)
+    assert np.allclose(dynamical_times(positions, masses, G), expected, rtol=1e-12, atol=0)
+    targets = np.array([1, n_bodies - 2])
+    assert np.allclose(dynamical_times(positions, masses, G, targets), expected[targets], rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize("softening", [0.0, 0.5])
+def test_force_is_minus_the_gradient_of_the_potential_energy(softening):
+    # Close pairs, so the softening changes the forces noticeably
+    positions, masses = bodies(10, seed=1)
+    positions *= 0.2
+    forces_on_bodies = masses[:, None] * direct_accelerations(positions, masses, G, softening)
+
+    h = 1e-6
+    gradient = np.zeros_like(positions)
+    for index in np.ndindex(positions.shape):
+        shifted = positions.copy()
+        shifted[index] += h
+        upper = potential_energy(shifted, masses, G, softening)
+        shifted[index] -= 2 * h
+        gradient[index] = (upper - potential_energy(shifted, masses, G, softening)) / (2 * h)
+    assert np.allclose(forces_on_bodies, -gradient, rtol=1e-6, atol=1e-12 * np.abs(forces_on_bodies).max())
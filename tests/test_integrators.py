@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+
+from sun_earth.config import G, M_EARTH
+from sun_earth.model.integrators import Integrator
+from sun_earth.model.kepler import KeplerOrbit
+from sun_earth.model.system import SolarSystem
+
+# Jupiter, roughly: 1e-3 solar masses at 5.2 AU
+M_JUPITER = 9.55e-4
+
+
+def two_body(e=0.3, **kwargs):
+    """Sun at rest at the origin, Earth at perihelion of an orbit with a = 1 AU."""
+    mu = G * (1.0 + M_EARTH)
+    r = 1.0 - e
+    speed = np.sqrt(mu * (1.0 + e) / r)
+    return SolarSystem.from_arrays([1.0, M_EARTH], [[0.0, 0.0], [r, 0.0]], [[0.0, 0.0], [0.0, speed]],
+                                   **kwargs)
+
+
+def three_body(**kwargs):
+    system = two_body(e=0.05, **kwargs)
+    masses = np.append(system.masses, M_JUPITER)
+    positions = np.vstack([system.positions, [[-5.2, 0.0]]])
+    velocities = np.vstack([system.velocities, [[0.0, -np.sqrt(G / 5.2)]]])
+    return SolarSystem.from_arrays(masses, positions, velocities, **kwargs)
+
+
+def run(system, steps, dt, method):
+    system.compute_forces()
+    Integrator.run(system, steps, dt, method)
+    return system
+
+
+def orbit_error(dt, method, years=10):
+    system = two_body()
+    orbit = KeplerOrbit.from_bodies(system.bodies[0], system.bodies[1], G)
+    run(system, int(round(years / dt)), dt, method)
+    position, _ = orbit.state_at(system.time)
+    return np.abs(system.positions[1] - system.positions[0] - position).max()
+
+
+def test_kepler_step_is_exact_for_any_dt():
+    # A tenth of a year per step: far too coarse for leapfrog on e=0.3
+    assert orbit_error(0.1, "kepler") < 1e-9
+
+
+def test_wisdom_holman_two_body_error_is_second_order():
+    # Only the central-body drift is split off, an O(m_earth / m_sun * dt^2) error
+    coarse = orbit_error(0.1, "wisdom_holman")
+    assert coarse < 1e-4
+    assert orbit_error(0.01, "wisdom_holman") < coarse / 50
+
+
+def test_wisdom_holman_conserves_energy_with_a_perturber():
+    system = three_body()
+    start = system.get_total_energy()
+    run(system, 2000, 0.01, "wisdom_holman")
+    assert abs(system.get_total_energy() / start - 1) < 1e-6
+
+
+def test_wisdom_holman_kicks_use_the_force_backend():
+    direct = run(three_body(), 200, 0.01, "wisdom_holman")
+    # theta = 0 opens every node, i.e. Barnes-Hut reduces to the direct sum
+    exact_tree = run(three_body(force_backend="barnes_hut", theta=0.0), 200, 0.01, "wisdom_holman")
+    assert np.allclose(exact_tree.positions, direct.positions, rtol=0, atol=1e-12)
+
+    # The system's softening reaches the kicks too
+    softened = run(three_body(softening=1.0), 200, 0.01, "wisdom_holman")
+    assert not np.allclose(softened.positions, direct.positions, rtol=0, atol=1e-9)
+
+
+def test_yoshida4_error_is_fourth_order():
+    errors = [orbit_error(dt, "yoshida4", years=2) for dt in (0.02, 0.01, 0.005)]
+    # Halving dt divides the error by 2^4 = 16
+    for coarse, fine in zip(errors, errors[1:]):
+        assert 12 < coarse / fine < 20
+
+
+@pytest.mark.parametrize("method, passes", [("euler", 1), ("leapfrog", 1), ("yoshida4", 3), ("kepler", 1)])
+def test_force_evaluations_per_step(method, passes):
+    system = run(two_body(), 0, 0.01, method)
+    start = system.force_evaluations
+    Integrator.run(system, 10, 0.01, method)
+    assert system.force_evaluations - start == 10 * passes
+
+
+def test_wisdom_holman_kicks_cost_a_fraction_of_a_pass():
+    system = run(three_body(), 0, 0.01, "wisdom_holman")
+    start = system.force_evaluations
+    Integrator.run(system, 10, 0.01, "wisdom_holman")
+    # Two kicks per step among 2 of the 3 bodies
+    assert system.force_evaluations - start == pytest.approx(10 * 2 * 2 / 3)
+
+
+def rk45_step(rtol=1e-9, atol=1e-12, dt=0.1):
+    """One rk45 step from perihelion of an e=0.6 orbit: (error, error / tolerance, force evaluations)."""
+    system = run(two_body(e=0.6), 0, dt, "rk45")
+    orbit = KeplerOrbit.from_bodies(system.bodies[0], system.bodies[1], G)
+    start = system.force_evaluations
+    Integrator.step(system, dt, "rk45", rtol=rtol, atol=atol)
+    position, velocity = orbit.state_at(dt)
+    error = np.abs(np.concatenate([system.positions[1] - system.positions[0] - position,
+                                   system.velocities[1] - system.velocities[0] - velocity]))
+    tolerance = atol + rtol * np.abs(np.concatenate([position, velocity]))
+    return error.max(), (error / tolerance).max(), system.force_evaluations - start
+
+
+def test_rk45_keeps_the_step_error_within_tolerance():
+    for rtol in (1e-6, 1e-9):
+        _, relative_error, evaluations = rk45_step(rtol=rtol)
+        # Many accepted sub-steps, each within tolerance; their errors add up to a few tolerances
+        assert relative_error < 10
+        assert evaluations % 6 == 0
+
+
+def test_rk45_redoes_rejected_steps():
+    # A tolerance that accepts anything: a single Dormand-Prince step of the full dt, badly off
+    sloppy_error, _, sloppy_evaluations = rk45_step(rtol=1e6, atol=1e6)
+    assert sloppy_evaluations == 6
+    assert sloppy_error > 1e-3
+
+    # With the default tolerance that first try is rejected and redone with smaller sub-steps
+    error, _, evaluations = rk45_step()
+    assert evaluations > 6
+    assert error < 1e-7
+
+
+def test_adaptive_leapfrog_lands_on_the_step_end():
+    # One big step from perihelion of an e=0.9 orbit takes hundreds of block sub-steps
+    system = run(two_body(e=0.9), 0, 0.05, "adaptive_leapfrog")
+    orbit = KeplerOrbit.from_bodies(system.bodies[0], system.bodies[1], G)
+    start = system.force_evaluations
+    Integrator.step(system, 0.05, "adaptive_leapfrog")
+    assert system.time == 0.05
+    assert system.force_evaluations - start > 10
+    position, _ = orbit.state_at(0.05)
+    assert np.abs(system.positions[1] - system.positions[0] - position).max() < 1e-4
+
+
+def test_adaptive_leapfrog_bounds_the_energy_drift():
+    adaptive = two_body(e=0.9)
+    fixed = two_body(e=0.9)
+    start = adaptive.get_total_energy()
+    run(adaptive, 100, 0.05, "adaptive_leapfrog")
+    run(fixed, 100, 0.05, "leapfrog")
+    assert abs(adaptive.get_total_energy() / start - 1) < 1e-4
+    assert abs(fixed.get_total_energy() / start - 1) > 1
+
+
+def test_per_body_block_steps_save_force_evaluations(disk_system):
+    evaluations = {}
+    for criterion in ("per_body", "global"):
+        system = disk_system(8)
+        # One body close in, with a dynamical time far below everyone else's
+        system.positions[1] = [0.05, 0.0]
+        system.velocities[1] = [0.0, np.sqrt(G / 0.05)]
+        system.compute_forces()
+        start = (system.force_evaluations, system.get_total_energy())
+        Integrator.run(system, 5, 0.01, "adaptive_leapfrog", criterion=criterion)
+        evaluations[criterion] = system.force_evaluations - start[0]
+        assert abs(system.get_total_energy() / start[1] - 1) < 1e-8
+    assert evaluations["per_body"] < evaluations["global"] / 3
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from simulation.history import whole_counts
+from simulation.matrix_engine import MatrixSimulation
+
+
+@pytest.mark.parametrize("initial", [(100, 100), (37, 48), (12345, 999)])
+def test_ring_buffer_matches_plain_mode(initial):
+    plain = MatrixSimulation(*initial)
+    ring = MatrixSimulation(*initial, ring_buffer=True)
+    plain.run(1000)
+    ring.run(1000)
+
+    assert np.array_equal(plain.population, ring.population)
+    assert np.array_equal(plain.history.to_numpy(), ring.history.to_numpy())
+
+
+def test_whole_counts_absorbs_rounding_noise():
+    assert list(whole_counts([399.99999999999994, 400.00000000000006, 1.5, -5e-15])) == [400, 400, 1, 0]
+
+
+@pytest.mark.parametrize("initial", [(100, 100), (100, 40), (0, 100)])
+@pytest.mark.parametrize("years", [250, 3000])
+@pytest.mark.parametrize("ring_buffer", [False, True])
+def test_fast_forward_lands_where_stepping_does(initial, years, ring_buffer):
+    jumped = MatrixSimulation(*initial, ring_buffer=ring_buffer)
+    stepped = MatrixSimulation(*initial, ring_buffer=ring_buffer)
+    skipped = jumped.fast_forward(years)
+    stepped.run(years)
+
+    assert skipped > 0
+    assert jumped.year == stepped.year == years
+    assert np.allclose(jumped.population, stepped.population, rtol=1e-9, atol=1e-9)
+    assert jumped.history[-1] == stepped.history[-1]
+
+
+@pytest.mark.parametrize("years", [7, 1234])
+def test_fast_forward_records_the_landing_year_off_the_stride(years):
+    # 7 years are only stepped (both types alive), 1234 end with a jump
+    jumped = MatrixSimulation(100, 40, record_every=5)
+    stepped = MatrixSimulation(100, 40)
+    skipped = jumped.fast_forward(years)
+    stepped.run(years)
+
+    # Stepped years on the stride, then the landing year
+    assert list(jumped.history.years) == list(range(5, years - skipped + 1, 5)) + [years]
+    assert jumped.history[-1] == stepped.history[-1]
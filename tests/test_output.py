@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+from sun_earth.model.integrators import Integrator
+from sun_earth.model.output import TrajectoryReader, TrajectoryWriter
+
+DT = 0.01
+
+
+def stream(system, path, steps, **options):
+    """Run `steps` leapfrog steps streaming to `path`; returns the expected (times, positions, velocities)."""
+    expected = ([], [], [])
+    every = options.get("record_every", 1)
+    with system.stream_to(path, **options):
+        for i in range(1, steps + 1):
+            Integrator.step(system, DT)
+            if i % every == 0:
+                for rows, value in zip(expected, (system.time, system.positions, system.velocities)):
+                    rows.append(np.copy(value))
+    return tuple(np.array(rows) for rows in expected)
+
+
+def test_round_trip_with_partial_last_chunk(tmp_path, disk_system):
+    path = str(tmp_path / "run")
+    times, positions, velocities = stream(disk_system(5), path, 31, chunk_size=7, record_every=2)
+    reader = TrajectoryReader(path)
+
+    assert len(reader) == len(times) == 15
+    assert reader.meta["n_chunks"] == 3
+    # The last chunk is trimmed to its filled records on close
+    assert np.load(os.path.join(path, "positions_00002.npy")).shape == (1, 5, 2)
+    assert np.array_equal(reader.times, times)
+    assert np.array_equal(reader.positions(), positions)
+    assert np.array_equal(reader.velocities(), velocities)
+    assert reader.energy().shape == (15,)
+
+
+def test_time_window_and_body_selection(tmp_path, disk_system):
+    path = str(tmp_path / "run")
+    system = disk_system(4)
+    names = [body.name for body in system.bodies]
+    times, positions, _ = stream(system, path, 40, chunk_size=6)
+    reader = TrajectoryReader(path)
+
+    t0, t1 = times[8], times[23]
+    window = (times >= t0) & (times < t1)
+    assert np.array_equal(reader.positions(t0, t1), positions[window])
+    assert np.array_equal(reader.positions(t0, t1, bodies=[names[3], 1]), positions[window][:, [3, 1]])
+    assert np.array_equal(reader.body(names[2], stop=t1), positions[times < t1, 2])
+    assert reader.positions(t1, t0).shape == (0, 4, 2)
+
+
+def test_empty_writer(tmp_path):
+    path = str(tmp_path / "run")
+    TrajectoryWriter(path, ["Sun", "Earth", "Moon"], [1.0, 3e-6, 3.7e-8], chunk_size=4).close()
+    reader = TrajectoryReader(path)
+
+    assert len(reader) == 0
+    assert reader.times.shape == (0,)
+    assert reader.positions().shape == (0, 3, 2)
+    assert reader.positions(bodies=["Earth"]).shape == (0, 1, 2)
+    assert reader.energy().shape == (0,)
+
+
+def test_closed_writer_rejects_appends(tmp_path, disk_system):
+    system = disk_system(3)
+    writer = system.stream_to(str(tmp_path / "run"))
+    writer.close()
+    with pytest.raises(ValueError):
+        writer.append(system, DT)
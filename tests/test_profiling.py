@@ -0,0 +1,54 @@
+import tracemalloc
+
+import pytest
+
+from just_for_fun.profiling import PhaseProfiler
+from simulation.array_engine import ArraySimulation
+from simulation.engine import Simulation
+from simulation.matrix_engine import MatrixSimulation
+from sun_earth.model.integrators import Integrator
+
+
+@pytest.mark.parametrize("method", ["euler", "leapfrog", "yoshida4", "rk45", "adaptive_leapfrog",
+                                    "kepler", "wisdom_holman"])
+def test_every_method_times_its_force_passes(method, disk_system):
+    system = disk_system(2 if method == "kepler" else 16, profile=True)
+    Integrator.run(system, 5, 1 / 365, method)
+    assert "forces" in system.profiler.seconds
+    assert system.profiler.calls["history"] == 5
+
+
+@pytest.mark.parametrize("engine", [Simulation, ArraySimulation, MatrixSimulation])
+def test_engines_accept_an_allocation_profiler(engine):
+    profiler = PhaseProfiler(allocations=True)
+    sim = engine(50, 50, profile=profiler)
+    try:
+        sim.run(30)
+    finally:
+        profiler.stop()
+    assert sim.profiler is profiler
+    assert set(profiler.alloc_bytes) == set(profiler.seconds) != set()
+
+
+def test_solar_system_accepts_an_allocation_profiler(disk_system):
+    profiler = PhaseProfiler(allocations=True)
+    system = disk_system(16, profile=profiler)
+    try:
+        Integrator.run(system, 5, 1 / 365, "wisdom_holman")
+    finally:
+        profiler.stop()
+    assert {"forces", "kick", "drift", "kepler"} <= set(profiler.alloc_bytes)
+
+
+def test_stop_leaves_tracing_it_did_not_start():
+    tracemalloc.start()
+    try:
+        PhaseProfiler(allocations=True).stop()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+    profiler = PhaseProfiler(allocations=True)
+    assert tracemalloc.is_tracing()
+    profiler.stop()
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,95 @@
+from enum import Enum, auto
+
+import numpy as np
+import pytest
+
+from simulation.array_engine import ArraySimulation
+from simulation.breeding import BreedingRules, DEFAULT_RULES
+from simulation.ensemble import run_ensemble
+from simulation.matrix_engine import MatrixSimulation
+from simulation.stochastic_engine import StochasticMatrixSimulation
+
+
+def mean_field_gap(initial, replicas=500, generations=3):
+    """
+    Largest relative difference between the replica mean and MatrixSimulation, one value per generation.
+    MatrixSimulation breeds before aging, so its generations are 21 years apart instead of 20.
+    """
+    stochastic = StochasticMatrixSimulation(replicas, *initial, seed=1)
+    stochastic.run(20 * generations)
+    matrix = MatrixSimulation(*initial)
+    matrix.run(MatrixSimulation.generation * generations)
+    mean = stochastic.history.to_numpy().mean(axis=1)
+    expected = matrix.history.to_numpy()
+    return np.array([np.abs(mean[20 * g - 1] / expected[MatrixSimulation.generation * g - 1] - 1).max()
+                     for g in range(1, generations + 1)])
+
+
+@pytest.mark.parametrize("ratio", [1, 3])
+def test_replica_mean_tracks_the_matrix_engine(ratio):
+    # The mean-field model pairs exactly half of each type; the random gender split pairs
+    # slightly fewer on average, a relative bias of order 1 / sqrt(population)
+    large = mean_field_gap((100_000, 100_000 // ratio))
+    small = mean_field_gap((1000, 1000 // ratio))
+    assert large.max() < 5e-3
+    assert np.all(large < small / 5)
+
+
+def test_replica_statistics_match_the_agent_ensemble():
+    years = 65
+    agents = run_ensemble(300, years, seed=2, engine="array", workers=1).histories
+    stochastic = StochasticMatrixSimulation(3000, seed=3)
+    stochastic.run(years)
+    replicas = stochastic.history.to_numpy().transpose(1, 0, 2)
+
+    # Each generation, each of ordinary / bio / total
+    for year in (20, 40, 60, 65):
+        a, s = agents[:, year - 1], replicas[:, year - 1]
+        standard_error = np.sqrt(a.var(axis=0) / len(a) + s.var(axis=0) / len(s))
+        assert np.all(np.abs(a.mean(axis=0) - s.mean(axis=0)) < 4 * standard_error)
+        # The spread agrees too; the sample standard deviation of 300 runs is good to ~4%
+        assert np.allclose(a.std(axis=0), s.std(axis=0), rtol=0.2)
+
+
+class Lineage(Enum):
+    HYBRID = auto()
+    ORDINARY = auto()
+    BIO = auto()
+
+
+# Mixed couples of either kind have hybrid children
+HYBRID_RULES = BreedingRules.from_dict({
+    (Lineage.ORDINARY, Lineage.ORDINARY): Lineage.ORDINARY,
+    (Lineage.ORDINARY, Lineage.BIO): Lineage.HYBRID,
+    (Lineage.BIO, Lineage.ORDINARY): Lineage.HYBRID,
+    (Lineage.BIO, Lineage.BIO): Lineage.BIO,
+    (Lineage.HYBRID, Lineage.HYBRID): Lineage.HYBRID,
+}, types=tuple(Lineage))
+
+
+def test_default_rules_are_the_agent_rules():
+    default = StochasticMatrixSimulation(50, 100, 60, seed=5)
+    explicit = StochasticMatrixSimulation(50, 100, 60, seed=5, rules=DEFAULT_RULES)
+    default.run(100)
+    explicit.run(100)
+    assert np.array_equal(default.history.to_numpy(), explicit.history.to_numpy())
+
+
+def test_rules_with_a_third_type_match_the_agent_engine():
+    years = 65
+    agents = []
+    for seed in range(200):
+        sim = ArraySimulation(100, 100, seed=seed, rules=HYBRID_RULES)
+        sim.run(years)
+        agents.append(sim.history.to_numpy())
+    agents = np.array(agents)
+    stochastic = StochasticMatrixSimulation(2000, 100, 100, seed=3, rules=HYBRID_RULES)
+    stochastic.run(years)
+    replicas = stochastic.history.to_numpy().transpose(1, 0, 2)
+
+    hybrids = replicas[:, -1, 2] - replicas[:, -1, 0] - replicas[:, -1, 1]
+    assert hybrids.mean() > 10
+    for year in (20, 40, 60, 65):
+        a, s = agents[:, year - 1], replicas[:, year - 1]
+        standard_error = np.sqrt(a.var(axis=0) / len(a) + s.var(axis=0) / len(s))
+        assert np.all(np.abs(a.mean(axis=0) - s.mean(axis=0)) < 4 * standard_error)
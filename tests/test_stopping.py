@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from simulation.array_engine import ArraySimulation
+from simulation.engine import Simulation
+from simulation.matrix_engine import MatrixSimulation
+from simulation.stopping import EXTINCTION, POPULATION_CAP, STEADY_STATE, StopCriteria
+
+
+@pytest.mark.parametrize("ring_buffer", [False, True])
+@pytest.mark.parametrize("record_every", [1, 7])
+def test_extrapolated_history_matches_stepping(ring_buffer, record_every):
+    stop = StopCriteria(extinction=False, steady_state=True, extrapolate=True)
+    fast = MatrixSimulation(ring_buffer=ring_buffer, record_every=record_every)
+    assert fast.run(5000, stop=stop) == STEADY_STATE
+    assert fast.year < 5000
+
+    assert fast.history.years[-1] <= fast.year < stop.extrapolated.years[0]
+
+    full = MatrixSimulation(ring_buffer=ring_buffer, record_every=record_every)
+    full.run(5000)
+    history = fast.history.concat(stop.extrapolated)
+    assert np.array_equal(history.years, full.history.years)
+    assert np.array_equal(history.to_numpy(), full.history.to_numpy())
+
+
+def test_engine_runs_on_after_extrapolating():
+    stop = StopCriteria(extinction=False, steady_state=True, extrapolate=True)
+    sim = MatrixSimulation()
+    sim.run(5000, stop=stop)
+    stopped_at = sim.year
+
+    full = MatrixSimulation()
+    full.run(stopped_at + 100)
+    sim.run(100)
+    assert np.array_equal(sim.history.years, np.arange(1, stopped_at + 101))
+    assert np.array_equal(sim.history.to_numpy(), full.history.to_numpy())
+
+
+@pytest.mark.parametrize("engine", [Simulation, ArraySimulation])
+def test_stops_on_extinction(engine):
+    sim = engine(100, 100, seed=1)
+    assert sim.run(1000, stop=StopCriteria()) == EXTINCTION
+    last = sim.history[-1]
+    assert last["year"] == sim.year < 1000
+    assert 0 in (last["ordinary"], last["bio"])
+
+
+def test_stops_at_population_cap():
+    sim = MatrixSimulation()
+    assert sim.run(1000, stop=StopCriteria(extinction=False, max_population=300)) == POPULATION_CAP
+    assert sim.history[-1]["total"] > 300
+    assert sim.history[-2]["total"] <= 300
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from simulation.array_engine import ArraySimulation
+from simulation.engine import Simulation
+from simulation.matrix_engine import MatrixSimulation
+from sun_earth.model.integrators import Integrator
+
+ENGINES = [lambda: Simulation(seed=2), lambda: ArraySimulation(seed=2), MatrixSimulation]
+
+
+@pytest.mark.parametrize("make", ENGINES)
+def test_iter_run_records_the_same_history_as_run(make):
+    ran, streamed = make(), make()
+    ran.run(90)
+    snapshots = list(streamed.iter_run(90, every=20))
+
+    assert [s.year for s in snapshots] == [20, 40, 60, 80, 90]
+    assert np.array_equal(streamed.history.to_numpy(), ran.history.to_numpy())
+    last = ran.history[-1]
+    assert (snapshots[-1].ordinary, snapshots[-1].bio, snapshots[-1].total) == \
+        (last["ordinary"], last["bio"], last["total"])
+
+
+def test_iter_run_stops_at_until():
+    sim = ArraySimulation(seed=1)
+    snapshots = list(sim.iter_run(1000, until=lambda s: s.extinct))
+    assert snapshots[-1].extinct
+    assert not any(s.extinct for s in snapshots[:-1])
+    assert sim.year == snapshots[-1].year < 1000
+
+
+def test_integrator_iter_run_matches_run(disk_system):
+    ran, streamed = disk_system(6), disk_system(6)
+    Integrator.run(ran, 30, 0.01, "yoshida4")
+    steps = [s.step for s in Integrator.iter_run(streamed, 30, 0.01, "yoshida4", every=7)]
+
+    assert steps == [7, 14, 21, 28, 30]
+    assert np.array_equal(streamed.positions, ran.positions)
+    assert streamed.time == ran.time
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from simulation.matrix_engine import MatrixSimulation
+from simulation.sweep import MatrixSweep
+
+
+@pytest.mark.parametrize("initial", [(100, 100), (37, 48), (12345, 999)])
+def test_default_scenario_matches_matrix_simulation(initial):
+    reference = MatrixSimulation(*initial)
+    reference.run(2000)
+    sweep = MatrixSweep(*initial)
+    sweep.run(2000)
+
+    assert sweep.history.dtype == np.int64
+    assert np.array_equal(sweep.history[:, 0], reference.history.to_numpy())
+
+
+def test_counts_stay_non_negative_after_extinction():
+    sweep = MatrixSweep(initial_ordinary=100, initial_bio=100)
+    sweep.run(500)
+    assert sweep.history.min() >= 0
+    assert sweep.history[-1, 0, 0] == 0  # Ordinary dies out in the default scenario
+
+
+def test_grid_scenarios_match_individual_runs():
+    sweep = MatrixSweep.from_grid(initial_bio=[50, 150], initial_ordinary=[80, 120])
+    sweep.run(300)
+    for k, (bio, ordinary) in enumerate([(50, 80), (50, 120), (150, 80), (150, 120)]):
+        reference = MatrixSimulation(ordinary, bio)
+        reference.run(300)
+        assert np.array_equal(sweep.history[:, k], reference.history.to_numpy())
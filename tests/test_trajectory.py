@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from sun_earth.model import trajectory as trajectory_module
+from sun_earth.model.trajectory import DEFAULT_CAPACITY, RECORD_BYTES, Trajectory
+
+
+def record(trajectory, count, n_bodies=3, start=0):
+    """Append states start .. start + count - 1, where state k has time k and every coordinate k."""
+    for k in range(start, start + count):
+        trajectory.append(float(k), np.full((n_bodies, 2), float(k)))
+
+
+def test_keeps_the_latest_records_in_order_after_wrapping():
+    trajectory = Trajectory(3, capacity=100)
+    record(trajectory, 257)
+    assert len(trajectory) == 100
+    assert np.array_equal(trajectory.times, np.arange(157, 257))
+    assert np.array_equal(trajectory.positions[:, 2, 1], np.arange(157, 257))
+    assert trajectory.positions.shape == (100, 3, 2)
+    # Zero-copy, contiguous views
+    assert trajectory.positions.flags['C_CONTIGUOUS'] and trajectory.times.flags['C_CONTIGUOUS']
+    assert np.shares_memory(trajectory.positions, trajectory._positions)
+
+
+def test_records_every_stride_th_state():
+    trajectory = Trajectory(3, capacity=10, stride=4)
+    record(trajectory, 50)
+    # States 3, 7, ... 47 are recorded (every 4th append); the last 10 of them kept
+    assert np.array_equal(trajectory.times, np.arange(11, 48, 4))
+    assert np.array_equal(trajectory.body(0)[:, 0], np.arange(11, 48, 4))
+
+
+def test_buffer_grows_with_the_records_held():
+    trajectory = Trajectory(3, capacity=1000)
+    record(trajectory, 10)
+    assert trajectory._size == trajectory_module.INITIAL_RECORDS
+    record(trajectory, 100, start=10)
+    assert trajectory._size == 128
+    assert np.array_equal(trajectory.times, np.arange(110))
+    record(trajectory, 2000, start=110)
+    assert trajectory._size == 1000
+    assert np.array_equal(trajectory.times, np.arange(1110, 2110))
+
+
+def test_default_capacity_fits_the_byte_budget():
+    assert Trajectory(2).capacity == DEFAULT_CAPACITY
+    many = Trajectory(5000)
+    assert many.capacity < DEFAULT_CAPACITY
+    assert RECORD_BYTES * 5000 * many.capacity <= trajectory_module.DEFAULT_MAX_BYTES
+    # An explicit capacity is kept whatever the size
+    assert Trajectory(5000, capacity=DEFAULT_CAPACITY).capacity == DEFAULT_CAPACITY
+
+
+def test_changing_the_number_of_bodies_starts_over():
+    trajectory = Trajectory(0)
+    record(trajectory, 5, n_bodies=2)
+    record(trajectory, 3, n_bodies=4, start=5)
+    assert trajectory.n_bodies == 4
+    assert np.array_equal(trajectory.times, [5, 6, 7])
+
+
+@pytest.mark.parametrize("count", [0, 50, 300])
+def test_state_round_trip(count):
+    trajectory = Trajectory(3, capacity=200, stride=2)
+    record(trajectory, count)
+    restored = Trajectory.from_state(*trajectory.state())
+    assert np.array_equal(restored.times, trajectory.times)
+    assert np.array_equal(restored.positions, trajectory.positions)
+    record(trajectory, 101, start=count)
+    record(restored, 101, start=count)
+    assert np.array_equal(restored.positions, trajectory.positions)
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from sun_earth.config import G, M_EARTH
+from sun_earth.model.kepler import KeplerOrbit
+from sun_earth.model.trajectory_index import TrajectoryIndex
+
+E = 0.2
+PERIHELION_TIME = 0.3
+
+
+def recorded_orbit(years=5.0, every=5 / 365):
+    """A Sun at rest and an Earth on an analytic orbit with perihelion at PERIHELION_TIME, a = 1 AU."""
+    mu = G * (1.0 + M_EARTH)
+    r = 1.0 - E
+    orbit = KeplerOrbit([r, 0.0], [0.0, np.sqrt(mu * (1.0 + E) / r)], mu, epoch=PERIHELION_TIME)
+    times = np.arange(0.0, years + every / 2, every)
+    earth_pos, earth_vel = orbit.state_at(times)
+    positions = np.zeros((len(times), 2, 2))
+    velocities = np.zeros_like(positions)
+    positions[:, 1], velocities[:, 1] = earth_pos, earth_vel
+    index = TrajectoryIndex(times, positions, velocities, names=["Sun", "Earth"], masses=[1.0, M_EARTH])
+    return index, orbit
+
+
+def event_time_error(every):
+    index, orbit = recorded_orbit(every=every)
+    expected = PERIHELION_TIME + orbit.period * np.arange(5)
+    found = index.events("Earth", "periapsis")
+    assert len(found.times) == len(expected)
+    return np.abs(found.times - expected).max()
+
+
+def test_events_match_the_kepler_orbit():
+    index, orbit = recorded_orbit()
+    period = orbit.period
+    expected = {
+        "periapsis": PERIHELION_TIME + period * np.arange(5),
+        "apoapsis": PERIHELION_TIME + period * (np.arange(5) + 0.5),
+    }
+    distance = {"periapsis": 1.0 - E, "apoapsis": 1.0 + E}
+    for kind, times in expected.items():
+        times = times[times < index.times[-1]]
+        found = index.events("Earth", kind)
+        # Five-day records: the interpolated velocity is off by O(dt^3), about a minute in time
+        assert np.allclose(found.times, times, rtol=0, atol=5e-5)
+        assert np.allclose(found.distances, distance[kind], rtol=0, atol=1e-6)
+        assert np.allclose(found.positions, orbit.positions_at(found.times), rtol=0, atol=1e-6)
+
+    when, how_close = index.closest_approach("Earth", start=1.0, stop=2.0)
+    assert when == pytest.approx(PERIHELION_TIME + period, abs=5e-5)
+    assert how_close == pytest.approx(1.0 - E, abs=1e-6)
+
+
+def test_event_times_converge_with_the_record_spacing():
+    # Five times finer records, at least ~5^3 times smaller error
+    assert event_time_error(1 / 365) < event_time_error(5 / 365) / 50
+
+
+def test_state_between_records_follows_the_orbit():
+    index, orbit = recorded_orbit()
+    t = np.linspace(0.01, 4.99, 97)
+    assert np.allclose(index.position_at(t, "Earth"), orbit.positions_at(t), rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize("cell_size", [None, 0.05, 3.0])
+def test_region_queries_match_brute_force(cell_size):
+    rng = np.random.default_rng(0)
+    times = np.arange(200) * 0.1
+    positions = rng.normal(0.0, 2.0, (200, 7, 2))
+    index = TrajectoryIndex(times, positions, cell_size=cell_size)
+    x, y = positions[..., 0], positions[..., 1]
+
+    for _ in range(20):
+        xmin, ymin = rng.uniform(-4, 3, 2)
+        xmax, ymax = xmin + rng.uniform(0, 3), ymin + rng.uniform(0, 3)
+        inside = (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+        assert [a.tolist() for a in index.in_region(xmin, xmax, ymin, ymax)] == \
+            [a.tolist() for a in np.nonzero(inside)]
+
+        start, stop = sorted(rng.uniform(0, 20, 2))
+        center, radius = rng.uniform(-2, 2, 2), rng.uniform(0.1, 2)
+        near = np.hypot(x - center[0], y - center[1]) <= radius
+        near &= ((times >= start) & (times < stop))[:, None]
+        near[:, [0, 3]] = False
+        records, bodies = index.within(center, radius, bodies=[1, 2, 4, 5, 6], start=start, stop=stop)
+        assert [records.tolist(), bodies.tolist()] == [a.tolist() for a in np.nonzero(near)]